@@ -21,12 +21,15 @@
 # THE SOFTWARE.
 import sys
 import logging
+from diagnostics import StartupTimer, logs
+startup = StartupTimer()
+logs.Setup()
 from controllerMenu import ControllerMenu
+startup.Mark("imports")
 
-logging.basicConfig(level=logging.DEBUG)
 try:
     if __name__ == '__main__':
-        menu = ControllerMenu()
+        menu = ControllerMenu(sys.argv[1], startup) if len(sys.argv) > 1 else ControllerMenu(startup=startup)
         menu.Run()
 except:
     logging.CRITICAL("Oops! Exception occured:", exc_info=True)
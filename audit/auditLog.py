@@ -0,0 +1,284 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Append-only, segmented audit log of command executions with an index per segment.
+"""
+import os
+import zlib
+import struct
+import logging
+import threading
+from collections import namedtuple
+
+AUDIT_DIR = "./history"
+SEGMENT_SIZE = 256 * 1024
+SEGMENTS = 8
+FLUSH_INTERVAL = 1.0
+MAX_OUTPUT = 1024
+SEGMENT_NAME = "audit-%06d.log"
+INDEX_NAME = "audit-%06d.idx"
+RECORD = struct.Struct("<IIdfiHHH")         # size, crc32 of the rest, time, duration, code, path/command/output lengths
+INDEX = struct.Struct("<III")               # crc32 of the command, offset, size
+
+AuditEntry = namedtuple("AuditEntry", ["time", "path", "command", "duration", "code", "output"])
+
+class AuditLog(object):
+    '''
+        The AuditLog class records command executions in append-only segment files. Each record holds the time, 
+        the menu path, the command, the duration, the return code and the tail of the output. Every segment has 
+        an index file with a 12 byte entry per record (command hash, offset, size), so the last runs of a 
+        command are found by reading the small index files backwards instead of the segments. Once a segment 
+        exceeds the segment size a new one is started and the oldest segments beyond the configured count are 
+        deleted. 
+        
+        Record only queues the entry; a writer thread appends the queued entries with one write per file every 
+        flush interval, so recording never waits for the disk.
+    '''
+    def __init__(self, directory: str = AUDIT_DIR, segmentSize: int = SEGMENT_SIZE, segments: int = SEGMENTS, 
+                 flushInterval: float = FLUSH_INTERVAL, sync: bool = False):
+        '''
+            Constructor - Opens the audit log in a directory, creating it if necessary.
+            Parameters:
+                directory:      str, optional
+                                The directory containing the segment and index files.
+                segmentSize:    int, optional
+                                Size in bytes after which a new segment is started.
+                segments:       int, optional
+                                Number of segments kept.
+                flushInterval:  float, optional
+                                Seconds between writes of the queued entries.
+                sync:           bool, optional
+                                True to fsync the files after each write. 
+        '''
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__segmentSize = segmentSize
+        self.__segments = segments
+        self.__flushInterval = flushInterval
+        self.__sync = sync
+        self.__pending = []
+        self.__condition = threading.Condition()
+        self.__writeLock = threading.Lock()
+        self.__stopping = False
+        numbers = AuditLog.__numbers(directory)
+        self.__current = numbers[-1] if numbers else 1
+        self.__thread = None
+
+    #region Public properties
+    @property
+    def Directory(self) -> str:
+        ''' Gets the directory of the audit log. '''
+        return self.__directory
+    #endregion
+
+    #region Public methods
+    def Flush(self):
+        '''
+            Writes the queued entries.
+        '''
+        with self.__condition:
+            batch, self.__pending = self.__pending, []
+        if batch: self.__write(batch)
+
+    def Last(self, count: int = 20, command: str = None) -> list:
+        '''
+            Gets the most recent entries, including entries not written yet.
+            Parameters:
+                count:      int, optional
+                            Maximum number of entries.
+                command:    str, optional
+                            Only return runs of this command. All commands if None.
+            Returns:
+                List of AuditEntry, newest first.
+        '''
+        with self.__condition: pending = list(self.__pending)
+        entries = [entry for entry in reversed(pending) if command is None or entry.command == command][:count]
+        return entries + AuditLog.Read(self.__directory, count - len(entries), command)
+
+    def Record(self, entry: AuditEntry):
+        '''
+            Queues an entry to be written by the writer thread. Returns immediately.
+            Parameters:
+                entry:      AuditEntry
+                            The entry. The output is truncated to its last MAX_OUTPUT characters.
+        '''
+        if entry.output and len(entry.output) > MAX_OUTPUT: entry = entry._replace(output=entry.output[-MAX_OUTPUT:])
+        with self.__condition:
+            self.__pending.append(entry)
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name="auditLog", daemon=True)
+                self.__thread.start()
+
+    def Stop(self):
+        '''
+            Writes the queued entries and stops the writer thread.
+        '''
+        with self.__condition:
+            self.__stopping = True
+            self.__condition.notify()
+            thread = self.__thread
+        if thread is not None: thread.join()
+        self.Flush()
+    #endregion
+
+    #region Public class (static) methods
+    @staticmethod
+    def Read(directory: str, count: int = 20, command: str = None) -> list:
+        '''
+            Reads the most recent entries written to an audit log. Can be used while another process writes to it.
+            Parameters:
+                directory:  str
+                            The directory of the audit log.
+                count:      int, optional
+                            Maximum number of entries.
+                command:    str, optional
+                            Only return runs of this command. All commands if None.
+            Returns:
+                List of AuditEntry, newest first.
+        '''
+        entries = []
+        key = zlib.crc32(command.encode()) if command is not None else None
+        for number in reversed(AuditLog.__numbers(directory)):
+            if len(entries) >= count: break
+            try:
+                with open(os.path.join(directory, INDEX_NAME % number), "rb") as f: index = f.read()
+                segment = os.open(os.path.join(directory, SEGMENT_NAME % number), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                end = len(index) - len(index) % INDEX.size
+                for position in range(end - INDEX.size, -1, -INDEX.size):
+                    hashed, offset, size = INDEX.unpack_from(index, position)
+                    if key is not None and hashed != key: continue
+                    entry = AuditLog.__decode(os.pread(segment, size, offset))
+                    if entry is None or (command is not None and entry.command != command): continue
+                    entries.append(entry)
+                    if len(entries) >= count: break
+            finally:
+                os.close(segment)
+        return entries
+    #endregion
+
+    #region Private method implementations
+    def __run(self):
+        '''
+            Writer thread entry point writing the queued entries every flush interval.
+        '''
+        while True:
+            with self.__condition:
+                if not self.__stopping: self.__condition.wait(self.__flushInterval)
+                if self.__stopping: return
+            try:
+                self.Flush()
+            except OSError as e:
+                logging.error("Could not write the audit log: %s", e)
+
+    def __write(self, batch: list):
+        '''
+            Appends a batch of entries to the current segment and its index, rotating the segment if it is full.
+        '''
+        with self.__writeLock:
+            path = os.path.join(self.__directory, SEGMENT_NAME % self.__current)
+            offset = os.path.getsize(path) if os.path.exists(path) else 0
+            records = []
+            index = []
+            for entry in batch:
+                if offset >= self.__segmentSize:
+                    self.__flush(records, index)
+                    records, index, offset = [], [], 0
+                    self.__current += 1
+                    self.__rotate()
+                record = AuditLog.__encode(entry)
+                records.append(record)
+                index.append(INDEX.pack(zlib.crc32(entry.command.encode()), offset, len(record)))
+                offset += len(record)
+            self.__flush(records, index)
+
+    def __flush(self, records: list, index: list):
+        '''
+            Appends encoded records and their index entries to the current segment.
+        '''
+        if not records: return
+        self.__append(os.path.join(self.__directory, SEGMENT_NAME % self.__current), b"".join(records))
+        self.__append(os.path.join(self.__directory, INDEX_NAME % self.__current), b"".join(index))
+
+    def __append(self, path: str, data: bytes):
+        '''
+            Appends data to a file with a single write.
+        '''
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            if self.__sync: os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __rotate(self):
+        '''
+            Deletes the oldest segments beyond the configured count.
+        '''
+        numbers = AuditLog.__numbers(self.__directory)
+        for number in numbers[:max(0, len(numbers) - self.__segments + 1)]:
+            for name in (SEGMENT_NAME, INDEX_NAME):
+                try:
+                    os.unlink(os.path.join(self.__directory, name % number))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def __decode(record: bytes) -> AuditEntry:
+        '''
+            Decodes a record. 
+            Returns:
+                The AuditEntry, or None if the record is incomplete or corrupt.
+        '''
+        if len(record) < RECORD.size: return None
+        size, crc, created, duration, code, pathLength, commandLength, outputLength = RECORD.unpack_from(record)
+        if size != len(record) or zlib.crc32(record[8:]) != crc: return None
+        data = record[RECORD.size:].decode(errors="replace")
+        path = data[:pathLength]
+        command = data[pathLength:pathLength + commandLength]
+        return AuditEntry(created, path, command, duration, code, data[pathLength + commandLength:])
+
+    @staticmethod
+    def __encode(entry: AuditEntry) -> bytes:
+        '''
+            Encodes an entry as a record.
+        '''
+        path, command, output = entry.path or "", entry.command, entry.output or ""
+        data = (path + command + output).encode(errors="replace")
+        body = struct.pack("<dfiHHH", entry.time, entry.duration, entry.code, len(path), len(command), len(output)) + data
+        return struct.pack("<II", RECORD.size + len(data), zlib.crc32(body)) + body
+
+    @staticmethod
+    def __numbers(directory: str) -> list:
+        '''
+            Gets the numbers of the segments in a directory, ascending.
+        '''
+        numbers = []
+        for name in os.listdir(directory) if os.path.isdir(directory) else []:
+            if name.startswith("audit-") and name.endswith(".log"):
+                try:
+                    numbers.append(int(name[6:-4]))
+                except ValueError:
+                    pass
+        return sorted(numbers)
+    #endregion
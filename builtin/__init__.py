@@ -21,6 +21,34 @@
 """
     Module implementing the base class and various built-in commands for the Pi Menu
 """
-from .builtin import BuiltInCommand
-from .sysInfo import SysInfo
-from .network import NetInfo
\ No newline at end of file
+import importlib
+from .registry import Registry
+from .worker import REFRESH_SECONDS       # registered here for the refresh times forwarded by the command worker
+
+Registry.Register("sysInfo", "builtin.sysInfo:SysInfo")
+Registry.Register("netInfo", "builtin.network:NetInfo")
+Registry.Register("topProcesses", "builtin.processes:TopProcesses")
+Registry.Register("throughput", "builtin.throughput:Throughput")
+Registry.Register("logTail", "builtin.logTail:LogTail")
+Registry.Register("profiler", "builtin.profiler:Profiler", inProcess=True)
+Registry.Register("history", "builtin.history:History")
+Registry.Register("dashboard", "builtin.dashboard:Dashboard")
+
+__lazy = {
+    "BuiltInCommand": ".builtin",
+    "SysInfo": ".sysInfo",
+    "NetInfo": ".network",
+    "TopProcesses": ".processes",
+    "Throughput": ".throughput",
+    "LogTail": ".logTail",
+    "Profiler": ".profiler",
+    "History": ".history",
+    "Dashboard": ".dashboard"
+}
+
+def __getattr__(name):
+    """
+        Imports the built-in classes on first access so importing the package stays cheap.
+    """
+    if name in __lazy: return getattr(importlib.import_module(__lazy[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
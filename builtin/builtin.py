@@ -24,13 +24,20 @@ import threading
 from abc import ABC, abstractmethod
 from display import Display
 from PIL import Image, ImageDraw, ImageFont
+from .worker import BuiltInWorker, REFRESH_SECONDS
 
 class BuiltInCommand(ABC):
     '''
         The BuiltInCommand class implments the abstract base class for the various built-in 
-        commands of the PI Menu
+        commands of the PI Menu. Instances are meant to be reused: they share one canvas per display 
+        size, or the canvas of the display if it shares it, and are run on a single shared worker thread.
     '''
 
+    __worker: BuiltInWorker = BuiltInWorker()
+    __canvases: dict = {}
+    __paused: bool = False
+    __active = None
+
     def __init__(self, disp: Display):
         '''
             Constructor - Creates a new instance of the BuiltInCommand class.
@@ -39,11 +46,11 @@ class BuiltInCommand(ABC):
                             An instance of the display object representing the screen.
         '''
         self._disp: Display = disp
-        self._image = Image.new('RGB', self._disp.Dimensions)
-        self._canvas = ImageDraw.Draw(self._image)
+        self._image, self._canvas = self._disp.SharedCanvas or BuiltInCommand.__canvas(self._disp.Dimensions)
         self._output:list = []
         self._padding = 10
-        self.__runThread = None
+        self._interval = 1
+        self.__wakeEvent = threading.Event()
         super().__init__()
 
     @property
@@ -51,9 +58,23 @@ class BuiltInCommand(ABC):
         """ Gets the list of shell commands to run for the built-in command. """
         return []
 
+    @staticmethod
+    def Pause(paused: bool):
+        '''
+            Pauses or resumes the refreshes of the running built-in, e.g. while the display is idle. A paused 
+            built-in still stops when asked to.
+            Parameters:
+                paused:     bool
+                            True to pause, False to resume.
+        '''
+        BuiltInCommand.__paused = paused
+        active = BuiltInCommand.__active
+        if active is not None and not paused: active._wake()
+
     def Run(self, stop: callable, completed: callable = None):
         '''
-            Call this to run the sysinfo command. This will start a background thread and immidiately return.
+            Call this to run the built-in command. This hands the command to the shared worker thread and immidiately 
+            returns. A built-in that is still running is stopped first.
             Parameters:
                 stop :      Callable
                             Function to be called periodically to evaluate whether command execution
@@ -63,8 +84,14 @@ class BuiltInCommand(ABC):
                             Function to be called upon completion of the command (after stop evaluates to True). 
                             The function is not expected to take any arguments or return a value.  
         '''
-        self.__runThread = threading.Thread(target=self.__run, name="runThread", args=(stop, completed))
-        self.__runThread.start()
+        BuiltInCommand.__worker.Submit(self, stop, completed)
+
+    def _activate(self):
+        '''
+            Called on the worker thread each time the command starts running. Override in derived classes to 
+            discard state left over from a previous run. 
+        '''
+        pass
 
     @abstractmethod
     def _draw(self):
@@ -74,6 +101,65 @@ class BuiltInCommand(ABC):
         '''
         pass
 
+    def _execute(self, stop: callable):
+        '''
+            Runs the command on the worker thread until stop evaluates to True. 
+            Parameters
+                stop :      Callable
+                            Function to be called periodically to evaluate whether command execution
+                            should stop. This method should return True to exit the command, False to keep 
+                            running the command.The Function does not take any arguments.  
+        '''
+        self.__wakeEvent.clear()
+        self._activate()
+        self._disp.ExternalCallback = self.__navigate
+        BuiltInCommand.__active = self
+        name = type(self).__name__
+        try:
+            while True:
+                started = time.perf_counter()
+                self._getData()
+                self._draw()
+                REFRESH_SECONDS.Observe(time.perf_counter() - started, (name, ))
+                if stop(): break
+                self._wait(self._interval)
+                while BuiltInCommand.__paused and not stop(): self._wait(self._interval)
+                if stop(): break
+        finally:
+            # also return to the menu if the command failed
+            BuiltInCommand.__active = None
+            self._disp.ExternalCallback = None
+            self._disp.StopCommand = False      # this is necessary to reset the stop command flag, unfortunately.
+                                                # got to look for a better way, but for now it will do.  
+            if not BuiltInCommand.__worker.Superseded: self._disp.DrawMenu()
+
+    def _navigate(self, eventType: int):
+        '''
+            Called with the navigation events received while the command is running. The command wakes up for 
+            a refresh after each event. Override in derived classes to implement scrolling or paging. 
+            Parameters:
+                eventType:  int
+                            The navigation event.
+        '''
+        pass
+
+    def _wait(self, timeout: float):
+        '''
+            Waits between two refreshes of the command, returning early when woken by BuiltInCommand._wake. 
+            Override in derived classes to also wake up on other events.
+            Parameters:
+                timeout:    float
+                            Maximum time to wait in seconds.
+        '''
+        self.__wakeEvent.wait(timeout)
+        self.__wakeEvent.clear()
+
+    def _wake(self):
+        '''
+            Wakes the command up from BuiltInCommand._wait, e.g. to stop or to redraw.
+        '''
+        self.__wakeEvent.set()
+
     def _getData(self):
         '''
             Gets the data for command by calling various shell commands defined in BuiltInCommand.commands
@@ -84,24 +170,25 @@ class BuiltInCommand(ABC):
             m = list(filter(None, o.split("__br__")))
             self._output += m
 
-    def __run(self, stop: callable, complete: callable):
+    def __navigate(self, eventType: int):
         '''
-            Background thread entry point for the command.
-            Parameters
-                stop :      Callable
-                            Function to be called periodically to evaluate whether command execution
-                            should stop. This method should return True to exit the command, False to keep 
-                            running the command.The Function does not take any arguments.  
-                completed:  Callable
-                            Function to be called upon completion of the command (after stop evaluates to True). 
-                            The function is not expected to take any arguments or return a value.  
+            Delegate registered as Display.ExternalCallback while the command is running. 
+        '''
+        self._navigate(eventType)
+        self._wake()
+
+    @staticmethod
+    def __canvas(dimensions: tuple) -> tuple:
+        '''
+            Gets the canvas shared by all built-ins for a display size. Only one built-in is active at a 
+            time so the canvas does not need to be owned by the individual instance.
+            Parameters:
+                dimensions: (int, int)
+                            The display dimensions.
+            Returns:
+                Tuple of (Image, ImageDraw)
         '''
-        while True:
-            self._getData()
-            self._draw()
-            if stop(): break
-            time.sleep(1)
-        self._disp.StopCommand = False      # this is necessary to reset the stop command flag, unfortunately.
-                                            # got to look for a better way, but for now it will do.  
-        self._disp.DrawMenu()
-        if complete is not None: complete()
+        if dimensions not in BuiltInCommand.__canvases:
+            image = Image.new('RGB', dimensions)
+            BuiltInCommand.__canvases[dimensions] = (image, ImageDraw.Draw(image))
+        return BuiltInCommand.__canvases[dimensions]
@@ -0,0 +1,147 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import logging
+import subprocess
+import yaml
+from builtin import BuiltInCommand
+from builtin.layout import Layout
+from display import Display
+from .probes import Probes
+
+DASHBOARD_FILE = "./dashboards.yaml"
+SHELL_TIMEOUT = 5
+
+class Dashboard(BuiltInCommand):
+    '''
+        The Dashboard class implements a built-in screen defined by a declarative layout, see builtin.layout. 
+        The layout is compiled once; each refresh reads the values and redraws only the fields that changed. 
+        
+        Dashboards are defined in dashboards.yaml next to controllerMenu.yaml, one per top level key. Besides 
+        the layout keys a dashboard has an optional interval (seconds between refreshes) and sources, mapping 
+        value names to {shell: command} (the stripped output), {file: path} (the stripped content) with an 
+        optional scale factor applied to numeric values, or {value: constant}. Values without a source are 
+        read from the well known probes: load1, load5, load15, memUsed, memTotal, memPercent, diskUsed, 
+        diskTotal, diskPercent, temperature, ip, hostname and uptime.
+    '''
+    def __init__(self, disp: Display, name: str = None, file: str = DASHBOARD_FILE, layout: dict = None):
+        '''
+            Constructor - Creates a new instance of the Dashboard class.
+            Parameters:
+                disp :      Display
+                            An instance of the display object representing the screen.
+                name:       str, optional
+                            Name of the dashboard in the dashboard file.
+                file:       str, optional
+                            The dashboard file. Defaults to ./dashboards.yaml
+                layout:     dict, optional
+                            The dashboard definition. Used instead of the dashboard file if given.
+        '''
+        super().__init__(disp)
+        if layout is None: layout = Dashboard.Load(file, name)
+        self.__sources = layout.get("sources") or {}
+        self._interval = layout.get("interval", 1)
+        self.__layout = Layout(layout, disp.Dimensions, disp.Font, disp.SmallFont, self._padding)
+        self.__probes = Probes()
+        self.__values = {}
+        self.__full = True
+
+    #region Public class (static) methods
+    @staticmethod
+    def Load(file: str, name: str) -> dict:
+        '''
+            Reads a dashboard definition from a dashboard file.
+            Parameters:
+                file:       str
+                            The dashboard file.
+                name:       str
+                            Name of the dashboard.
+            Returns:
+                The dashboard definition.
+        '''
+        with open(file) as f: dashboards = yaml.safe_load(f) or {}
+        if name not in dashboards:
+            message = f"Dashboard '{name}' is not defined in {file}"
+            logging.error(message)
+            raise Exception(message)
+        return dashboards[name]
+    #endregion
+
+    #region Protected methods
+    def _activate(self):
+        '''
+            Forces a full redraw, the shared canvas was used by another screen.
+        '''
+        self.__full = True
+
+    def _draw(self):
+        '''
+            Draws the fields that changed since the last refresh and sends only their regions to the panel.
+        '''
+        boxes = self.__layout.Render(self._canvas, self.__values, self.__full)
+        if not boxes: return
+        self._disp.DrawImage(self._image, None if self.__full else boxes)
+        self.__full = False
+
+    def _getData(self):
+        '''
+            Reads the values of the layout from their sources.
+        '''
+        keys = self.__layout.Keys | set(self.__sources)
+        values = self.__probes.Read(keys - set(self.__sources))
+        for key, source in self.__sources.items(): values[key] = self.__read(source)
+        self.__values = values
+
+    def _setValues(self, values: dict):
+        '''
+            Sets the values drawn on the next refresh, for derived classes reading their own values.
+        '''
+        self.__values = values
+
+    def _setLayout(self, layout: Layout):
+        '''
+            Replaces the compiled layout, e.g. when derived classes adapt it to the data.
+        '''
+        self.__layout = layout
+        self.__full = True
+    #endregion
+
+    #region Private methods
+    def __read(self, source: dict):
+        '''
+            Reads a value from a configured source.
+        '''
+        value = None
+        try:
+            if "shell" in source: 
+                value = subprocess.run(source["shell"], shell=True, capture_output=True, timeout=SHELL_TIMEOUT).stdout.decode().strip()
+            elif "file" in source:
+                with open(source["file"]) as f: value = f.read().strip()
+            else:
+                value = source.get("value")
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if "scale" in source and value is not None:
+            try:
+                value = float(value) * source["scale"]
+            except ValueError:
+                pass
+        return value
+    #endregion
@@ -0,0 +1,114 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Probes reading the values shown on dashboards from /proc and /sys.
+"""
+import os
+import socket
+from builtin.procfs import ProcFile, ReadFile
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+class Probes(object):
+    '''
+        The Probes class reads the well known dashboard values. Each probe reads one source and returns 
+        several values, and only the probes for the requested values are read. The /proc files are kept open.
+    '''
+    def __init__(self):
+        '''
+            Constructor - Creates a new instance of the Probes class.
+        '''
+        self.__loadavg = ProcFile("/proc/loadavg")
+        self.__meminfo = ProcFile("/proc/meminfo")
+        self.__uptime = ProcFile("/proc/uptime")
+        self.__probes = {}
+        for probe, keys in (
+                (self.__load, ("load1", "load5", "load15")), 
+                (self.__memory, ("memUsed", "memTotal", "memPercent")),
+                (self.__disk, ("diskUsed", "diskTotal", "diskPercent")),
+                (self.__temperature, ("temperature", )),
+                (self.__address, ("ip", "hostname")),
+                (self.__uptimeProbe, ("uptime", ))):
+            for key in keys: self.__probes[key] = probe
+
+    #region Public methods
+    def Read(self, keys: set) -> dict:
+        '''
+            Reads the values of well known keys. Unknown keys are ignored.
+            Parameters:
+                keys:       set(str)
+                            The names of the values.
+            Returns:
+                A dict with the values read.
+        '''
+        values = {}
+        for probe in {self.__probes[key] for key in keys if key in self.__probes}:
+            try:
+                values.update(probe())
+            except (OSError, ValueError, IndexError, KeyError):
+                pass
+        return values
+    #endregion
+
+    #region Probes
+    def __address(self) -> dict:
+        ''' Primary IP address (of the default route) and host name. '''
+        ip = None
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect(("192.0.2.1", 9))    # no packet is sent, connect only selects the route
+                ip = s.getsockname()[0]
+        except OSError:
+            pass
+        return {"ip": ip, "hostname": socket.gethostname()}
+
+    def __disk(self) -> dict:
+        ''' Used and total size of the root file system in GB, and the percentage used as df computes it. '''
+        st = os.statvfs("/")
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        available = st.f_bavail * st.f_frsize
+        return {"diskUsed": used / 2**30, "diskTotal": st.f_blocks * st.f_frsize / 2**30, 
+            "diskPercent": 100.0 * used / (used + available) if used + available else 0.0}
+
+    def __load(self) -> dict:
+        ''' Load averages. '''
+        fields = self.__loadavg.Read().split()
+        return {"load1": float(fields[0]), "load5": float(fields[1]), "load15": float(fields[2])}
+
+    def __memory(self) -> dict:
+        ''' Used and total memory in MB, used being the memory not available to new processes. '''
+        info = {}
+        for line in self.__meminfo.Read().split(b"\n"):
+            name, _, rest = line.partition(b":")
+            if name in (b"MemTotal", b"MemAvailable"): info[name] = int(rest.split()[0]) // 1024
+        total = info[b"MemTotal"]
+        used = total - info[b"MemAvailable"]
+        return {"memUsed": used, "memTotal": total, "memPercent": 100.0 * used / total}
+
+    def __temperature(self) -> dict:
+        ''' CPU temperature in degrees Celsius. '''
+        data = ReadFile(THERMAL_ZONE)
+        return {"temperature": int(data) / 1000} if data else {}
+
+    def __uptimeProbe(self) -> dict:
+        ''' Time since boot in seconds. '''
+        return {"uptime": float(self.__uptime.Read().split()[0])}
+    #endregion
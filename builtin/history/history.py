@@ -0,0 +1,112 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+import os
+import threading
+from audit import AuditLog, AUDIT_DIR
+from builtin import BuiltInCommand
+from display import Display
+from navigation import UP_CLICK, DOWN_CLICK
+
+class History(BuiltInCommand):
+    '''
+        The History class implements a viewer of the recent command runs recorded in the audit log for the 
+        PI Menu. Each run is shown with its start time, return code, command and menu path, failed runs in red. 
+        The audit log is read through its index, so only the shown runs are read from the segments. UP and 
+        DOWN scroll through the runs.
+    '''
+    def __init__(self, disp: Display, directory: str = AUDIT_DIR, count: int = 50, command: str = None):
+        '''
+            Constructor - Creates a new instance of the History class.
+            Parameters:
+                disp :      Display
+                            An instance of the display object representing the screen.
+                directory:  str, optional
+                            The directory of the audit log. 
+                count:      int, optional
+                            Number of runs shown. Defaults to 50.
+                command:    str, optional
+                            Only show the runs of this command. All commands if None.
+        '''
+        super().__init__(disp)
+        self.__directory = directory
+        self.__count = count
+        self.__command = command
+        self.__entries = []
+        self.__scroll = 0
+        self.__dirty = True
+        self.__modified = None
+        self.__lock = threading.Lock()
+        self._interval = 2
+
+    def _activate(self):
+        '''
+            Rereads the audit log and forces a redraw when the viewer is opened again.
+        '''
+        self.__modified = None
+        self.__scroll = 0
+
+    def _draw(self):
+        '''
+            Draws the visible runs. Nothing is drawn if neither the runs nor the scroll position changed.
+        '''
+        with self.__lock:
+            if not self.__dirty: return
+            self.__dirty = False
+            font = self._disp.SmallFont
+            height = self._disp.Dimensions[1]
+            lineHeight = font.getsize("Ag")[1] + 1
+            rows = max(1, (height - 2*self._padding) // lineHeight)
+            visible = self.__entries[self.__scroll:self.__scroll + rows]
+        self._canvas.rectangle([(0, 0), self._disp.Dimensions], outline=0, fill=(0, 0, 0))
+        y = self._padding
+        if not visible: self._canvas.text((self._padding, y), "No commands run", font=font, fill="#ffffff")
+        for entry in visible:
+            text = "%s %4d %s %s" % (time.strftime("%H:%M", time.localtime(entry.time)), entry.code, entry.command, entry.path)
+            self._canvas.text((self._padding, y), text, font=font, fill="#00ff00" if entry.code == 0 else "#ff0000")
+            y += lineHeight
+        self._disp.DrawImage(self._image)
+
+    def _getData(self):
+        '''
+            Rereads the recent runs when an index file of the audit log changed.
+        '''
+        try:
+            modified = max(entry.stat().st_mtime_ns for entry in os.scandir(self.__directory) if entry.name.endswith(".idx"))
+        except (OSError, ValueError):
+            modified = 0
+        if modified == self.__modified: return
+        entries = AuditLog.Read(self.__directory, self.__count, self.__command)
+        with self.__lock:
+            self.__modified = modified
+            self.__entries = entries
+            self.__scroll = min(self.__scroll, max(0, len(entries) - 1))
+            self.__dirty = True
+
+    def _navigate(self, eventType: int):
+        '''
+            Scrolls the view. UP shows newer runs, DOWN older runs.
+        '''
+        with self.__lock:
+            if eventType == DOWN_CLICK and self.__scroll < len(self.__entries) - 1: self.__scroll += 1
+            elif eventType == UP_CLICK and self.__scroll > 0: self.__scroll -= 1
+            else: return
+            self.__dirty = True
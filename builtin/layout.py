@@ -0,0 +1,280 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Declarative screen layouts for built-in commands, compiled into fixed draw operations.
+"""
+import bisect
+import logging
+from PIL import ImageDraw, ImageFont
+from display.outputView import TextWrapper
+
+DEFAULT_COLOR = "#ffffff"
+BACKGROUND = (0, 0, 0)
+DEFAULT_SPACING = 4
+MISSING = "-"
+ELLIPSIS = "\u2026"
+
+class Missing(object):
+    '''
+        Placeholder for a value that is not available. It is formatted as MISSING with any format specification.
+    '''
+    def __format__(self, spec: str) -> str:
+        return MISSING
+
+class Values(dict):
+    '''
+        The Values class is the dictionary of field values passed to Layout.Render. Values that are not 
+        available, or None, are formatted as MISSING.
+    '''
+    def __init__(self, values: dict):
+        super().__init__((key, Missing() if value is None else value) for key, value in values.items())
+
+    def __missing__(self, key):
+        return Missing()
+
+class Field(object):
+    '''
+        The Field class is a compiled value field or bar of a layout. Its box is fixed at compile time; it 
+        remembers what it drew last and only redraws when the formatted text, the fill or the color change. 
+        Text that does not fit the box is cut and ends with an ellipsis, so it never draws over its neighbours.
+    '''
+    def __init__(self, spec: dict, box: tuple, font: ImageFont, color: str):
+        '''
+            Constructor - Creates a new instance of the Field class.
+            Parameters:
+                spec:       dict
+                            The field specification, see Layout.
+                box:        tuple(int, int, int, int)
+                            The region (left, top, right, bottom) of the field.
+                font:       ImageFont
+                            Font of the field.
+                color:      str
+                            Default color of the field.
+        '''
+        self.Box = box
+        self.Key = spec.get("value", spec.get("bar"))
+        self.__bar = "bar" in spec
+        self.__format = spec.get("format", "{%s}" % self.Key)
+        self.__font = font
+        self.__color = spec.get("color", color)
+        self.__thresholds = spec.get("thresholds") or []
+        self.__colors = spec.get("colors")
+        self.__minimum = spec.get("min", 0)
+        self.__maximum = spec.get("max", 100)
+        self.__align = spec.get("align", "left")
+        self.__wrapper = TextWrapper(font, box[2] - box[0], spec.get("breaks", " ")) if spec.get("lines", 1) > 1 else None
+        ascent, descent = font.getmetrics()
+        self.__lineHeight = ascent + descent
+        self.__last = None
+
+    def Render(self, draw: ImageDraw, values: Values, force: bool = False) -> tuple:
+        '''
+            Draws the field if its content changed.
+            Parameters:
+                draw:       ImageDraw
+                            The drawing context.
+                values:     Values
+                            The field values.
+                force:      bool, optional
+                            True to draw the field even if its content did not change.
+            Returns:
+                The box of the field if it was drawn, None otherwise.
+        '''
+        value = values.get(self.Key)
+        color = self.__resolve(value)
+        if self.__bar: content = self.__fill(value)
+        else:
+            try:
+                content = self.__format.format_map(values)
+            except (ValueError, TypeError, KeyError, IndexError):
+                content = MISSING
+        if not force and self.__last == (content, color): return None
+        self.__last = (content, color)
+        left, top, right, bottom = self.Box
+        draw.rectangle((left, top, right - 1, bottom - 1), fill=BACKGROUND)
+        if self.__bar:
+            draw.rectangle((left, top, right - 1, bottom - 1), outline=color)
+            if content > 0: draw.rectangle((left, top, left + content - 1, bottom - 1), fill=color)
+        elif self.__wrapper is not None:
+            lines = self.__wrapper.Wrap([(content, color)])
+            rows = max(1, (bottom - top) // self.__lineHeight)
+            if len(lines) > rows:
+                lines = lines[:rows]
+                x, text, runColor = lines[-1][-1]
+                lines[-1] = lines[-1][:-1] + [(x, self.__fit(text.rstrip(), right - left - x, True), runColor)]
+            for line in lines:
+                for x, text, runColor in line: draw.text((left + x, top), text, font=self.__font, fill=runColor)
+                top += self.__lineHeight
+        else:
+            content = self.__fit(content, right - left)
+            if self.__align == "right": left = right - self.__font.getsize(content)[0]
+            draw.text((left, top), content, font=self.__font, fill=color)
+        return self.Box
+
+    def __fit(self, text: str, width: int, cut: bool = False) -> str:
+        '''
+            Shortens a text to a width in pixels, ending it with ELLIPSIS if it was cut. A cut text ends with 
+            ELLIPSIS even if it fits.
+        '''
+        if not cut and self.__font.getsize(text)[0] <= width: return text
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.__font.getsize(text[:middle] + ELLIPSIS)[0] <= width: low = middle
+            else: high = middle - 1
+        return text[:low] + ELLIPSIS if self.__font.getsize(ELLIPSIS)[0] <= width else ""
+
+    def __fill(self, value) -> int:
+        '''
+            Computes the filled width of a bar.
+        '''
+        try:
+            fraction = (float(value) - self.__minimum) / (self.__maximum - self.__minimum)
+        except (ValueError, TypeError, ZeroDivisionError):
+            return 0
+        return int(max(0.0, min(1.0, fraction)) * (self.Box[2] - self.Box[0]))
+
+    def __resolve(self, value) -> str:
+        '''
+            Computes the color of the field from its value.
+        '''
+        if isinstance(self.__colors, dict): return self.__colors.get(value, self.__colors.get("*", self.__color))
+        if not self.__colors: return self.__color
+        try:
+            idx = bisect.bisect_right(self.__thresholds, float(value))
+        except (ValueError, TypeError):
+            return self.__color
+        return self.__colors[min(idx, len(self.__colors) - 1)]
+
+class Layout(object):
+    '''
+        The Layout class compiles a declarative screen specification into a flat list of static draw operations 
+        and value fields with fixed geometry. Text is measured once, at compile time. Rendering draws the static 
+        operations only on a full redraw; otherwise only the fields whose content changed are redrawn, and 
+        their boxes are returned as the dirty regions to send to the panel. 
+        
+        A specification is a dict (e.g. from YAML) with the keys:
+            font:       "normal" or "small", the default font
+            color:      default color
+            spacing:    pixels between rows
+            rows:       list of rows, top to bottom
+        A row is a list of items, or a dict with the keys items, font, indent, spacing or gap (an empty row of 
+        the given height). An item is one of
+            {label: text}               static text
+            {value: name}               a value field, with the optional keys format (str.format template over 
+                                        all values, defaults to "{name}"), lines and breaks (wrap over several 
+                                        lines after the break characters) and align (left or right)
+            {bar: name}                 a bar filled from min (default 0) to max (default 100)
+        and may have the keys width (pixels, defaults to the text width of a label and a share of the rest of 
+        the row otherwise), font and color. Value fields and bars are colored by colors, either a list of colors 
+        selected by the numeric value against the ascending thresholds, or a dict mapping values to colors with 
+        "*" as the fallback.
+    '''
+    def __init__(self, spec: dict, dimensions: tuple, font: ImageFont, smallFont: ImageFont, padding: int = 10):
+        '''
+            Constructor - Compiles a layout.
+            Parameters:
+                spec:       dict
+                            The layout specification.
+                dimensions: tuple(int, int)
+                            The dimensions of the display.
+                font:       ImageFont
+                            The normal font.
+                smallFont:  ImageFont
+                            The small font.
+                padding:    int, optional
+                            Space in pixels around the layout.
+        '''
+        self.__dimensions = dimensions
+        self.__fonts = {"normal": font, "small": smallFont}
+        self.__statics = []
+        self.__fields = []
+        self.__compile(spec, padding)
+
+    #region Public properties
+    @property
+    def Keys(self) -> set:
+        ''' Gets the names of the values used by the layout. '''
+        return {field.Key for field in self.__fields}
+    #endregion
+
+    #region Public methods
+    def Render(self, draw: ImageDraw, values: dict, full: bool = False) -> list:
+        '''
+            Draws the layout.
+            Parameters:
+                draw:       ImageDraw
+                            The drawing context.
+                values:     dict
+                            The field values.
+                full:       bool, optional
+                            True to clear the canvas and draw everything, e.g. when the canvas was used by 
+                            another screen.
+            Returns:
+                The list of regions (left, top, right, bottom) drawn. 
+        '''
+        values = values if isinstance(values, Values) else Values(values)
+        if full:
+            draw.rectangle([(0, 0), self.__dimensions], outline=0, fill=BACKGROUND)
+            for position, text, font, color in self.__statics: draw.text(position, text, font=font, fill=color)
+        dirty = [box for box in (field.Render(draw, values, full) for field in self.__fields) if box is not None]
+        return [(0, 0) + tuple(self.__dimensions)] if full else dirty
+    #endregion
+
+    #region Private methods
+    def __compile(self, spec: dict, padding: int):
+        '''
+            Computes the geometry of all rows and items.
+        '''
+        font = self.__fonts.get(spec.get("font", "normal"), self.__fonts["normal"])
+        color = spec.get("color", DEFAULT_COLOR)
+        spacing = spec.get("spacing", DEFAULT_SPACING)
+        width, height = self.__dimensions
+        y = padding
+        for row in spec.get("rows") or []:
+            if isinstance(row, list): row = {"items": row}
+            if "gap" in row:
+                y += row["gap"]
+                continue
+            rowFont = self.__fonts.get(row.get("font"), font)
+            items = row.get("items") or []
+            fonts = [self.__fonts.get(item.get("font"), rowFont) for item in items]
+            lines = max([item.get("lines", 1) for item in items] or [1])
+            rowHeight = max([sum(f.getmetrics()) for f in fonts] or [0]) * lines
+            # fixed widths first, the rest of the row is shared by the items without a width
+            left = padding + row.get("indent", 0)
+            widths = [item.get("width", f.getsize(item["label"])[0] if "label" in item else None) for item, f in zip(items, fonts)]
+            flexible = widths.count(None)
+            rest = max(0, width - padding - left - sum(w for w in widths if w is not None))
+            x = left
+            for item, itemFont, itemWidth in zip(items, fonts, widths):
+                if itemWidth is None: itemWidth = rest // flexible
+                if "label" in item:
+                    self.__statics.append(((x, y), item["label"], itemFont, item.get("color", color)))
+                elif "value" in item or "bar" in item:
+                    inset = 0 if "value" in item else min(2, rowHeight // 4)
+                    box = (x, y + inset, min(width, x + itemWidth), y + rowHeight - inset)
+                    self.__fields.append(Field(item, box, itemFont, color))
+                else:
+                    logging.warning("Layout item %s is neither a label, a value nor a bar", item)
+                x += itemWidth
+            y += rowHeight + row.get("spacing", spacing)
+    #endregion
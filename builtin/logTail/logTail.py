@@ -0,0 +1,228 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import select
+import logging
+import threading
+from collections import deque
+from builtin import BuiltInCommand
+from display import Display
+from display.outputView import TextWrapper, ParseAnsi
+from navigation import UP_CLICK, DOWN_CLICK
+from watch import Inotify, IN_MODIFY, IN_CREATE, IN_MOVED_TO, IN_DELETE, IN_Q_OVERFLOW
+
+BACKLOG = 4096
+COLORS = ["#00ff00", "#ffff00", "#00ffff", "#ff00ff"]
+
+class TailedFile(object):
+    '''
+        The TailedFile class follows a single file, returning only the bytes appended since the last read. 
+        Rotation (the path pointing to a new inode) and truncation are detected on every read.
+    '''
+    def __init__(self, path: str):
+        '''
+            Constructor - Creates a new instance of the TailedFile class.
+            Parameters:
+                path:       str
+                            Path of the file to follow.
+        '''
+        self.Path = path
+        self.__file = None
+        self.__inode = None
+        self.__offset = 0
+        self.__partial = b""
+
+    def Close(self):
+        ''' Closes the followed file. '''
+        if self.__file is not None: self.__file.close()
+        self.__file = None
+        self.__inode = None
+
+    def Read(self) -> list:
+        '''
+            Reads the complete lines appended to the file since the last read. On the first read, only the 
+            last few kilobytes of the file are returned.
+            Returns:
+                The list of new lines.
+        '''
+        try:
+            st = os.stat(self.Path)
+        except OSError:
+            return []
+        lines = []
+        if self.__file is not None and st.st_ino != self.__inode:
+            # rotated: drain what was written to the old file, then follow the new one from the start
+            rest = self.__partial + self.__file.read()
+            if rest: lines = rest.rstrip(b"\n").split(b"\n")
+            self.Close()
+            self.__open(st, 0)
+        elif self.__file is None:
+            self.__open(st, max(0, st.st_size - BACKLOG))
+            if self.__offset > 0: self.__file.readline()
+        elif st.st_size < self.__offset:
+            # truncated in place
+            self.__file.seek(0)
+            self.__partial = b""
+        data = self.__file.read()
+        self.__offset = self.__file.tell()
+        if data:
+            appended = (self.__partial + data).split(b"\n")
+            self.__partial = appended.pop()
+            lines += appended
+        return [line.decode(errors="replace").rstrip("\r") for line in lines]
+
+    def __open(self, st: os.stat_result, offset: int):
+        '''
+            Opens the followed file and positions it at the given offset. 
+        '''
+        self.__file = open(self.Path, "rb")
+        self.__file.seek(offset)
+        self.__inode = st.st_ino
+        self.__offset = offset
+        self.__partial = b""
+
+class LogTail(BuiltInCommand):
+    '''
+        The LogTail class implements a viewer following one or more log files for the PI Menu. It sleeps until 
+        inotify reports a change to one of the files, reads only the appended bytes and keeps a bounded ring of 
+        wrapped lines, with ANSI colours applied. UP and DOWN scroll through the ring.
+    '''
+    def __init__(self, disp: Display, files: list = None, lines: int = 200):
+        '''
+            Constructor - Creates a new instance of the LogTail class.
+            Parameters:
+                disp :      Display
+                            An instance of the display object representing the screen.
+                files:      list(str), optional
+                            The log files to follow. Defaults to /var/log/syslog
+                lines:      int, optional
+                            Number of wrapped lines kept for scrolling. Defaults to 200.
+        '''
+        super().__init__(disp)
+        if isinstance(files, str): files = [files]
+        self.__files = [TailedFile(f) for f in (files or ["/var/log/syslog"])]
+        self.__ring = deque(maxlen=lines)
+        self.__scroll = 0
+        self.__wrapper = TextWrapper(disp.SmallFont, disp.Dimensions[0] - 2*self._padding)
+        self.__dirty = True
+        self.__pending = set(self.__files)
+        self.__watches = {}
+        self.__inotify = None
+        self.__wakeRead, self.__wakeWrite = os.pipe()
+        self.__lock = threading.Lock()
+        try:
+            self.__inotify = Inotify()
+            for directory in {os.path.dirname(os.path.abspath(f.Path)) for f in self.__files}:
+                self.__watches[self.__inotify.Add(directory, IN_MODIFY | IN_CREATE | IN_MOVED_TO | IN_DELETE)] = directory
+        except OSError as e:
+            logging.warning(f"inotify unavailable, polling log files: {e}")
+            self.__inotify = None
+
+    def _activate(self):
+        '''
+            Forces a redraw when the viewer is opened again.
+        '''
+        self.__dirty = True
+
+    def _draw(self):
+        '''
+            Draws the visible part of the ring of lines. Nothing is drawn if neither the content nor the
+            scroll position changed.
+        '''
+        with self.__lock:
+            if not self.__dirty: return
+            self.__dirty = False
+            font = self._disp.SmallFont
+            width, height = self._disp.Dimensions
+            lineHeight = font.getsize("Ag")[1] + 1
+            rows = max(1, (height - 2*self._padding) // lineHeight)
+            end = len(self.__ring) - self.__scroll
+            visible = list(self.__ring)[max(0, end - rows):end]
+        self._canvas.rectangle([(0, 0), self._disp.Dimensions], outline=0, fill=(0, 0, 0))
+        y = self._padding
+        for line in visible:
+            for x, text, color in line:
+                self._canvas.text((self._padding + x, y), text, font=font, fill=color)
+            y += lineHeight
+        if self.__scroll > 0:
+            self._canvas.text((width - self._padding - font.getsize("+%d" % self.__scroll)[0], height - lineHeight), 
+                "+%d" % self.__scroll, font=font, fill="#ffffff")
+        self._disp.DrawImage(self._image)
+
+    def _getData(self):
+        '''
+            Reads the appended lines of the files that changed since the last refresh.
+        '''
+        if self.__inotify is None: self.__pending = set(self.__files)
+        for idx, tailed in enumerate(self.__files):
+            if tailed not in self.__pending: continue
+            color = COLORS[idx % len(COLORS)]
+            for line in tailed.Read():
+                runs = ParseAnsi(line, color)
+                wrapped = self.__wrapper.Wrap(runs[0] if runs else [])
+                with self.__lock:
+                    for part in wrapped: self.__ring.append(part)
+                    if self.__scroll: self.__scroll = min(self.__scroll + len(wrapped), len(self.__ring) - 1)
+                    self.__dirty = True
+        self.__pending = set()
+
+    def _navigate(self, eventType: int):
+        '''
+            Scrolls the view. UP shows older lines, DOWN newer lines.
+        '''
+        with self.__lock:
+            if eventType == UP_CLICK and self.__scroll < len(self.__ring) - 1: self.__scroll += 1
+            elif eventType == DOWN_CLICK and self.__scroll > 0: self.__scroll -= 1
+            else: return
+            self.__dirty = True
+
+    def _wake(self):
+        '''
+            Wakes the command up from LogTail._wait.
+        '''
+        os.write(self.__wakeWrite, b"\0")
+
+    def _wait(self, timeout: float):
+        '''
+            Sleeps until one of the files changes, the user scrolls or the timeout expires. 
+        '''
+        if self.__inotify is None: 
+            readable, _, _ = select.select([self.__wakeRead], [], [], timeout)
+        else:
+            readable, _, _ = select.select([self.__inotify, self.__wakeRead], [], [], timeout)
+        if self.__wakeRead in readable: os.read(self.__wakeRead, 4096)
+        if self.__inotify is not None and self.__inotify in readable:
+            for wd, mask, name in self.__inotify.Read():
+                if mask & IN_Q_OVERFLOW:
+                    # events were dropped (wd is -1), re-read all files
+                    self.__pending.update(self.__files)
+                    continue
+                directory = self.__watches.get(wd)
+                if directory is None: continue
+                for tailed in self.__files:
+                    if os.path.join(directory, name) == os.path.abspath(tailed.Path): self.__pending.add(tailed)
+
+    def __del__(self):
+        ''' Destructor - releases the followed files and the inotify instance. '''
+        for tailed in self.__files: tailed.Close()
+        if self.__inotify is not None: self.__inotify.Close()
+        os.close(self.__wakeRead)
+        os.close(self.__wakeWrite)
@@ -19,13 +19,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 import subprocess
-from builtin import BuiltInCommand
+from builtin.dashboard import Dashboard
+from builtin.layout import Layout
 from display import Display
-from PIL import Image, ImageDraw, ImageFont
 
-class NetInfo(BuiltInCommand):
+UP_COLORS = {"UP": "#00ff00", "*": "#ffff00"}
+
+class NetInfo(Dashboard):
     '''
-        The NetInfo class implements a second by second update on network statistics for the PI Menu
+        The NetInfo class implements a second by second update on network statistics for the PI Menu. The layout 
+        has a block per interface and is compiled again only when interfaces or addresses are added or removed.
     '''
     def __init__(self, disp: Display):
         '''
@@ -34,8 +37,9 @@ class NetInfo(BuiltInCommand):
                 disp :      Display
                             An instance of the display object representing the screen.
         '''
-        super().__init__(disp)
+        super().__init__(disp, layout={"rows": []})
         self.__network = {}
+        self.__shape = None
 
     @property
     def Commands(self) -> list:
@@ -49,38 +53,18 @@ class NetInfo(BuiltInCommand):
         '''
             Draws the screen for the display of the network information. 
         '''
-        self._canvas.rectangle([(0, 0), self._disp.Dimensions], outline=0, fill=(0, 0, 0))
-        y = self._padding
-        x = self._padding + 5
-        for name in self.__network:
-            iface = self.__network[name]
-            color="#00ff00" if iface["status"] == "UP" else "#ffff00"
-            self._canvas.text((self._padding, y), f"{name} {iface['status']}", font=self._disp.Font, fill=color)
-            y += self._canvas.textsize(f"{name} {iface['status']}", font=self._disp.Font)[1]
-            self._canvas.text((x, y), f"mac: {iface['mac']}", font=self._disp.Font, fill=color)
-            y += self._canvas.textsize(f"mac: {iface['mac']}", font=self._disp.Font)[1] +3
-            for ip in iface["ip"]:
-                s = self._canvas.textsize(ip, font=self._disp.SmallFont)
-                if s[0] < self._disp.Dimensions[0] - x: 
-                    self._canvas.text((x, y), ip, font=self._disp.SmallFont, fill=color)
-                    y += s[1] + 3
-                else:
-                    #likely an IP6 address that is too long. we'll split it into mutliple lines along the colons
-                    idx = len(ip)
-                    while ((self._canvas.textsize(ip[:idx], font=self._disp.SmallFont)[0] > 
-                            self._disp.Dimensions[0] - 2*x) and idx != -1):
-                        idx = ip.rfind(":", 0, idx)    
-                    for i, p in enumerate([ip[:idx+1], ip[idx+1:]]):    
-                        self._canvas.text((x if i ==0 else 2*x, y), p, font=self._disp.SmallFont, fill=color)
-                        y += s[1] + 3
-            y += self._padding
-        self._disp.DrawImage(self._image)
+        shape = tuple((name, len(iface["ip"])) for name, iface in self.__network.items())
+        if shape != self.__shape:
+            self.__shape = shape
+            self._setLayout(Layout(self.__compose(), self._disp.Dimensions, self._disp.Font, self._disp.SmallFont, self._padding))
+        super()._draw()
 
     def _getData(self):
         '''
             Gets the data for network information by calling various shell commands defined in BuiltInCommand.commands
         '''
         self._output = []
+        self.__network = {}
         for idx, command in enumerate(self.Commands):
             o = subprocess.check_output(command, shell=True).decode()
             for val in list(filter(None, o.split("__br__"))):
@@ -97,3 +81,25 @@ class NetInfo(BuiltInCommand):
                     # not all interfaces have an IP, only interfaces that are UP do
                     self.__network[a[0]]["ip"].append(a[1])
 
+        values = {}
+        for i, iface in enumerate(self.__network.values()):
+            values["status%d" % i] = iface["status"]
+            values["mac%d" % i] = iface["mac"]
+            for j, ip in enumerate(iface["ip"]): values["ip%d_%d" % (i, j)] = ip
+        self._setValues(values)
+
+    def __compose(self) -> dict:
+        '''
+            Composes the layout for the current interfaces: the name and status, the MAC address and the IP 
+            addresses of each interface. Long (IPv6) addresses are wrapped along the colons.
+        '''
+        rows = []
+        for i, name in enumerate(self.__network):
+            status = "status%d" % i
+            rows.append({"items": [{"value": status, "format": name.replace("{", "{{").replace("}", "}}") + " {%s}" % status, "colors": UP_COLORS}], "spacing": 0})
+            rows.append({"items": [{"value": status, "format": "mac: {mac%d}" % i, "colors": UP_COLORS}], "indent": 5, "spacing": 3})
+            for j in range(len(self.__network[name]["ip"])):
+                rows.append({"items": [{"value": status, "format": "{ip%d_%d}" % (i, j), "colors": UP_COLORS, "lines": 2, 
+                    "breaks": ":"}], "font": "small", "indent": 5, "spacing": 3})
+            rows.append({"gap": self._padding})
+        return {"rows": rows}
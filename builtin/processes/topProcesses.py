@@ -0,0 +1,121 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import heapq
+from builtin import BuiltInCommand
+from builtin.procfs import ProcFile, ReadFile
+from display import Display
+
+class TopProcesses(BuiltInCommand):
+    '''
+        The TopProcesses class implements a second by second update on the processes using the most CPU 
+        and memory for the PI Menu. CPU usage is computed from the tick deltas between two samples of 
+        /proc/[pid]/stat, so only a single read per process and refresh is required.
+    '''
+    def __init__(self, disp: Display, count: int = 4):
+        '''
+            Constructor - Creates a new instance of the TopProcesses class.
+            Parameters:
+                disp :      Display
+                            An instance of the display object representing the screen.
+                count:      int, optional
+                            The number of processes to show for CPU and memory each. Defaults to 4.
+        '''
+        super().__init__(disp)
+        self.__count = count
+        self.__pageSize = os.sysconf("SC_PAGE_SIZE")
+        self.__cpuCount = os.cpu_count() or 1
+        self.__stat = ProcFile("/proc/stat", 4096)
+        self.__names = {}           # pid -> (start time, name). Only refreshed for new pids 
+        self.__ticks = {}           # pid -> cpu ticks at the previous sample
+        self.__totalTicks = 0
+        self.__cpu = []
+        self.__memory = []
+
+    def _activate(self):
+        '''
+            Discards the previous sample so CPU usage is not averaged over the time the screen was closed.
+        '''
+        self.__totalTicks = 0
+        self.__cpu = []
+
+    def _draw(self):
+        '''
+            Draws the screen for the display of the top processes. 
+        '''
+        self._canvas.rectangle([(0, 0), self._disp.Dimensions], outline=0, fill=(0, 0, 0))
+        font = self._disp.SmallFont
+        width = self._disp.Dimensions[0] - self._padding
+        y = self._padding
+        for title, rows in (("CPU", self.__cpu), ("Memory", self.__memory)):
+            self._canvas.text((self._padding, y), title, font=self._disp.Font, fill="#ffffff")
+            y += self._disp.Font.getsize(title)[1] + 3
+            for name, value, color in rows:
+                self._canvas.text((self._padding + 5, y), name[:16], font=font, fill=color)
+                self._canvas.text((width - font.getsize(value)[0], y), value, font=font, fill=color)
+                y += font.getsize(name)[1] + 2
+            y += self._padding
+        self._disp.DrawImage(self._image)
+
+    def _getData(self):
+        '''
+            Samples /proc/stat and /proc/[pid]/stat and computes the top processes by CPU and by resident memory. 
+        '''
+        line = self.__stat.Read().split(b"\n", 1)[0]
+        total = sum(int(v) for v in line.split()[1:])
+        elapsed = total - self.__totalTicks
+        first = self.__totalTicks == 0
+        self.__totalTicks = total
+
+        names = self.__names
+        ticks = {}
+        usage = []
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit(): continue
+            data = ReadFile(f"/proc/{entry}/stat", 512)
+            if not data: continue
+            pid = int(entry)
+            close = data.rfind(b")")
+            fields = data[close + 2:].split()
+            # fields[11] -> utime, fields[12] -> stime, fields[19] -> start time, fields[21] -> rss in pages
+            start = fields[19]
+            cached = names.get(pid)
+            if cached is None or cached[0] != start:
+                # new process or pid reuse, refresh the name and drop the stale tick count
+                cached = (start, data[data.find(b"(") + 1:close].decode(errors="replace"))
+                names[pid] = cached
+                self.__ticks.pop(pid, None)
+            used = int(fields[11]) + int(fields[12])
+            ticks[pid] = used
+            usage.append((used - self.__ticks.get(pid, used), int(fields[21]), cached[1]))
+
+        for pid in names.keys() - ticks.keys(): del names[pid]
+        self.__ticks = ticks
+
+        self.__cpu = []
+        if not first and elapsed > 0:
+            for delta, _, name in heapq.nlargest(self.__count, usage, key=lambda u: u[0]):
+                percent = delta * 100.0 * self.__cpuCount / elapsed
+                color = "#00ff00" if percent < 25 else "#ffff00" if percent < 75 else "#ff0000"
+                self.__cpu.append((name, f"{percent:.1f}%", color))
+        self.__memory = []
+        for _, rss, name in heapq.nlargest(self.__count, usage, key=lambda u: u[1]):
+            self.__memory.append((name, f"{rss * self.__pageSize / 1048576:.1f}MB", "#00ff00"))
@@ -0,0 +1,113 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Helpers to sample /proc without spawning shell commands.
+"""
+import os
+
+WRAP_MARGIN = 1 << 30                   # largest increment between two samples considered a wrap around
+
+class ProcFile(object):
+    '''
+        The ProcFile class keeps a file in /proc open and re-reads it from the start on every sample, 
+        avoiding the open/close per refresh.
+    '''
+    def __init__(self, path: str, bufferSize: int = 16384):
+        '''
+            Constructor - Creates a new instance of the ProcFile class.
+            Parameters:
+                path:       str
+                            Path of the file, e.g. /proc/stat
+                bufferSize: int, optional
+                            Size of the reads. Files larger than this are read in multiple chunks.
+        '''
+        self.__path = path
+        self.__bufferSize = bufferSize
+        self.__fd = None
+
+    def Close(self):
+        ''' Closes the underlying file descriptor. '''
+        if self.__fd is not None: 
+            os.close(self.__fd)
+            self.__fd = None
+
+    def Read(self) -> bytes:
+        '''
+            Reads the current content of the file.
+            Returns:
+                The file content as bytes.
+        '''
+        if self.__fd is None: self.__fd = os.open(self.__path, os.O_RDONLY)
+        os.lseek(self.__fd, 0, os.SEEK_SET)
+        data = os.read(self.__fd, self.__bufferSize)
+        if len(data) < self.__bufferSize: return data
+        chunks = [data]
+        while True:
+            chunk = os.read(self.__fd, self.__bufferSize)
+            if not chunk: break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def __del__(self):
+        ''' Destructor - closes the file descriptor. '''
+        self.Close()
+
+def ReadFile(path: str, size: int = 1024) -> bytes:
+    '''
+        Reads a small file in a single system call. Used for per process files that cannot be kept open.
+        Parameters:
+            path:       str
+                        Path of the file.
+            size:       int, optional
+                        Maximum number of bytes to read.
+        Returns:
+            The file content, or None if the file could not be read (e.g. the process exited).
+    '''
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, size)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def CounterDelta(current: int, previous: int) -> int:
+    '''
+        Computes the increment of a kernel counter between two samples. A counter that decreased wrapped around 
+        if the previous sample was within WRAP_MARGIN of 2^32 (unsigned long on the 32 bit Raspbian kernels) or 
+        2^64 and the wrapped increment is within WRAP_MARGIN as well; otherwise it was reset, e.g. because the 
+        interface was re-created, and the increment is counted from 0 rather than showing a spike of the size of 
+        the counter range.
+        Parameters:
+            current:    int
+                        The current counter sample.
+            previous:   int
+                        The previous counter sample.
+        Returns:
+            The increment of the counter between the two samples.
+    '''
+    if current >= previous: return current - previous
+    for width in (1 << 32, 1 << 64):
+        if previous < width and current + width - previous <= WRAP_MARGIN: return current + width - previous
+    return current
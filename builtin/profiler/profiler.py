@@ -0,0 +1,125 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+import os
+import logging
+from builtin import BuiltInCommand
+from diagnostics.profiler import SamplingProfiler, DEFAULT_INTERVAL, MODE_CPU
+from display import Display
+from runtime import RUNTIME_DIR, PrivateDirectory
+
+DEFAULT_OUTPUT = os.path.join(RUNTIME_DIR, "profile-%Y%m%d-%H%M%S.folded")
+
+class Profiler(BuiltInCommand):
+    '''
+        The Profiler class implements a sampling profiler over all threads of the menu process: the event loop 
+        drawing the menu, the input threads, the spinner and the built-in thread. When commands run in the worker 
+        process, its threads, including the built-ins, are sampled as well. It samples for a configurable 
+        window, writes the stacks to a collapsed stack file for flamegraph.pl or speedscope and shows the 
+        functions most often found running. Leaving the screen early stops the profiler and writes what was 
+        recorded so far. The built-in runs in the menu process even when commands run in the worker process.
+    '''
+    def __init__(self, disp: Display, duration: float = 10, interval: float = DEFAULT_INTERVAL, mode: str = MODE_CPU,
+                 output: str = DEFAULT_OUTPUT, top: int = 6):
+        '''
+            Constructor - Creates a new instance of the Profiler class.
+            Parameters:
+                disp :      Display
+                            An instance of the display object representing the screen.
+                duration:   float, optional
+                            Seconds to sample. Defaults to 10 seconds.
+                interval:   float, optional
+                            Seconds between samples. Defaults to 10ms.
+                mode:       str, optional
+                            'cpu' to record only threads using CPU time, 'wall' to record all threads.
+                output:     str, optional
+                            Path of the collapsed stack file, passed through time.strftime. Defaults to a file in 
+                            the directory only the user running the menu can access.
+                top:        int, optional
+                            Number of functions shown in the summary.
+        '''
+        super().__init__(disp)
+        self._interval = 0.5
+        self.__duration = duration
+        self.__output = output
+        self.__count = top
+        self.__profiler = SamplingProfiler(interval, mode)
+        self.__path = None
+        self.__top = []
+
+    def _activate(self):
+        '''
+            Starts a new profile.
+        '''
+        self.__path = None
+        self.__top = []
+        self.__profiler.Start()
+
+    def _draw(self):
+        '''
+            Draws the progress while sampling and the summary afterwards. 
+        '''
+        self._canvas.rectangle([(0, 0), self._disp.Dimensions], outline=0, fill=(0, 0, 0))
+        font = self._disp.SmallFont
+        width = self._disp.Dimensions[0] - 2*self._padding
+        y = self._padding
+        if self.__profiler.Running:
+            remaining = max(0, self.__duration - self.__profiler.Elapsed)
+            lines = [("Profiling...", "#ffffff"), (f"{remaining:.0f}s left", "#ffffff"), 
+                (f"{self.__profiler.Samples} samples", "#a0a0a0")]
+        else:
+            lines = [(os.path.basename(self.__path or "no file written"), "#a0a0a0")]
+            lines += [(f"{share * 100:4.1f}% {function}", "#00ff00" if share > 0.2 else "#ffffff") 
+                for function, share in self.__top]
+        for text, color in lines:
+            while text and font.getsize(text)[0] > width: text = text[:-1]
+            self._canvas.text((self._padding, y), text, font=font, fill=color)
+            y += font.getsize(text or " ")[1] + 3
+        self._disp.DrawImage(self._image)
+
+    def _execute(self, stop: callable):
+        '''
+            Runs the profiler screen and finishes the profile if the screen is left early.
+        '''
+        try:
+            super()._execute(stop)
+        finally:
+            if self.__profiler.Running: self.__finish()
+
+    def _getData(self):
+        '''
+            Finishes the profile once the sampling window has elapsed.
+        '''
+        if self.__profiler.Running and self.__profiler.Elapsed >= self.__duration: self.__finish()
+
+    def __finish(self):
+        '''
+            Stops the profiler, writes the collapsed stacks and computes the summary.
+        '''
+        self.__profiler.Stop()
+        self.__top = self.__profiler.Top(self.__count)
+        try:
+            path = time.strftime(self.__output)
+            if os.path.dirname(path) == RUNTIME_DIR: PrivateDirectory()
+            self.__profiler.Write(path)
+            self.__path = path
+        except OSError as e:
+            logging.error(f"Cannot write profile: {e}")
@@ -0,0 +1,197 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    The Registry class keeps track of the built-in commands available to the menu
+"""
+import os
+import logging
+import importlib
+import importlib.util
+import threading
+
+ENTRY_POINT_GROUP = "piControllerMenu.builtins"
+
+class Registry(object):
+    '''
+        The Registry class maps built-in command names to the classes implementing them. Built-ins are
+        registered with a loader and the implementing module is only imported when the built-in is first
+        resolved, so the menu does not pay for built-ins that are never selected.
+    '''
+
+    __loaders: dict = {}
+    __resolved: dict = {}
+    __inProcess: set = set()
+    __entryPointsScanned: bool = False
+    __lock = threading.RLock()
+
+    @staticmethod
+    def Contains(name: str) -> bool:
+        '''
+            Determines whether a built-in of the given name is known to the registry. Installed entry points
+            are only scanned if the name is not registered otherwise.
+            Parameters:
+                name:       str
+                            The name of the built-in command.
+            Returns:
+                True if the built-in can be resolved, False otherwise.
+        '''
+        with Registry.__lock:
+            if name in Registry.__loaders or name in Registry.__resolved: return True
+            Registry.__scanEntryPoints()
+            return name in Registry.__loaders
+
+    @staticmethod
+    def Discover(pluginDir: str) -> list:
+        '''
+            Registers the plugins contained in a directory. Each module file 'myCommand.py' registers the
+            built-in 'myCommand' implemented by the class 'MyCommand'. The module is not imported until the 
+            built-in is first resolved.
+            Parameters:
+                pluginDir:  str
+                            Path of the directory containing the plugin modules.
+            Returns:
+                The list of built-in names registered from the directory.
+        '''
+        names = []
+        if pluginDir is None or not os.path.isdir(pluginDir): return names
+        for entry in sorted(os.listdir(pluginDir)):
+            name, ext = os.path.splitext(entry)
+            if ext != ".py" or name.startswith("_"): continue
+            path = os.path.join(pluginDir, entry)
+            Registry.Register(name, Registry.__fileLoader(name, path))
+            names.append(name)
+        logging.info(f"Discovered {len(names)} built-in plugin(s) in {pluginDir}")
+        return names
+
+    @staticmethod
+    def InProcess(name: str) -> bool:
+        '''
+            Determines whether a built-in has to run in the menu process rather than in the command worker.
+            Parameters:
+                name:       str
+                            The name of the built-in command.
+            Returns:
+                True if the built-in was registered with inProcess set, False otherwise.
+        '''
+        return name in Registry.__inProcess
+
+    @staticmethod
+    def Names() -> list:
+        ''' Gets the names of all registered built-in commands. '''
+        with Registry.__lock:
+            Registry.__scanEntryPoints()
+            return sorted(set(Registry.__loaders) | set(Registry.__resolved))
+
+    @staticmethod
+    def Register(name: str, target, inProcess: bool = False):
+        '''
+            Registers a built-in command. 
+            Parameters:
+                name:       str
+                            The name under which the built-in is referenced in the 'command' attribute of 
+                            a builtin command in controllerMenu.yaml.
+                target:     type, str or callable
+                            Either the class implementing the built-in, an import specification of the 
+                            form 'module:Class' or a function without arguments returning the class. 
+                inProcess:  bool, optional
+                            True if the built-in has to run in the menu process, e.g. because it inspects 
+                            the menu itself. 
+        '''
+        with Registry.__lock:
+            Registry.__resolved.pop(name, None)
+            if inProcess: Registry.__inProcess.add(name)
+            else: Registry.__inProcess.discard(name)
+            if isinstance(target, type): Registry.__resolved[name] = target
+            elif isinstance(target, str): Registry.__loaders[name] = Registry.__specLoader(target)
+            elif callable(target): Registry.__loaders[name] = target
+            else: raise Exception(f"Cannot register built-in '{name}': unsupported target {target!r}")
+
+    @staticmethod
+    def Resolve(name: str) -> type:
+        '''
+            Resolves a built-in command to its implementing class, importing the implementing module on 
+            first use.
+            Parameters:
+                name:       str
+                            The name of the built-in command.
+            Returns:
+                The class implementing the built-in command, or None if the built-in is unknown or fails 
+                to load.
+        '''
+        with Registry.__lock:
+            if name in Registry.__resolved: return Registry.__resolved[name]
+            if not Registry.Contains(name): return None
+            loader = Registry.__loaders.get(name)
+            try:
+                Registry.__resolved[name] = loader()
+            except Exception as e:
+                # keep the loader, a later lookup retries e.g. once a missing dependency is installed
+                logging.exception(e)
+                return None
+            Registry.__loaders.pop(name, None)
+            logging.info(f"Loaded built-in {name}")
+            return Registry.__resolved[name]
+
+    @staticmethod
+    def __fileLoader(name: str, path: str) -> callable:
+        '''
+            Creates a loader importing a plugin module from a file.
+            Parameters:
+                name:       str
+                            Name of the built-in. The class is expected to be the capitalized name.
+                path:       str
+                            Path of the plugin module.
+        '''
+        def load():
+            spec = importlib.util.spec_from_file_location(f"plugins.{name}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return getattr(module, name[0].upper() + name[1:])
+        return load
+
+    @staticmethod
+    def __scanEntryPoints():
+        '''
+            Registers the built-ins advertised by installed packages in the ENTRY_POINT_GROUP entry point
+            group. This happens at most once and only when a lookup misses. 
+        '''
+        if Registry.__entryPointsScanned: return
+        Registry.__entryPointsScanned = True
+        try:
+            from importlib import metadata
+            eps = metadata.entry_points()
+            eps = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, [])
+        except Exception:
+            return
+        for ep in eps:
+            if ep.name not in Registry.__loaders and ep.name not in Registry.__resolved:
+                Registry.__loaders[ep.name] = ep.load
+
+    @staticmethod
+    def __specLoader(spec: str) -> callable:
+        '''
+            Creates a loader for an import specification of the form 'module:Class'.
+            Parameters:
+                spec:       str
+                            The import specification.
+        '''
+        moduleName, _, attribute = spec.partition(":")
+        return lambda: getattr(importlib.import_module(moduleName), attribute)
@@ -18,19 +18,30 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import subprocess
-from builtin import BuiltInCommand
+from builtin.dashboard import Dashboard
 from display import Display
-from PIL import Image, ImageDraw, ImageFont
 
-class SysInfo(BuiltInCommand):
-    '''
-        The SysInfo class implements a second by second update on vital system statistics for the PI Menu
-    '''
+GREEN = "#00ff00"
+YELLOW = "#ffff00"
+RED = "#ff0000"
 
-    commands = [
+SYSINFO = {
+    "spacing": 8,
+    "rows": [
+        [{"label": "IP: "}, {"value": "ip"}],
+        [{"value": "load1", "format": "CPU Load: {load1:.2f}", "thresholds": [0.25, 0.75], "colors": [GREEN, YELLOW, RED]}],
+        [{"label": "Mem: ", "color": GREEN}, {"value": "memPercent", "format": "{memUsed}/{memTotal}MB {memPercent:.2f}%", 
+            "color": GREEN}],
+        [{"label": "Disk: ", "color": GREEN}, {"value": "diskPercent", "format": "{diskUsed:.0f}/{diskTotal:.0f}GB {diskPercent:.0f}%", 
+            "color": GREEN}],
+        [{"value": "temperature", "format": "CPU Temp: {temperature:.1f} C", "thresholds": [50, 60], "colors": [GREEN, YELLOW, RED]}]
     ]
+}
 
+class SysInfo(Dashboard):
+    '''
+        The SysInfo class implements a second by second update on vital system statistics for the PI Menu
+    '''
     def __init__(self, disp: Display):
         '''
             Constructor - Creates a new instance of the SysInfo class.
@@ -38,33 +49,4 @@ class SysInfo(BuiltInCommand):
                 disp :      Display
                             An instance of the display object representing the screen.
         '''
-        super().__init__(disp)
-
-    @property
-    def Commands(self) -> list:
-        """ Gets the list of shell commands to run for the sysInfo command. """
-        return [
-            "hostname -I | cut -d\' \' -f1 | awk \'{printf \"IP: %s\", $(0)}\'",
-            "top -bn1 | grep load | awk '{printf \"CPU Load: %.2f\", $(NF-2)}'",
-            "free -m | awk 'NR==2{printf \"Mem: %s/%sMB %.2f%%\", $3,$2,$3*100/$2 }'",
-            "df -h | awk '$NF==\"/\"{printf \"Disk: %d/%dGB %s\", $3,$2,$5}'",
-            "cat /sys/class/thermal/thermal_zone0/temp |  awk \'{printf \"CPU Temp: %.1f C\", $(NF-0) / 1000}\'"
-        ]
-
-    def _draw(self):
-        '''
-            Draws the screen for the display of the system information. 
-        '''
-        self._canvas.rectangle([(0, 0), self._disp.Dimensions], outline=0, fill=(0, 0, 0))
-        y = self._padding 
-        for idx, val in enumerate(self._output):
-            split = val.split()
-            color = "#ffffff"
-            if idx==1: color = "#00ff00" if float(split[len(split)-1]) < 0.25 else "#ffff00" if float(split[len(split)-1]) < 0.75 else "#ff0000"
-            if idx==2: color = "#00ff00"
-            if idx==3: color = "#00ff00"
-            if idx==4: color = "#00ff00" if float(split[len(split)-2]) < 50 else "#ffff00" if float(split[len(split)-2]) < 60 else "#ff0000"  
-            self._canvas.text((self._padding, y), val, font=self._disp.Font, fill=color)
-            y += self._disp.Font.getsize(val)[1]
-            y += self._padding
-        self._disp.DrawImage(self._image)
+        super().__init__(disp, layout=SYSINFO)
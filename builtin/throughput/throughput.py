@@ -0,0 +1,195 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+import os
+from collections import deque
+from builtin import BuiltInCommand
+from builtin.procfs import ProcFile, CounterDelta
+from display import Display
+
+SECTOR_SIZE = 512
+HISTORY = 64
+IGNORED_DEVICES = (b"lo", b"loop", b"ram")
+
+class Throughput(BuiltInCommand):
+    '''
+        The Throughput class implements a continuous update of the network interface and disk throughput
+        for the PI Menu. Rates are computed from the counter deltas in /proc/net/dev and /proc/diskstats
+        and the recent history is shown as a sparkline for each device.
+    '''
+    def __init__(self, disp: Display, interval: float = 0.5):
+        '''
+            Constructor - Creates a new instance of the Throughput class.
+            Parameters:
+                disp :      Display
+                            An instance of the display object representing the screen.
+                interval:   float, optional
+                            Refresh interval in seconds. Defaults to 0.5 seconds.
+        '''
+        super().__init__(disp)
+        self._interval = interval
+        self.__netDev = ProcFile("/proc/net/dev")
+        self.__diskStats = ProcFile("/proc/diskstats")
+        self.__disks = {}           # device name -> True for whole disks, False for partitions
+        self.__counters = {}        # device name -> counters at the previous sample
+        self.__devices = {}         # device name -> [label, history, color]
+        self.__sampled = 0
+
+    def _activate(self):
+        '''
+            Discards the previous samples and history so rates are not averaged over the time the screen was closed.
+        '''
+        self.__sampled = 0
+        self.__devices = {}
+
+    def _draw(self):
+        '''
+            Draws the screen for the display of the throughput. 
+        '''
+        self._canvas.rectangle([(0, 0), self._disp.Dimensions], outline=0, fill=(0, 0, 0))
+        font = self._disp.SmallFont
+        width, height = self._disp.Dimensions
+        sparkHeight = 12
+        y = self._padding
+        for label, history, color in self.__devices.values():
+            lineHeight = font.getsize(label)[1]
+            if y + lineHeight + sparkHeight > height: break
+            self._canvas.text((self._padding, y), label, font=font, fill=color)
+            y += lineHeight + 2
+            self.__drawSparkline(history, self._padding, y, width - 2*self._padding, sparkHeight)
+            y += sparkHeight + 4
+        self._disp.DrawImage(self._image)
+
+    def _getData(self):
+        '''
+            Samples /proc/net/dev and /proc/diskstats and updates rates and history for each device. 
+        '''
+        now = time.monotonic()
+        elapsed = now - self.__sampled if self.__sampled else 0
+        self.__sampled = now
+        seen = set()
+
+        for line in self.__netDev.Read().splitlines()[2:]:
+            name, _, values = line.partition(b":")
+            name = name.strip()
+            if name.startswith(IGNORED_DEVICES): continue
+            fields = values.split()
+            seen.add(name)
+            # fields[0] -> received bytes, fields[8] -> transmitted bytes
+            rx, tx = self.__rates(name, elapsed, int(fields[0]), int(fields[8]))
+            self.__update(name, elapsed, f"{name.decode()} rx {_format(rx)}/s tx {_format(tx)}/s", rx, tx)
+
+        for line in self.__diskStats.Read().splitlines():
+            fields = line.split()
+            name = fields[2]
+            if name.startswith(IGNORED_DEVICES) or not self.__isDisk(name): continue
+            seen.add(name)
+            # fields[3] -> reads completed, fields[5] -> sectors read, 
+            # fields[7] -> writes completed, fields[9] -> sectors written
+            reads, sectorsRead, writes, sectorsWritten = self.__rates(
+                name, elapsed, int(fields[3]), int(fields[5]), int(fields[7]), int(fields[9]))
+            self.__update(name, elapsed, 
+                f"{name.decode()} r {reads:.0f} w {writes:.0f} IOPS " + 
+                f"{_format(sectorsRead * SECTOR_SIZE)}/{_format(sectorsWritten * SECTOR_SIZE)}",
+                sectorsRead, sectorsWritten)
+
+        # forget interfaces and disks that were removed
+        for name in [name for name in self.__counters if name not in seen]:
+            del self.__counters[name]
+            self.__devices.pop(name, None)
+            self.__disks.pop(name, None)
+
+    def __drawSparkline(self, history: deque, x: int, y: int, width: int, height: int):
+        '''
+            Draws the history of a device as a bar sparkline. Inbound (rx/read) traffic is drawn in green, 
+            outbound (tx/write) traffic stacked on top in yellow. 
+            Parameters:
+                history:    deque
+                            The history of (in, out) rate tuples.
+                x, y:       int
+                            Top left corner of the sparkline.
+                width:      int
+                            Width of the sparkline.
+                height:     int
+                            Height of the sparkline.
+        '''
+        self._canvas.line([(x, y + height), (x + width, y + height)], fill="#404040")
+        peak = max((i + o for i, o in history), default=0)
+        if peak <= 0: return
+        barWidth = max(1, width // HISTORY)
+        bx = x + width - len(history) * barWidth
+        bottom = y + height
+        for rateIn, rateOut in history:
+            hIn = int(rateIn * height / peak)
+            hOut = int(rateOut * height / peak)
+            if hIn: self._canvas.rectangle([(bx, bottom - hIn), (bx + barWidth - 1, bottom)], fill="#00ff00")
+            if hOut: self._canvas.rectangle([(bx, bottom - hIn - hOut), (bx + barWidth - 1, bottom - hIn)], fill="#ffff00")
+            bx += barWidth
+
+    def __isDisk(self, name: bytes) -> bool:
+        '''
+            Determines whether a block device is a whole disk. Partitions are not listed in /sys/block. 
+            The result is cached per device name.
+        '''
+        disk = self.__disks.get(name)
+        if disk is None:
+            disk = os.path.exists(b"/sys/block/" + name)
+            self.__disks[name] = disk
+        return disk
+
+    def __rates(self, name: bytes, elapsed: float, *counters) -> list:
+        '''
+            Computes the per second rates of a set of counters against the previous sample. 
+            Parameters:
+                name:       bytes
+                            The device name.
+                elapsed:    float
+                            Seconds since the previous sample. 0 on the first sample.
+                counters:   int
+                            The current counter values.
+            Returns:
+                The list of rates, all 0 on the first sample of the device.
+        '''
+        previous = self.__counters.get(name)
+        self.__counters[name] = counters
+        if previous is None or elapsed <= 0: return [0] * len(counters)
+        return [CounterDelta(c, p) / elapsed for c, p in zip(counters, previous)]
+
+    def __update(self, name: bytes, elapsed: float, label: str, rateIn: float, rateOut: float):
+        '''
+            Updates label and history of a device.
+        '''
+        device = self.__devices.get(name)
+        if device is None:
+            device = [label, deque(maxlen=HISTORY), "#00ff00"]
+            self.__devices[name] = device
+        device[0] = label
+        device[2] = "#00ff00" if rateIn or rateOut else "#808080"
+        if elapsed > 0: device[1].append((rateIn, rateOut))
+
+def _format(value: float) -> str:
+    '''
+        Formats a byte rate in a compact human readable form with binary units, e.g. 1.2M
+    '''
+    for unit in ("", "K", "M"):
+        if value < 1024: return f"{value:.0f}{unit}" if unit == "" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}G"
@@ -0,0 +1,90 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import logging
+import threading
+from diagnostics.metrics import Histogram
+
+REFRESH_SECONDS = Histogram("pimenu_builtin_refresh_seconds", "Time for a built-in to collect its data and draw a frame.", 
+    ("builtin", ))
+
+class BuiltInWorker(object):
+    '''
+        The BuiltInWorker class runs built-in commands on a single long lived thread. Only one built-in 
+        is active at a time. Submitting a built-in while another one is active stops the active one before 
+        the new one starts, so built-ins never compete for the display.
+    '''
+    def __init__(self):
+        '''
+            Constructor - Creates a new instance of the BuiltInWorker class. The worker thread is started 
+            when the first built-in is submitted.
+        '''
+        self.__condition = threading.Condition()
+        self.__pending = None
+        self.__active = None
+        self.__thread = None
+
+    @property
+    def Active(self):
+        ''' Gets the built-in command currently running, or None. '''
+        return self.__active
+
+    @property
+    def Superseded(self) -> bool:
+        ''' Gets whether another built-in has been submitted and is waiting for the active one to stop. '''
+        return self.__pending is not None
+
+    def Submit(self, command, stop: callable, completed: callable = None):
+        '''
+            Submits a built-in command for execution. Returns immediately.
+            Parameters:
+                command:    BuiltInCommand
+                            The built-in command to run.
+                stop:       callable
+                            Function returning True once the command should stop. 
+                completed:  callable, optional
+                            Function called once the command has stopped. 
+        '''
+        with self.__condition:
+            self.__pending = (command, stop, completed)
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__loop, name="builtInWorker", daemon=True)
+                self.__thread.start()
+            active = self.__active
+            self.__condition.notify_all()
+        if active is not None: active._wake()
+
+    def __loop(self):
+        '''
+            Worker thread entry point. Runs the submitted built-ins one after the other.
+        '''
+        while True:
+            with self.__condition:
+                while self.__pending is None: self.__condition.wait()
+                command, stop, completed = self.__pending
+                self.__pending = None
+                self.__active = command
+            try:
+                command._execute(lambda: stop() or self.__pending is not None)
+            except Exception as e:
+                logging.exception(e)
+            with self.__condition:
+                self.__active = None
+            if completed is not None: completed()
@@ -23,3 +23,4 @@
 """
 from .command import Command
 from .command import COMMAND_SHELL, COMMAND_BUILTIN
+from .worker import CommandWorker
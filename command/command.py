@@ -21,34 +21,41 @@
 """
     The Command class represent a command to be executed by the menu
 """
+import time
 import subprocess
 import logging
-from builtin import SysInfo, NetInfo
+from builtin import Registry
+from diagnostics import ringlog
+from diagnostics.metrics import Counter, Histogram
 from display import Display, CONFIRM_OK, CONFIRM_CANCEL
 
 COMMAND_BUILTIN = 0
 COMMAND_SHELL = 1
+MSG_TRUNCATED = "\n... %d characters not shown"
+
+COMMAND_RUNS = Counter("pimenu_command_runs_total", "Completed commands by type and return code.", ("type", "code"))
+COMMAND_SECONDS = Histogram("pimenu_command_seconds", "Command run time, until the user leaves a built-in.", ("type", ))
 
 class Command(object):
     """
     Represents a command to be executed
     """
+    __slots__ = ("__type", "__command", "__processor", "__returnCode", "__output", "__confirm", "__confirmationHandler", 
+        "__spinHandler", "__outputHandler", "__auditHandler", "__running", "__cwd", "__args", "__builtIn", "__worker", 
+        "__started", "__startedAt", "__path")
 
-    builtInCommands: dict = {
-        "sysInfo": SysInfo,
-        "netInfo": NetInfo
-    }
+    MaxOutput: int = None       # characters of output kept, None to keep all
 
     #region constructor
-    def __init__(self, type: int, command: str, processor: str = '', confirm: bool = False, cwd = None):
+    def __init__(self, type: int, command: str, processor: str = '', confirm: bool = False, cwd = None, args: dict = None):
         """
             Initializes a new instance of the Command class
             Parameters:
                 type:       int
                             The type of command. Either COMMAND_BUILTIN or COMMAND_SHELL
                 command:    str
-                            The actual command to execute. If type is COMMAND_BUILTIN the value must be a valid key inhte 
-                            Command.buildInCommands list. If type is COMMAND_SHELL the value must be a command that can be 
+                            The actual command to execute. If type is COMMAND_BUILTIN the value must be the name of a  
+                            built-in registered with builtin.Registry. If type is COMMAND_SHELL the value must be a command that can be 
                             executed at a shell command prompt
                 processor:  str
                             Optional, for future functionality. Not currently used.
@@ -56,6 +63,8 @@ class Command(object):
                             True to require confirmation before the command is executed, false otherwise. 
                 cwd:        str
                             Current Working Directory to execute the command in
+                args:       dict
+                            Optional. Keyword arguments passed to the constructor of a built-in command. 
         """
         self.__type: int = type
         self.__command: str = command
@@ -68,14 +77,34 @@ class Command(object):
         self.__outputHandler: callable = None
         self.__running: bool = False
         self.__cwd: str = cwd
+        self.__args: dict = args or {}
+        self.__builtIn = None
+        self.__worker = None
+        self.__started = 0
+        self.__startedAt = 0
+        self.__path = None
+        self.__auditHandler: callable = None
     #endregion
 
     #region Property defintions
+    @property
+    def AuditHandler(self) -> callable:
+        """ Gets the delegate recording completed runs in the audit log. """
+        return self.__auditHandler
+
+    @AuditHandler.setter
+    def AuditHandler(self, handler):
+        """
+            Sets the delegate recording completed runs in the audit log. The delegate should be of signature
+            (command:str, path:list, started:float, duration:float, code:int, output:str) -> None
+        """
+        self.__auditHandler = handler
+
     @property
     def Command(self) -> str:
         """ 
-            Gets the command to be executed. If the command type is COMMAND_BUILTIN, this will be the internal 
-            key used in Command.builtInCommands. If the command tyoe is COMMAND_SHELL, this will be the shell command
+            Gets the command to be executed. If the command type is COMMAND_BUILTIN, this will be the name 
+            the built-in is registered under in builtin.Registry. If the command tyoe is COMMAND_SHELL, this will be the shell command
             executed for the command.
         """
         return self.__command
@@ -133,6 +162,16 @@ class Command(object):
         """
         self.__spinHandler = handler
 
+    @property 
+    def Worker(self):
+        """ Gets the CommandWorker running the command out of process, or None to run it in process. """
+        return self.__worker
+
+    @Worker.setter
+    def Worker(self, worker):
+        """ Sets the CommandWorker running the command out of process. """
+        self.__worker = worker
+
     @property 
     def Type(self) -> int:
         """ Gets the command type. Either COMMAND_BUILTIN or COMMAND_SHELL. """
@@ -140,7 +179,7 @@ class Command(object):
     #endregion
 
     #region public instance methods
-    def Run(self, display: Display, confirmed=CONFIRM_CANCEL):
+    def Run(self, display: Display, confirmed=CONFIRM_CANCEL, path: list = None):
         """
             Runs the command.
             Parameters:
@@ -148,32 +187,46 @@ class Command(object):
                             Reference to a Display instance. This can be NONE if Command.Type is COMMAND_SHELL
                 confirmed:  int
                             Optional. Pass CONFIRM_OK to indicate the command has been confirmed. 
+                path:       list(str)
+                            Optional. The menu path the command was selected from, recorded in the audit log.
         """
         if self.__confirm and self.__confirmationHandler is not None and confirmed==CONFIRM_CANCEL:
             self.__confirmationHandler(self)
         else:
             self.__running = True
+            self.__path = path
+            self.__started = time.perf_counter()
+            self.__startedAt = time.time()
             if self.__type == COMMAND_SHELL:
                 if self.__spinHandler is not None: self.__spinHandler(True)
-                try:
-                    #breakpoint()
-                    self.__output = subprocess.check_output(self.__command, shell=True,  cwd=self.__cwd).decode()
-                    self.__returnCode = 0
-                except subprocess.CalledProcessError as e:
-                    self.__output = e.output.decode()
-                    self.__returnCode = e.returncode
-                    logging.exception(e)
-                except Exception as e:
-                    self.__output = str(e)
-                    self.__returnCode = -1000
-                    logging.exception(e)
+                if self.__worker is not None:
+                    self.__returnCode, self.__output = self.__worker.Shell(self.__command, self.__cwd)
+                    if self.__returnCode != 0: logging.error(f"Command '{self.__command}' returned {self.__returnCode}")
+                else:
+                    self.__runShell()
+                if Command.MaxOutput is not None and len(self.__output) > Command.MaxOutput:
+                    self.__output = self.__output[:Command.MaxOutput] + MSG_TRUNCATED % (len(self.__output) - Command.MaxOutput)
+                elapsed = time.perf_counter() - self.__started
+                COMMAND_SECONDS.Observe(elapsed, ("shell", ))
+                ringlog.Event(ringlog.EVENT_COMMAND, self.__returnCode, int(elapsed * 10))
+                COMMAND_RUNS.Inc(labels=("shell", str(self.__returnCode)))
+                if self.__auditHandler is not None: 
+                    self.__auditHandler(self.__command, self.__path, self.__startedAt, elapsed, self.__returnCode, self.__output)
                 if self.__spinHandler is not None: self.__spinHandler(False)
                 if self.__outputHandler is not None: self.__outputHandler(self.__command, self.__returnCode, self.__output)
                 self.__running = False
-            if self.__type == COMMAND_BUILTIN:
-                if self.__command in Command.builtInCommands:
-                    x = Command.builtInCommands[self.__command](display)
-                    x.Run(stop=lambda : display.StopCommand, completed=self.__complete)
+            if self.__type == COMMAND_BUILTIN and self.__worker is not None and not Registry.InProcess(self.__command):
+                self.__worker.BuiltIn(self.__command, self.__args, completed=self.__complete)
+            elif self.__type == COMMAND_BUILTIN:
+                if self.__builtIn is None:
+                    builtIn = Registry.Resolve(self.__command)
+                    if builtIn is None:
+                        logging.warning(f"Built-in {self.__command} is not registered")
+                        self.__running = False
+                        return
+                    # the instance is kept and reused for subsequent runs
+                    self.__builtIn = builtIn(display, **self.__args)
+                self.__builtIn.Run(stop=lambda : display.StopCommand, completed=self.__complete)
     #endregion
 
     #region public class (static) methods
@@ -203,16 +256,40 @@ class Command(object):
             command = data["command"],
             processor = data["processor"] if "processor" in data.keys() else None,
             confirm = data["confirm"] if "confirm" in data.keys() else False,
-            cwd = data["cwd"] if "cwd" in data.keys() else None
+            cwd = data["cwd"] if "cwd" in data.keys() else None,
+            args = data["args"] if "args" in data.keys() else None
           )
-        logging.info(f"Deserialized command {command.Command} successfully")
+        logging.debug("Deserialized command %s successfully", command.Command)
         return command
     #endregion
 
     #region private methods
+    def __runShell(self):
+        """
+            Runs a shell command in process. 
+        """
+        try:
+            #breakpoint()
+            self.__output = subprocess.check_output(self.__command, shell=True,  cwd=self.__cwd).decode()
+            self.__returnCode = 0
+        except subprocess.CalledProcessError as e:
+            self.__output = e.output.decode()
+            self.__returnCode = e.returncode
+            logging.exception(e)
+        except Exception as e:
+            self.__output = str(e)
+            self.__returnCode = -1000
+            logging.exception(e)
+
     def __complete(self):
         """
             Delegate to be called from built-in commands to signify command completion. 
         """
+        if self.__running:
+            elapsed = time.perf_counter() - self.__started
+            COMMAND_SECONDS.Observe(elapsed, ("builtin", ))
+            COMMAND_RUNS.Inc(labels=("builtin", ""))
+            if self.__auditHandler is not None: 
+                self.__auditHandler(self.__command, self.__path, self.__startedAt, elapsed, 0, "")
         self.__running = False
     #endregion
\ No newline at end of file
@@ -0,0 +1,486 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Out of process execution of shell and built-in commands.
+"""
+import time
+import os
+import signal
+import logging
+import itertools
+import threading
+import subprocess
+import multiprocessing
+import concurrent.futures
+from PIL import Image, ImageFont
+from diagnostics.metrics import Metric
+from diagnostics.profiler import SamplingProfiler
+from display import Display, FrameBuffer
+from navigation import LEFT_CLICK, SELECT_CLICK
+
+#region Globals
+MSG_SHELL = "shell"                 # UI -> worker: (MSG_SHELL, requestId, command, cwd)
+MSG_BUILTIN = "builtin"             # UI -> worker: (MSG_BUILTIN, requestId, name, args)
+MSG_NAVIGATE = "navigate"           # UI -> worker: (MSG_NAVIGATE, eventType)
+MSG_PAUSE = "pause"                 # UI -> worker: (MSG_PAUSE, paused)
+MSG_PROFILE = "profile"             # UI -> worker: (MSG_PROFILE, interval, mode) to start, (MSG_PROFILE, None, None) to stop
+MSG_EXIT = "exit"                   # UI -> worker: (MSG_EXIT, )
+MSG_RESULT = "result"               # worker -> UI: (MSG_RESULT, requestId, returnCode, output)
+MSG_PRESENT = "present"             # worker -> UI: (MSG_PRESENT, box)
+MSG_MENU = "menu"                   # worker -> UI: (MSG_MENU, )
+MSG_COMPLETED = "completed"         # worker -> UI: (MSG_COMPLETED, requestId)
+MSG_METRIC = "metric"               # worker -> UI: (MSG_METRIC, update)
+MSG_STACKS = "stacks"               # worker -> UI: (MSG_STACKS, stacks) once profiling stopped
+MAX_OUTPUT = 65536                  # characters of shell output returned to the UI
+RESTART_DELAY = 1.0                 # seconds before a crashed worker is restarted, multiplied by the restarts in a row
+MAX_RESTART_DELAY = 30.0
+PROFILE_TIMEOUT = 5.0               # seconds to wait for the stacks sampled in the worker
+STABLE_SECONDS = 60.0               # uptime after which a worker exit no longer counts as a restart in a row
+WORKER_NICE = 10
+#endregion
+
+class CommandWorker(object):
+    '''
+        The CommandWorker class runs shell commands and built-in commands in a separate worker process, so a heavy
+        or misbehaving command cannot starve the UI process through the GIL or memory pressure. Requests and 
+        results are exchanged over a pipe; built-ins draw into a shared memory framebuffer that the UI process 
+        sends to the panel as is. If the worker dies, running commands fail, the menu is shown again and the 
+        worker is restarted. The worker is attached to the SamplingProfiler, so profiles include the built-ins.
+    '''
+    def __init__(self, display: Display, runtime, pluginDirs: list = None, cpus: list = None, nice: int = WORKER_NICE,
+            memory: int = None, renderCpus: list = None):
+        '''
+            Constructor - Creates a new instance of the CommandWorker class and starts the worker process.
+            Parameters:
+                display:    Display
+                            The display built-ins draw on.
+                runtime:    Runtime
+                            The runtime owning the display. 
+                pluginDirs: list(str), optional
+                            Directories with site specific built-ins to discover in the worker.
+                cpus:       list(int), optional
+                            CPUs the worker may run on. Defaults to all but the first CPU on multi core systems.
+                nice:       int, optional
+                            Niceness added to the worker process.
+                memory:     int, optional
+                            Address space limit of the worker process in MB. Unlimited if None.
+                renderCpus: list(int), optional
+                            CPUs the UI process may run on. Defaults to the first CPU on multi core systems.
+        '''
+        count = os.cpu_count() or 1
+        if cpus is None and count > 1: cpus = list(range(1, count))
+        if renderCpus is None and count > 1: renderCpus = [0]
+        if renderCpus: SetAffinity(renderCpus)
+        self.__display = display
+        self.__runtime = runtime
+        self.__options = (list(pluginDirs or []), cpus, nice, memory)
+        self.__frameBuffer = FrameBuffer(*display.Dimensions)
+        self.__lock = threading.Lock()
+        self.__ids = itertools.count(1)
+        self.__results = {}                 # request id -> Future of running shell commands
+        self.__completed = {}               # request id -> completion delegate of running built-ins
+        self.__stacks = None                # Future of the stacks sampled in the worker
+        self.__active = None                # request id of the built-in owning the display
+        self.__dirty = None                 # region presented by the worker but not yet sent to the panel
+        self.__connection = None
+        self.__process = None
+        self.__restarts = 0
+        self.__stopping = False
+        self.__paused = False
+        self.__start()
+        SamplingProfiler.Attach("commandWorker", self.__startProfile, self.__stopProfile)
+
+    #region Public method implementations
+    def BuiltIn(self, name: str, args: dict, completed: callable = None):
+        '''
+            Runs a built-in command in the worker. Returns immediately. The built-in owns the display until it 
+            stops, which happens on SELECT or LEFT as for built-ins running in the UI process.
+            Parameters:
+                name:       str
+                            The name the built-in is registered under.
+                args:       dict
+                            Keyword arguments for the constructor of the built-in.
+                completed:  callable, optional
+                            Function called once the built-in has stopped.
+        '''
+        requestId = next(self.__ids)
+        with self.__lock:
+            if completed is not None: self.__completed[requestId] = completed
+            self.__active = requestId
+        self.__display.StopCommand = False
+        self.__display.ExternalCallback = self.__navigate
+        if not self.__send((MSG_BUILTIN, requestId, name, args)): self.__runtime.Call(self.__menu)
+
+    def Pause(self, paused: bool):
+        '''
+            Pauses or resumes the refreshes of the built-in running in the worker.
+            Parameters:
+                paused:     bool
+                            True to pause, False to resume.
+        '''
+        self.__paused = paused
+        self.__send((MSG_PAUSE, paused))
+
+    def Shell(self, command: str, cwd: str = None) -> (int, str):
+        '''
+            Runs a shell command in the worker and waits for it to complete. Must not be called on the loop thread.
+            Parameters:
+                command:    str
+                            The shell command.
+                cwd:        str, optional
+                            The working directory of the command.
+            Returns:
+                The return code and the output of the command. The output is truncated to MAX_OUTPUT characters.
+        '''
+        requestId = next(self.__ids)
+        future = concurrent.futures.Future()
+        with self.__lock: self.__results[requestId] = future
+        if not self.__send((MSG_SHELL, requestId, command, cwd)):
+            with self.__lock: self.__results.pop(requestId, None)
+            return (-1000, "Command worker not available")
+        return future.result()
+
+    @property
+    def Pid(self) -> int:
+        ''' Gets the process id of the worker, None if it is not running. '''
+        process = self.__process
+        return process.pid if process is not None and process.is_alive() else None
+
+    def Stop(self):
+        '''
+            Stops the worker process and releases the framebuffer.
+        '''
+        self.__stopping = True
+        SamplingProfiler.Detach("commandWorker")
+        self.__send((MSG_EXIT, ))
+        process = self.__process
+        if process is not None:
+            process.join(1)
+            if process.is_alive(): process.kill()
+        self.__frameBuffer.Close()
+    #endregion
+
+    #region Private method implementations
+    def __failed(self):
+        '''
+            Fails the running commands after the worker died.
+        '''
+        with self.__lock:
+            results, self.__results = self.__results, {}
+            completed, self.__completed = self.__completed, {}
+            stacks, self.__stacks = self.__stacks, None
+            active = self.__active
+        if stacks is not None: stacks.set_result({})
+        for future in results.values(): future.set_result((-1000, "Command worker stopped"))
+        for delegate in completed.values(): delegate()
+        if active is not None: self.__runtime.Call(self.__menu)
+
+    def __menu(self):
+        '''
+            Returns from a built-in to the menu. Called on the loop thread.
+        '''
+        self.__active = None
+        self.__display.ExternalCallback = None
+        self.__display.StopCommand = False
+        self.__display.DrawMenu()
+
+    def __navigate(self, eventType: int):
+        '''
+            Delegate registered as Display.ExternalCallback while a built-in runs in the worker.
+        '''
+        self.__send((MSG_NAVIGATE, eventType))
+
+    def __present(self):
+        '''
+            Sends the region presented by the worker to the panel. Called on the loop thread.
+        '''
+        with self.__lock:
+            box, self.__dirty = self.__dirty, None
+            active = self.__active
+        if box is not None and active is not None: self.__display.DrawFrameBuffer(self.__frameBuffer, box)
+
+    def __read(self, connection, process):
+        '''
+            Thread entry point receiving the messages of a worker process until it exits.
+        '''
+        started = time.monotonic()
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == MSG_RESULT:
+                with self.__lock: future = self.__results.pop(message[1], None)
+                if future is not None: future.set_result((message[2], message[3]))
+            elif kind == MSG_PRESENT:
+                box = message[1] or (0, 0) + self.__frameBuffer.Dimensions
+                with self.__lock:
+                    pending = self.__dirty is not None
+                    dirty = self.__dirty or box
+                    self.__dirty = (min(dirty[0], box[0]), min(dirty[1], box[1]), max(dirty[2], box[2]), max(dirty[3], box[3]))
+                if not pending: self.__runtime.Call(self.__present)
+            elif kind == MSG_MENU:
+                self.__runtime.Call(self.__menu)
+            elif kind == MSG_COMPLETED:
+                with self.__lock: delegate = self.__completed.pop(message[1], None)
+                if delegate is not None: delegate()
+            elif kind == MSG_METRIC:
+                Metric.Apply(message[1])
+            elif kind == MSG_STACKS:
+                with self.__lock: future, self.__stacks = self.__stacks, None
+                if future is not None: future.set_result(message[1])
+        process.join()
+        if self.__stopping: return
+        logging.error(f"Command worker exited with code {process.exitcode}, restarting")
+        self.__failed()
+        if time.monotonic() - started >= STABLE_SECONDS: self.__restarts = 0
+        self.__restarts += 1
+        threading.Event().wait(min(MAX_RESTART_DELAY, RESTART_DELAY * self.__restarts))
+        if not self.__stopping: self.__start()
+
+    def __startProfile(self, interval: float, mode: str):
+        '''
+            Starts sampling the threads of the worker. Called by SamplingProfiler.Start.
+        '''
+        self.__send((MSG_PROFILE, interval, mode))
+
+    def __stopProfile(self) -> dict:
+        '''
+            Stops sampling the threads of the worker. Called by SamplingProfiler.Stop.
+            Returns:
+                The stacks sampled in the worker, see SamplingProfiler.Stacks. Empty if the worker did not reply.
+        '''
+        future = concurrent.futures.Future()
+        with self.__lock: self.__stacks = future
+        if not self.__send((MSG_PROFILE, None, None)): return {}
+        try:
+            return future.result(PROFILE_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            logging.warning("Command worker did not return its profile")
+            return {}
+
+    def __send(self, message: tuple) -> bool:
+        '''
+            Sends a message to the worker process.
+            Returns:
+                False if the worker is not available.
+        '''
+        with self.__lock:
+            if self.__connection is None: return False
+            try:
+                self.__connection.send(message)
+                return True
+            except (OSError, ValueError) as e:
+                logging.warning("Command worker not available: %s", e)
+                return False
+
+    def __start(self):
+        '''
+            Starts the worker process and the thread receiving its messages.
+        '''
+        context = multiprocessing.get_context("spawn")
+        connection, child = context.Pipe()
+        width, height = self.__frameBuffer.Dimensions
+        process = context.Process(target=Serve, name="commandWorker", daemon=True,
+            args=(child, self.__frameBuffer.Path, width, height) + self.__options)
+        process.start()
+        child.close()
+        with self.__lock:
+            self.__connection = connection
+            self.__process = process
+        threading.Thread(target=self.__read, args=(connection, process), name="commandWorker", daemon=True).start()
+        if self.__paused: self.__send((MSG_PAUSE, True))
+        logging.info(f"Command worker started (pid {process.pid})")
+
+    #endregion
+
+class WorkerDisplay(object):
+    '''
+        The WorkerDisplay class implements the part of the Display interface used by built-in commands inside
+        the worker process. Frames are written to the shared framebuffer and presented to the UI process.
+    '''
+    def __init__(self, frameBuffer: FrameBuffer, send: callable):
+        '''
+            Constructor - Creates a new instance of the WorkerDisplay class.
+            Parameters:
+                frameBuffer:    FrameBuffer
+                                The framebuffer shared with the UI process.
+                send:           callable
+                                Delegate sending a message to the UI process.
+        '''
+        self.__frameBuffer = frameBuffer
+        self.__send = send
+        self.__font = ImageFont.truetype('display/Roboto-Regular.ttf', 12)
+        self.__smallFont = ImageFont.truetype('display/Roboto-Regular.ttf', 9)
+        self.ExternalCallback: callable = None
+        self.StopCommand: bool = False
+
+    @property
+    def Dimensions(self) -> (int, int):
+        """ Gets the dimensions of the display """
+        return self.__frameBuffer.Dimensions
+
+    @property
+    def Font(self) -> ImageFont:
+        """ Gets the font used for the menu. """
+        return self.__font
+
+    @property
+    def SmallFont(self) -> ImageFont:
+        """ Gets the small font. """
+        return self.__smallFont
+
+    @property
+    def SharedCanvas(self) -> tuple:
+        """ Built-ins in the worker use their own canvas. """
+        return None
+
+    def DrawImage(self, image: Image, boxes: list = None):
+        '''
+            Writes a frame, or the regions of it that changed, into the framebuffer and presents it.
+        '''
+        if boxes is None: box = self.__frameBuffer.Write(image)
+        else:
+            box = None
+            for region in boxes: 
+                self.__frameBuffer.Write(image.crop(region), region[:2])
+                box = region if box is None else (min(box[0], region[0]), min(box[1], region[1]), 
+                    max(box[2], region[2]), max(box[3], region[3]))
+        if box is not None: self.__send((MSG_PRESENT, box))
+
+    def DrawMenu(self):
+        '''
+            Tells the UI process the built-in has returned to the menu.
+        '''
+        self.__send((MSG_MENU, ))
+
+    def Navigate(self, eventType: int):
+        '''
+            Delivers a navigation event forwarded by the UI process to the running built-in.
+        '''
+        if eventType == SELECT_CLICK or eventType == LEFT_CLICK: self.StopCommand = True
+        callback = self.ExternalCallback
+        if callback is not None: callback(eventType)
+
+def SetAffinity(cpus: list):
+    '''
+        Restricts the calling process to a set of CPUs where supported.
+        Parameters:
+            cpus:       list(int)
+                        The CPUs to run on.
+    '''
+    try:
+        os.sched_setaffinity(0, set(cpus))
+    except (AttributeError, OSError, ValueError) as e:
+        logging.warning(f"Could not set CPU affinity to {cpus}: {e}")
+
+def Serve(connection, path: str, width: int, height: int, pluginDirs: list, cpus: list, nice: int, memory: int):
+    '''
+        Entry point of the worker process. Runs the requests received from the UI process until the pipe is 
+        closed or MSG_EXIT is received.
+        Parameters:
+            connection: Connection
+                        The pipe to the UI process.
+            path:       str
+                        Path of the shared framebuffer.
+            width:      int
+                        Width of the framebuffer.
+            height:     int
+                        Height of the framebuffer.
+            pluginDirs: list(str)
+                        Directories with site specific built-ins.
+            cpus:       list(int)
+                        CPUs to run on, or None.
+            nice:       int
+                        Niceness to add.
+            memory:     int
+                        Address space limit in MB, or None.
+    '''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)                # the UI process handles Ctrl-C
+    if nice: os.nice(nice)
+    if cpus: SetAffinity(cpus)
+    if memory:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory * 1024 * 1024, memory * 1024 * 1024))
+    from builtin import Registry, BuiltInCommand
+    for pluginDir in pluginDirs: Registry.Discover(pluginDir)
+
+    lock = threading.Lock()
+    def send(message: tuple):
+        with lock:
+            try:
+                connection.send(message)
+            except (OSError, ValueError):
+                pass
+    Metric.Forward(lambda update: send((MSG_METRIC, update)))
+
+    def shell(requestId: int, command: str, cwd: str):
+        try:
+            result = subprocess.run(command, shell=True, cwd=cwd, stdout=subprocess.PIPE)
+            code, output = result.returncode, result.stdout[-MAX_OUTPUT * 4:].decode(errors="replace")[-MAX_OUTPUT:]
+        except Exception as e:
+            code, output = -1000, str(e)
+        send((MSG_RESULT, requestId, code, output))
+
+    display = WorkerDisplay(FrameBuffer(width, height, path), send)
+    profiler = None
+    builtIns = {}
+    def runBuiltIn(requestId: int, name: str, args: dict):
+        key = (name, repr(sorted((args or {}).items())))
+        if key not in builtIns:
+            builtIn = Registry.Resolve(name)
+            if builtIn is None: raise Exception(f"Built-in {name} is not registered")
+            builtIns[key] = builtIn(display, **(args or {}))
+        display.StopCommand = False
+        builtIns[key].Run(stop=lambda: display.StopCommand, 
+            completed=lambda: send((MSG_COMPLETED, requestId)))
+
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            break
+        kind = message[0]
+        if kind == MSG_EXIT: break
+        try:
+            if kind == MSG_SHELL:
+                threading.Thread(target=shell, args=message[1:], name="shell", daemon=True).start()
+            elif kind == MSG_NAVIGATE:
+                display.Navigate(message[1])
+            elif kind == MSG_PAUSE:
+                BuiltInCommand.Pause(message[1])
+            elif kind == MSG_PROFILE and message[1] is not None:
+                if profiler is not None: profiler.Stop()
+                profiler = SamplingProfiler(message[1], message[2])
+                profiler.Start()
+            elif kind == MSG_PROFILE:
+                if profiler is not None: profiler.Stop()
+                send((MSG_STACKS, profiler.Stacks() if profiler is not None else {}))
+                profiler = None
+            elif kind == MSG_BUILTIN:
+                runBuiltIn(*message[1:])
+        except Exception as e:
+            # a failing request must not take down the worker and the shell commands running in it
+            logging.error(f"Command worker request {kind} failed: {e}", exc_info=True)
+            if kind == MSG_BUILTIN:
+                send((MSG_COMPLETED, message[1]))
+                send((MSG_MENU, ))
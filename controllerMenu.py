@@ -18,74 +18,387 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import sys
 import time
-import yaml
 import logging
-from display import Display, CONFIRM_OK, CONFIRM_CANCEL
-from navigation import Navigation
-from command import Command, COMMAND_SHELL, COMMAND_BUILTIN
+import threading
+from display import Display, FrameServer, HeadlessLCD, IdleManager, AssetCache, CONFIRM_OK, CONFIRM_CANCEL, MODE_MENU
+from display.assets import ASSET_DIR, DEFAULT_CAPACITY
+from display.external import SOCKET_PATH, FRAMEBUFFER_PATH
+from display.idle import DEFAULT_DIM, DEFAULT_SLEEP, DEFAULT_LEVEL
+from navigation import Navigation, EventQueue, CreateBackend, Recorder, UP_CLICK, DOWN_CLICK, PAGE_UP_CLICK, PAGE_DOWN_CLICK
+from command import Command, CommandWorker, COMMAND_SHELL, COMMAND_BUILTIN
+import builtin
+from builtin import Registry
+from menu import MenuNode, ConfigCache
+from audit import AuditLog, AuditEntry, AUDIT_DIR
+from watch import FileWatcher
+from diagnostics import StartupTimer, MetricsExporter, METRICS_ADDRESS, logs, ringlog, memory
+from runtime import Runtime
+
+PLUGIN_DIR = "./plugins"
+COALESCED_EVENTS = (UP_CLICK, DOWN_CLICK, PAGE_UP_CLICK, PAGE_DOWN_CLICK)
+LOW_MEMORY_OUTPUT = 16384     # characters of command output kept in low-memory mode
+LOW_MEMORY_ASSETS = 65536     # bytes of cached images in low-memory mode
 
 class ControllerMenu(object):
     """
-        Main class of the PI Controller Menu. Handles loading and running the menu and commands. 
+        Main class of the PI Controller Menu. Handles loading and running the menu and commands. The menu state 
+        is owned by the runtime's event loop: navigation events, reloads and dynamic menu updates are handed 
+        to the loop, and commands run on its executor. 
     """
-    def __init__(self, config = "./controllerMenu.yaml"):
+    def __init__(self, config = "./controllerMenu.yaml", startup: StartupTimer = None):
         """
             Constructor. Creates a new instance of the ContollerMenu class. 
             Paramters: 
                 config:     str
                             Name of the config file for the controller menu. Defaults to ./controllerMenu.yaml. 
+                startup:    StartupTimer
+                            Optional. The timer measuring the startup phases. Pass a timer created before the
+                            imports to include them in the time to first frame.
         """
         self.__configFile = config
+        self.__configCache = ConfigCache(config)
+        self.__startup = startup or StartupTimer()
         self.__config = None
-        self.__rootMenu = None
+        self.__root: MenuNode = None
         self.__commands = {}
-        self.__currentMenu = None
-        self.__breadcrumb = [""]
+        self.__current: MenuNode = None
+        self.__settings = {}
+        self.__runtime = Runtime()
+        self.__watcher = None
+        self.__worker = None
+        self.__idle = None
+        self.__audit = None
+        self.__selectedPath = None
+        self.__events = EventQueue(coalesce=COALESCED_EVENTS)   # navigation events handed to the loop thread
+        self.__eventsScheduled = False
+        self.__eventsLock = threading.Lock()
         self.__load()
 
     def Run(self):
         """
-            Main loop. Does not really do anything other than keeping the main thread alive. 
+            Main loop. Runs the event loop until the menu is stopped or SIGTERM or SIGINT is received. 
         """
-        while True:
-            time.sleep(120)
+        self.__runtime.Run()
+
+    def Stop(self):
+        """
+            Stops the menu. Can be called from any thread; Run returns once the menu has stopped. 
+        """
+        self.__runtime.Stop()
 
     def __load(self):
         """
             Loads the controller menu configuration and boots the menu. 
         """
         # load the menu
-        with open(self.__configFile) as file:
-            # The FullLoader parameter handles the conversion from YAML
-            # scalar values to Python dictionary format
-            self.__config = yaml.load(file, Loader=yaml.FullLoader)
+        self.__config = self.__parse()
+        self.__settings = self.__config.get("settings") or {}
+        self.__startup.Mark("config")
 
-        self.__rootMenu = self.__config["root"]
-        self.__currentMenu = self.__rootMenu
-        items = []
-        for item in self.__currentMenu: items.append(item)
+        # apply the log level and limits and record high frequency events in the ring log
+        logSettings = self.__settings.get("logging") or {}
+        logs.Setup(logSettings.get("level", logs.DEFAULT_LEVEL), logSettings.get("rate", logs.DEFAULT_RATE), 
+            logSettings.get("burst", logs.DEFAULT_BURST))
+        if logSettings.get("ring"):
+            ringlog.Open(logSettings["ring"], logSettings.get("ringSize", ringlog.DEFAULT_CAPACITY))
+            self.__runtime.OnShutdown(ringlog.Close)
+
+        # serve the performance counters
+        metricsSettings = self.__settings.get("metrics") or {}
+        if metricsSettings.get("enabled", False):
+            exporter = MetricsExporter(metricsSettings.get("address", METRICS_ADDRESS))
+            self.__runtime.OnShutdown(exporter.Stop)
+        if not self.__configCache.Hit: logging.info(f"Parsed {self.__configFile}, configuration cache refreshed")
 
         # initialize Display
-        self.__disp: Display = Display()
-        self.__disp.Items = items
-        self.__disp.ResetMenu()
+        driver = None
+        displaySettings = self.__settings.get("display") or {}
+        if displaySettings.get("driver", "lcd") == "headless": driver = HeadlessLCD(frameDir=displaySettings.get("frames"))
+        memorySettings = self.__settings.get("memory") or {}
+        lowMemory = memorySettings.get("low", False)
+        Command.MaxOutput = memorySettings.get("maxOutput", LOW_MEMORY_OUTPUT if lowMemory else None)
+        self.__disp: Display = Display(driver, shareCanvas=lowMemory)
+        self.__disp.Runtime = self.__runtime
         self.__disp.SelectCallback = self.__processSelectEvent
         self.__disp.UpCallback = self.__processBreadcrumbEvent
         self.__disp.ConfirmCallback = self.__processConfirmEvent
 
+        # show the splash screen and the icons from pre-converted images
+        assetSettings = self.__settings.get("assets") or {}
+        self.__disp.Assets = AssetCache(assetSettings.get("directory", ASSET_DIR), assetSettings.get("capacity", 
+            LOW_MEMORY_ASSETS if lowMemory else DEFAULT_CAPACITY))
+        self.__runtime.OnShutdown(self.__disp.Assets.Close)
+        if self.__settings.get("splash"):
+            splash = self.__disp.Assets.Load(self.__settings["splash"], self.__disp.Dimensions)
+            if splash is not None: self.__disp.DrawAsset(splash)
+        self.__disp.Icons = self.__config.get("icons")
+        self.__startup.Mark("display")
+
+        # register site specific built-ins. These are only imported once selected
+        pluginDirs = self.__config.get("plugins", [PLUGIN_DIR])
+        for pluginDir in pluginDirs: Registry.Discover(pluginDir)
+
+        # run commands and built-ins in a worker process, unless memory is too tight for a second interpreter
+        workerSettings = self.__settings.get("worker") or {}
+        if workerSettings.get("enabled", not lowMemory):
+            self.__worker = CommandWorker(self.__disp, self.__runtime, pluginDirs, workerSettings.get("cpus"), 
+                workerSettings.get("nice", 10), workerSettings.get("memory"), workerSettings.get("renderCpus"))
+            self.__runtime.OnShutdown(self.__worker.Stop)
+
+        # let local processes draw on the display
+        externalSettings = self.__settings.get("external") or {}
+        if externalSettings.get("enabled", False):
+            server = FrameServer(self.__disp, self.__runtime, externalSettings.get("socketPath", SOCKET_PATH), 
+                externalSettings.get("path", FRAMEBUFFER_PATH))
+            self.__runtime.Spawn(server.Start)
+            self.__runtime.OnShutdown(server.Stop)
+
+        # record command runs in the audit log
+        auditSettings = self.__settings.get("audit") or {}
+        if auditSettings.get("enabled", True):
+            self.__audit = AuditLog(auditSettings.get("directory", AUDIT_DIR), auditSettings.get("segmentSize", 256*1024), 
+                auditSettings.get("segments", 8))
+            self.__runtime.OnShutdown(self.__audit.Stop)
+
         # load configured commands
         for item in self.__config["commands"]:
-            self.__commands[item] = Command.FromJSON(self.__config["commands"][item])
-            self.__commands[item].SpinHandler = self.__disp.Spinner
-            if self.__commands[item].Type == COMMAND_SHELL: 
-                    self.__commands[item].OutputHandler = self.__disp.DrawOutput
-            if self.__commands[item].Confirm == True:
-                    self.__commands[item].ConfirmationHandler = self.__disp.DrawConfirmation
+            self.__commands[item] = self.__createCommand(self.__config["commands"][item])
+        self.__startup.Mark("commands")
+
+        # compile the menu tree
+        self.__root = MenuNode.Compile(self.__config["root"], self.__commands)
+        self.__current = self.__root
+        self.__runtime.OnShutdown(lambda: self.__root.Release())
+        self.__startup.Mark("menu")
+
+        # dim and switch off the display when no button is pressed
+        idleSettings = self.__settings.get("idle") or {}
+        if idleSettings.get("enabled", False):
+            self.__idle = IdleManager(self.__disp, self.__runtime, idleSettings.get("dim", DEFAULT_DIM), 
+                idleSettings.get("sleep", DEFAULT_SLEEP), idleSettings.get("level", DEFAULT_LEVEL))
+            if self.__worker is not None: self.__idle.OnPause(self.__worker.Pause)
+            self.__idle.OnPause(lambda paused: builtin.BuiltInCommand.Pause(paused))    # imported on first use
+            self.__runtime.Call(self.__idle.Start)
+            self.__runtime.OnShutdown(self.__idle.Stop)
 
         # initialize Navigation buttons
-        self.__nav: Navigation = Navigation(self.__disp.ProcessNavigationEvent)
+        inputSettings = self.__settings.get("input") or {}
+        backend = CreateBackend(inputSettings)
+        if inputSettings.get("backend") == "replay": backend.Completed = self.__replayCompleted
+        recorder = Recorder(inputSettings["record"]) if inputSettings.get("record") else None
+        self.__nav: Navigation = Navigation(self.__queueNavigationEvent, backend=backend, recorder=recorder)
+        self.__runtime.OnShutdown(self.__nav.Stop)
+        self.__nav.Start()                  # only once assigned, a fast replay may complete right away
+
+        # reload the menu when the configuration changes
+        if self.__settings.get("reload", True): 
+            self.__watcher = FileWatcher(self.__configFile, lambda: self.__runtime.Spawn(self.__reload))
+            self.__runtime.OnShutdown(self.__watcher.Stop)
+        self.__startup.Mark("navigation")
+
+        # show the root menu. Sent right away if the panel is up, otherwise once the loop runs
+        self.__disp.FrameCallback = self.__firstFrame
+        self.__disp.Items = self.__root.Items
+        self.__disp.ResetMenu()
+
+    def __firstFrame(self):
+        """
+            Delegate called once the first menu frame has been sent to the panel. Reports the startup breakdown and 
+            appends it to the startup history if configured.
+        """
+        self.__startup.Mark("first frame")
+        self.__startup.Report()
+        history = (self.__settings.get("startup") or {}).get("history")
+        if history: self.__startup.Record(history)
+
+    def __createCommand(self, data) -> Command:
+        """
+            Creates a command from its configuration and connects it to the display. The history built-in reads 
+            the audit log in settings.audit.directory unless its args name another directory.
+            Parameters:
+                data:           dict
+                                The command configuration.
+            Returns:
+                The Command instance.
+        """
+        if data.get("type") == "builtin" and data.get("command") == "history":
+            directory = (self.__settings.get("audit") or {}).get("directory", AUDIT_DIR)
+            data = dict(data, args={"directory": directory, **(data.get("args") or {})})
+        command = Command.FromJSON(data)
+        command.Worker = self.__worker
+        command.SpinHandler = self.__disp.Spinner
+        if self.__audit is not None: command.AuditHandler = self.__record
+        if command.Type == COMMAND_SHELL: 
+                command.OutputHandler = self.__disp.DrawOutput
+        if command.Confirm == True:
+                command.ConfirmationHandler = self.__disp.DrawConfirmation
+        return command
+
+    def __record(self, command: str, path: list, started: float, duration: float, code: int, output: str):
+        """
+            Delegate called by the commands on completion to record the run in the audit log. 
+            Parameters:
+                command:        str
+                                The command run.
+                path:           list(str)
+                                The menu path the command was selected from.
+                started:        float
+                                Time the command was started, in seconds since the epoch.
+                duration:       float
+                                Run time in seconds.
+                code:           int
+                                The return code.
+                output:         str
+                                The command output.
+        """
+        self.__audit.Record(AuditEntry(started, "/".join(path or []), command, duration, code, output))
+
+    def __parse(self) -> dict:
+        """
+            Reads and parses the configuration file. The parsed configuration is cached until the file changes.
+            Returns:
+                The configuration.
+        """
+        config = self.__configCache.Load()
+        if not isinstance(config, dict) or "root" not in config or "commands" not in config:
+            message = "Configuration not in the appropriate format. Expect 'root' and 'commands' sections."
+            logging.error(message)
+            raise Exception(message)
+        return config
+
+    async def __reload(self):
+        """
+            Reloads the configuration after the configuration file changed. Only the commands and menus that 
+            changed are replaced; running commands continue and the current menu is kept if it still exists. 
+            The display and input are not re-initialized, changes to 'settings' and 'plugins' require a restart.
+            The file is parsed on the executor.
+        """
+        try:
+            config = await self.__runtime.Submit(self.__parse)
+            previous = self.__config["commands"]
+            commands = {}
+            for item, data in config["commands"].items():
+                if item in self.__commands and previous.get(item) == data: commands[item] = self.__commands[item]
+                else: commands[item] = self.__createCommand(data)
+        except Exception as e:
+            logging.error(f"Configuration {self.__configFile} not reloaded: {e}")
+            return
+        path = self.__current.Path
+        self.__current.Remember(*self.__disp.Cursor)
+        try:
+            root = MenuNode.Compile(config["root"], commands, previous=self.__root)
+        except Exception as e:
+            logging.error(f"Configuration {self.__configFile} not reloaded: {e}")
+            return
+        current = root
+        for name in path:
+            child = current.Child(name)
+            if child is None or child.IsLeaf: break
+            current = child
+        changed = [item for item in commands if commands[item] is not self.__commands.get(item)]
+        previousRoot = self.__root
+        self.__config, self.__commands, self.__root, self.__current = config, commands, root, current
+        previousRoot.Release(root)
+        self.__disp.Icons = config.get("icons")
+        if current.IsDynamic: self.__activate(current)
+        if self.__disp.Mode == MODE_MENU: self.__disp.ShowMenu(current.Items, current.Cursor, current.ScrollStart)
+        logging.info(f"Reloaded {self.__configFile}: {len(changed)} command(s) replaced")
+
+    def __replayCompleted(self, count: int, elapsed: float):
+        """
+            Delegate called once a replayed input trace has completed. Reports the rendering statistics of a headless 
+            display and the resident memory of the menu processes and stops the menu if configured with 'exitOnComplete'.
+            Parameters:
+                count:          int
+                                Number of replayed events.
+                elapsed:        float
+                                Duration of the replay in seconds.
+        """
+        # report once the loop thread has processed the events handed to it
+        self.__nav.Queue.Join()
+        self.__events.Join()
+        self.__runtime.Call(self.__replayReport, count, elapsed)
+
+    def __replayReport(self, count: int, elapsed: float):
+        """
+            Reports the replay benchmark on the loop thread, after the replayed events were processed.
+        """
+        driver = self.__disp.Driver
+        if isinstance(driver, HeadlessLCD):
+            logging.info(f"Replay benchmark: {count} events in {elapsed:.3f}s, {driver.Frames} frames, " + 
+                f"{1000*driver.FrameTime/max(1, driver.Frames):.2f}ms per frame")
+        memory.Report({"menu": "self", "worker": self.__worker.Pid if self.__worker is not None else None})
+        if (self.__settings.get("input") or {}).get("exitOnComplete", False): self.Stop()
+
+    def __activate(self, node: MenuNode):
+        """
+            Connects a dynamic menu about to be shown to the display and refreshes its items if they expired.
+            Parameters:
+                node:           MenuNode
+                                The dynamic menu.
+        """
+        node.Dynamic.Changed = lambda: self.__runtime.Call(self.__dynamicChanged, node)
+        node.Dynamic.Refresh()
+        node.Dynamic.Request(node.Cursor)
+        node.Update()
+
+    def __dynamicChanged(self, node: MenuNode):
+        """
+            Delegate called by the source of a dynamic menu once new items are available. Redraws the menu if it is 
+            shown, keeping the cursor position. 
+            Parameters:
+                node:           MenuNode
+                                The dynamic menu.
+        """
+        node.Update()
+        if self.__current is node and self.__disp.Mode == MODE_MENU: self.__disp.DrawMenu(node.Items)
+
+    def __queueNavigationEvent(self, eventType: int, count: int):
+        """
+            Delegate called on the navigation dispatch thread for each navigation event. Hands the event to the loop 
+            thread without waiting for it, so neither thread can stall the other. This is the one place presses are 
+            coalesced: UP, DOWN, PAGE UP and PAGE DOWN presses arriving while the loop thread is busy become a single 
+            multi-step event.
+            Parameters:
+                eventType:      int
+                                The type of event, e.g. DOWN_CLICK
+                count:          int
+                                Number of coalesced presses.
+        """
+        self.__events.Put(eventType, time.monotonic(), count)
+        with self.__eventsLock:
+            scheduled, self.__eventsScheduled = self.__eventsScheduled, True
+        if not scheduled: self.__runtime.Call(self.__processNavigationEvents)
+
+    def __processNavigationEvents(self):
+        """
+            Processes the navigation events queued by __queueNavigationEvent on the loop thread.
+        """
+        with self.__eventsLock: self.__eventsScheduled = False
+        while True:
+            event = self.__events.Get(0)
+            if event is None: break
+            ringlog.Event(ringlog.EVENT_INPUT, event.type, event.count)
+            try:
+                self.__processNavigationEvent(event.type, event.count)
+            finally:
+                self.__events.Done()
+
+    def __processNavigationEvent(self, eventType: int, count: int = 1):
+        """
+            Delegate called on the loop thread for each navigation event delivered by the Navigation model. Passes 
+            the event to the display and reads ahead in a dynamic menu as the cursor approaches the last item read.
+            Parameters:
+                eventType:      int
+                                The type of event, e.g. DOWN_CLICK
+                count:          int
+                                Number of coalesced presses.
+        """
+        if self.__idle is not None and self.__idle.Touch(): return
+        self.__disp.ProcessNavigationEvent(eventType, count)
+        current = self.__current
+        if current.IsDynamic and self.__disp.Mode == MODE_MENU: current.Dynamic.Request(self.__disp.Cursor[0])
 
     def __processSelectEvent(self, selectIndex: int, selectItem: str):
         """
@@ -97,31 +410,42 @@ class ControllerMenu(object):
                 selectedItem:   str
                                 The selected menu item
         """
-        items = [".."]
-        if type(self.__currentMenu[selectItem]) is str:
-            logging.info(f"Execute {self.__currentMenu[selectItem]}")
-            self.__commands[self.__currentMenu[selectItem]].Run(display=self.__disp)
+        if self.__current.IsDynamic:
+            item = self.__current.Item(selectIndex)
+            if item is None: return
+            command = self.__current.ItemCommand(item, self.__createCommand)
+            self.__selectedPath = self.__current.Path + [item]
+            logging.info("Execute %s", command.Command)
         else:
-            logging.info(f"Load {self.__currentMenu[selectItem]}")
-            self.__currentMenu = self.__currentMenu[selectItem]
-            self.__breadcrumb.append(selectItem)
-            for item in self.__currentMenu: items.append(item)
-            self.__disp.Items = items
+            node = self.__current.Entries[selectIndex]
+            if not node.IsLeaf:
+                logging.info("Load %s", selectItem)
+                self.__show(node)
+                return
+            command = node.Command
+            self.__selectedPath = node.Path
+            logging.info("Execute %s", node.CommandName)
+        self.__runtime.Submit(command.Run, display=self.__disp, path=self.__selectedPath)
 
     def __processBreadcrumbEvent(self):
         """
             Delegate to respond to the navigate uo event on the controller tactile Up button. Loads the 
-            previous menu. 
-        """
-        items = []
-        self.__breadcrumb.pop()
-        for level in self.__breadcrumb:
-            if level == "": self.__currentMenu = self.__rootMenu
-            else: 
-                self.__currentMenu = self.__currentMenu[level]
-                items.append("..")
-        for item in self.__currentMenu: items.append(item)
-        self.__disp.Items = items
+            previous menu and restores its cursor position. 
+        """
+        if self.__current.Parent is None: return
+        self.__show(self.__current.Parent)
+
+    def __show(self, node: MenuNode):
+        """
+            Shows a menu, remembering the cursor position of the menu currently shown. 
+            Parameters:
+                node:           MenuNode
+                                The menu to show.
+        """
+        self.__current.Remember(*self.__disp.Cursor)
+        self.__current = node
+        if node.IsDynamic: self.__activate(node)
+        self.__disp.ShowMenu(node.Items, node.Cursor, node.ScrollStart)
 
     def __processConfirmEvent(self, command:Command, confirmState: int):
         """
@@ -135,7 +459,7 @@ class ControllerMenu(object):
         """
         if confirmState == CONFIRM_CANCEL: self.__disp.DrawMenu()
         else:
-            command.Run(display=self.__disp, confirmed=CONFIRM_OK)
+            self.__runtime.Submit(command.Run, display=self.__disp, confirmed=CONFIRM_OK, path=self.__selectedPath)
 
 
 
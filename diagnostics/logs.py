@@ -0,0 +1,144 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Non-blocking, rate limited logging pipeline.
+"""
+import sys
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+DEFAULT_LEVEL = logging.INFO
+DEFAULT_RATE = 20
+DEFAULT_BURST = 50
+
+class RateLimitFilter(logging.Filter):
+    '''
+        The RateLimitFilter class limits the records below WARNING each logger passes on with a token bucket: a 
+        logger may emit a burst of records, then a steady rate per second. The number of suppressed records is 
+        appended to the next record passed on. Warnings and errors are never suppressed.
+    '''
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        '''
+            Constructor - Creates a new instance of the RateLimitFilter class.
+            Parameters:
+                rate:       float, optional
+                            Records per second and logger. 
+                burst:      int, optional
+                            Records a logger may emit at once.
+        '''
+        super().__init__()
+        self.Configure(rate, burst)
+        self.__buckets = {}             # logger name -> [tokens, last update, suppressed]
+
+    def Configure(self, rate: float, burst: int):
+        '''
+            Changes the limits.
+            Parameters:
+                rate:       float
+                            Records per second and logger. 
+                burst:      int
+                            Records a logger may emit at once.
+        '''
+        self.__rate = rate
+        self.__burst = burst
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING: return True
+        bucket = self.__buckets.get(record.name)
+        if bucket is None: bucket = self.__buckets[record.name] = [self.__burst, record.created, 0]
+        tokens = min(self.__burst, bucket[0] + (record.created - bucket[1]) * self.__rate)
+        bucket[1] = record.created
+        if tokens < 1:
+            bucket[0] = tokens
+            bucket[2] += 1
+            return False
+        bucket[0] = tokens - 1
+        if bucket[2]:
+            record.msg = f"{record.msg} ({bucket[2]} similar messages suppressed)"
+            bucket[2] = 0
+        return True
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    '''
+        The LazyQueueHandler class queues records without formatting them, so the message is formatted on the 
+        listener thread instead of the thread that logs. Arguments are therefore formatted with the state they 
+        have when the record is written.
+    '''
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+__handler = None
+__listener = None
+__filter = None
+__lock = threading.Lock()
+
+def Setup(level = DEFAULT_LEVEL, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, stream = None):
+    '''
+        Routes all logging through a queue to a listener thread writing to the stream, so logging never blocks 
+        on I/O, and rate limits records below WARNING per logger. Calling it again changes the level and limits.
+        Parameters:
+            level:      int or str, optional
+                        The level of the root logger, e.g. logging.INFO or 'debug'. Unknown names fall back to DEFAULT_LEVEL.
+            rate:       float, optional
+                        Records per second and logger below WARNING.
+            burst:      int, optional
+                        Records a logger may emit at once below WARNING.
+            stream:     file, optional
+                        The stream to write to. Defaults to stderr.
+    '''
+    global __handler, __listener, __filter
+    unknown = None
+    if isinstance(level, str):
+        name, level = level, logging.getLevelName(level.upper())
+        if not isinstance(level, int): unknown, level = name, DEFAULT_LEVEL
+    root = logging.getLogger()
+    root.setLevel(level)
+    with __lock:
+        if __handler is not None:
+            __filter.Configure(rate, burst)
+        else:
+            target = logging.StreamHandler(stream or sys.stderr)
+            target.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+            records = queue.SimpleQueue()
+            __filter = RateLimitFilter(rate, burst)
+            __handler = LazyQueueHandler(records)
+            __handler.addFilter(__filter)
+            for handler in list(root.handlers): root.removeHandler(handler)
+            root.addHandler(__handler)
+            __listener = logging.handlers.QueueListener(records, target, respect_handler_level=True)
+            __listener.start()
+            atexit.register(Shutdown)
+    if unknown is not None: logging.warning("Unknown log level '%s'; using %s.", unknown, logging.getLevelName(DEFAULT_LEVEL))
+
+def Shutdown():
+    '''
+        Writes the queued records and stops the listener thread. 
+    '''
+    global __handler, __listener
+    with __lock:
+        if __listener is None: return
+        logging.getLogger().removeHandler(__handler)
+        __listener.stop()
+        __listener = None
+        __handler = None
@@ -0,0 +1,81 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Memory usage of the menu processes, read from /proc/[pid]/status.
+"""
+import gc
+import sys
+import logging
+
+FIELDS = ("VmRSS", "VmHWM", "RssAnon", "RssFile", "RssShmem")
+MB = 1024 * 1024
+
+def MemoryStatus(pid = "self") -> dict:
+    '''
+        Reads the memory usage of a process.
+        Parameters:
+            pid:        int or str, optional
+                        The process id. The calling process by default.
+        Returns:
+            A dict with the resident set size (VmRSS), its peak (VmHWM) and the anonymous, file backed and 
+            shared memory parts of it (RssAnon, RssFile, RssShmem) in bytes. Empty if the process does not exist.
+    '''
+    status = {}
+    try:
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                name, _, value = line.partition(b":")
+                name = name.decode()
+                if name in FIELDS: status[name] = int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+    return status
+
+def Report(processes: dict) -> str:
+    '''
+        Formats and logs the steady state and peak resident memory of the menu processes. The garbage collector 
+        runs first, so the steady state does not include garbage waiting to be collected.
+        Parameters:
+            processes:  dict
+                        The processes to report, by name, e.g. {"menu": "self", "worker": 1234}. Processes 
+                        with a pid of None are skipped.
+        Returns:
+            The report as text.
+    '''
+    gc.collect()
+    parts = []
+    total = peak = 0
+    for name, pid in processes.items():
+        status = MemoryStatus(pid) if pid is not None else {}
+        if not status: continue
+        total += status.get("VmRSS", 0)
+        peak += status.get("VmHWM", 0)
+        parts.append(f"{name} {status.get('VmRSS', 0)/MB:.1f}MB (peak {status.get('VmHWM', 0)/MB:.1f}MB, " + 
+            f"anon {status.get('RssAnon', 0)/MB:.1f}MB)")
+    report = f"Resident memory {total/MB:.1f}MB, peak {peak/MB:.1f}MB: " + ", ".join(parts)
+    logging.info(report)
+    return report
+
+if __name__ == "__main__":
+    # python3 -m diagnostics.memory <pid> ... reports running menu processes
+    for pid in sys.argv[1:] or ["self"]:
+        status = MemoryStatus(pid)
+        print(pid, " ".join(f"{name} {status[name]/MB:.1f}MB" for name in FIELDS if name in status) or "not found")
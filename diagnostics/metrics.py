@@ -0,0 +1,331 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Counters, gauges and histograms exported in the Prometheus text format.
+"""
+import os
+import bisect
+import logging
+import threading
+from runtime import RUNTIME_DIR, PrivateDirectory
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_ADDRESS = os.path.join(RUNTIME_DIR, "metrics")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+class Metric(object):
+    '''
+        The Metric class is the base class of the metric types. Metrics register themselves by name when they are 
+        created, usually as module globals next to the code they measure. Values are kept per tuple of label values. 
+        Updating a metric takes a lock and a dictionary lookup, so metrics are always updated and only the 
+        exporter is optional. 
+        
+        In a child process, Forward sends the updates to the parent instead, where Apply records them.
+    '''
+
+    __metrics: dict = {}
+    __lock = threading.Lock()
+    __forward = None
+
+    def __init__(self, name: str, help: str, type: str, labels: tuple = (), function: callable = None):
+        '''
+            Constructor - Creates and registers the metric. 
+            Parameters:
+                name:       str
+                            The metric name, e.g. 'pimenu_display_frames_total'.
+                help:       str
+                            The description of the metric.
+                type:       str
+                            The Prometheus metric type.
+                labels:     tuple(str), optional
+                            The label names.
+                function:   callable, optional
+                            Function without arguments returning the value when the metric is exported. 
+        '''
+        self.__name = name
+        self.__help = help
+        self.__type = type
+        self.__labels = tuple(labels)
+        self.__function = function
+        self._values = {}
+        self._lock = threading.Lock()
+        with Metric.__lock:
+            if name in Metric.__metrics:
+                message = f"Metric '{name}' is already registered"
+                logging.error(message)
+                raise Exception(message)
+            Metric.__metrics[name] = self
+
+    #region Public properties
+    @property
+    def Name(self) -> str:
+        ''' Gets the metric name. '''
+        return self.__name
+    #endregion
+
+    #region Public methods
+    def Render(self) -> list:
+        '''
+            Renders the metric in the Prometheus text format.
+            Returns:
+                The list of lines.
+        '''
+        lines = [f"# HELP {self.__name} {self.__help}", f"# TYPE {self.__name} {self.__type}"]
+        if self.__function is not None:
+            try:
+                lines.append(f"{self.__name} {Metric.__format(self.__function())}")
+            except Exception as e:
+                logging.warning(f"Metric '{self.__name}' failed: {e}")
+            return lines
+        with self._lock: values = list(self._values.items())
+        for labels, value in sorted(values): self._render(lines, self.__selector(labels), value)
+        return lines
+    #endregion
+
+    #region Public class (static) methods
+    @staticmethod
+    def Apply(update: tuple):
+        '''
+            Records an update forwarded from a child process. Updates of unknown metrics are ignored.
+            Parameters:
+                update:     tuple
+                            The update (name, labels, value, operation).
+        '''
+        metric = Metric.__metrics.get(update[0])
+        if metric is not None: metric._update(update[1], update[2], update[3])
+
+    @staticmethod
+    def Forward(send: callable):
+        '''
+            Forwards all metric updates of this process instead of recording them. Call this in child processes.
+            Parameters:
+                send:       callable
+                            Function receiving each update as a tuple (name, labels, value, operation).
+        '''
+        Metric.__forward = send
+
+    @staticmethod
+    def RenderAll() -> str:
+        '''
+            Renders all registered metrics in the Prometheus text format.
+        '''
+        with Metric.__lock: metrics = sorted(Metric.__metrics.values(), key=lambda metric: metric.Name)
+        lines = []
+        for metric in metrics: lines.extend(metric.Render())
+        return "\n".join(lines) + "\n"
+    #endregion
+
+    #region Protected methods
+    def _render(self, lines: list, selector: str, value):
+        '''
+            Renders the sample(s) of one set of label values. Override for metrics with several samples.
+        '''
+        lines.append(f"{self.__name}{selector} {Metric.__format(value)}")
+
+    def _update(self, labels: tuple, value: float, operation: int):
+        '''
+            Records an update, or forwards it in a child process.
+            Parameters:
+                labels:     tuple
+                            The label values.
+                value:      float
+                            The value.
+                operation:  int
+                            The operation, interpreted by _apply.
+        '''
+        if Metric.__forward is not None: 
+            Metric.__forward((self.__name, labels, value, operation))
+            return
+        with self._lock: self._apply(labels, value, operation)
+
+    def _apply(self, labels: tuple, value: float, operation: int):
+        '''
+            Applies an update to the values. Called with the lock held. Override in derived classes.
+        '''
+        self._values[labels] = self._values.get(labels, 0) + value
+    #endregion
+
+    #region Private method implementations
+    def __selector(self, labels: tuple, extra: str = "") -> str:
+        '''
+            Formats the label set of a sample.
+        '''
+        pairs = [f'{name}="{Metric.__escape(value)}"' for name, value in zip(self.__labels, labels)]
+        if extra: pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @staticmethod
+    def __escape(value) -> str:
+        ''' Escapes a label value. '''
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    @staticmethod
+    def __format(value) -> str:
+        ''' Formats a sample value. '''
+        if isinstance(value, float) and value.is_integer() and abs(value) < 1e15: return str(int(value))
+        return repr(value) if isinstance(value, float) else str(value)
+    #endregion
+
+class Counter(Metric):
+    '''
+        The Counter class implements a monotonically increasing count, e.g. frames sent to the panel.
+    '''
+    def __init__(self, name: str, help: str, labels: tuple = (), function: callable = None):
+        '''
+            Constructor - Creates and registers the counter. See Metric for the parameters.
+        '''
+        super().__init__(name, help, "counter", labels, function)
+        if not labels: self._values[()] = 0
+
+    def Inc(self, amount: float = 1, labels: tuple = ()):
+        '''
+            Increments the counter.
+            Parameters:
+                amount:     float, optional
+                            The increment.
+                labels:     tuple, optional
+                            The label values.
+        '''
+        self._update(labels, amount, 0)
+
+class Gauge(Metric):
+    '''
+        The Gauge class implements a value that goes up and down, e.g. the number of queued events.
+    '''
+    SET = 1
+
+    def __init__(self, name: str, help: str, labels: tuple = (), function: callable = None):
+        '''
+            Constructor - Creates and registers the gauge. See Metric for the parameters.
+        '''
+        super().__init__(name, help, "gauge", labels, function)
+        if not labels: self._values[()] = 0
+
+    def Inc(self, amount: float = 1, labels: tuple = ()):
+        ''' Increments the gauge. '''
+        self._update(labels, amount, 0)
+
+    def Dec(self, amount: float = 1, labels: tuple = ()):
+        ''' Decrements the gauge. '''
+        self._update(labels, -amount, 0)
+
+    def Set(self, value: float, labels: tuple = ()):
+        ''' Sets the gauge. '''
+        self._update(labels, value, Gauge.SET)
+
+    def _apply(self, labels: tuple, value: float, operation: int):
+        if operation == Gauge.SET: self._values[labels] = value
+        else: super()._apply(labels, value, operation)
+
+class Histogram(Metric):
+    '''
+        The Histogram class counts observations, e.g. durations, in cumulative buckets.
+    '''
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        '''
+            Constructor - Creates and registers the histogram. 
+            Parameters:
+                name:       str
+                            The metric name, e.g. 'pimenu_display_transfer_seconds'.
+                help:       str
+                            The description of the metric.
+                labels:     tuple(str), optional
+                            The label names.
+                buckets:    tuple(float), optional
+                            The ascending upper bounds of the buckets. 
+        '''
+        super().__init__(name, help, "histogram", labels)
+        self.__buckets = tuple(sorted(buckets))
+
+    def Observe(self, value: float, labels: tuple = ()):
+        '''
+            Records an observation.
+            Parameters:
+                value:      float
+                            The observed value, e.g. seconds.
+                labels:     tuple, optional
+                            The label values.
+        '''
+        self._update(labels, value, 0)
+
+    def _apply(self, labels: tuple, value: float, operation: int):
+        counts = self._values.get(labels)
+        if counts is None: counts = self._values[labels] = [0] * (len(self.__buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.__buckets, value)] += 1
+        counts[-1] += value
+
+    def _render(self, lines: list, selector: str, value):
+        name = self.Name
+        prefix = selector[:-1] + "," if selector else "{"
+        total = 0
+        for bound, count in zip(self.__buckets + ("+Inf", ), value):
+            total += count
+            lines.append(f'{name}_bucket{prefix}le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{selector} {value[-1]!r}")
+        lines.append(f"{name}_count{selector} {total}")
+
+class MetricsExporter(object):
+    '''
+        The MetricsExporter class serves the registered metrics over HTTP, either on a TCP port or on a Unix socket 
+        only the user running the menu can connect to. Scrape with e.g. 'curl http://pi:9101/metrics' or 
+        'curl --unix-socket $XDG_RUNTIME_DIR/controllerMenu-$UID/metrics http://pi/metrics'. The HTTP server is only 
+        imported when an exporter is created, so the menu does not pay for it at startup.
+    '''
+    def __init__(self, address):
+        '''
+            Constructor - Starts serving the metrics on a background thread.
+            Parameters:
+                address:    int or str
+                            A port, 'host:port' or the path of a Unix socket.
+        '''
+        from .metricsServer import UnixHTTPServer, ThreadingHTTPServer, MetricsHandler
+        address = str(address)
+        if "/" in address:
+            if os.path.dirname(address) == RUNTIME_DIR: PrivateDirectory()
+            if os.path.exists(address): os.unlink(address)
+            self.__server = UnixHTTPServer(address, MetricsHandler)
+            os.chmod(address, 0o600)
+        else:
+            host, _, port = address.rpartition(":")
+            self.__server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+        self.__path = address if "/" in address else None
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="metricsExporter", daemon=True)
+        self.__thread.start()
+        logging.info(f"Serving metrics on {address}")
+
+    def Stop(self):
+        '''
+            Stops serving the metrics.
+        '''
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__path is not None and os.path.exists(self.__path): os.unlink(self.__path)
+
+def ProcessRSS() -> int:
+    '''
+        Gets the resident set size of the process in bytes.
+    '''
+    with open("/proc/self/statm", "rb") as f: return int(f.read().split()[1]) * PAGE_SIZE
+
+PROCESS_CPU = Counter("process_cpu_seconds_total", "User and system CPU time of the menu process.", 
+    function=lambda: round(sum(os.times()[:2]), 3))
+PROCESS_RSS = Gauge("process_resident_memory_bytes", "Resident memory of the menu process.", function=ProcessRSS)
@@ -0,0 +1,238 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Sampling profiler over all threads of the process and of attached child processes.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.01
+MODE_CPU = "cpu"
+MODE_WALL = "wall"
+
+class SamplingProfiler(object):
+    '''
+        The SamplingProfiler class periodically samples the Python stacks of all threads with sys._current_frames 
+        on a thread of its own. In MODE_CPU only threads that used CPU time since the previous sample are recorded, 
+        so threads waiting for input or a timer do not hide the busy ones; MODE_WALL records every thread.
+        Nothing runs while the profiler is stopped. The result is written in the collapsed stack format read by 
+        flamegraph.pl and speedscope, one line per stack: 'thread;outer frame;...;inner frame count'.
+
+        Child processes, e.g. the command worker running the built-ins, are profiled by attaching them with Attach: 
+        they sample their own threads while the profiler runs and their stacks are merged into the result, with the 
+        thread names prefixed by the name of the process.
+    '''
+    __sources = {}
+    def __init__(self, interval: float = DEFAULT_INTERVAL, mode: str = MODE_CPU):
+        '''
+            Constructor - Creates a new instance of the SamplingProfiler class.
+            Parameters:
+                interval:   float, optional
+                            Seconds between samples.
+                mode:       str, optional
+                            MODE_CPU or MODE_WALL.
+        '''
+        self.__interval = interval
+        self.__mode = mode
+        self.__stacks = Counter()
+        self.__attached = Counter()
+        self.__samples = 0
+        self.__started = 0
+        self.__elapsed = 0
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    #region Public properties
+    @property
+    def Elapsed(self) -> float:
+        ''' Gets the seconds the profiler has been running. '''
+        if self.__thread is not None: return time.monotonic() - self.__started
+        return self.__elapsed
+
+    @property
+    def Running(self) -> bool:
+        ''' Gets whether the profiler is sampling. '''
+        return self.__thread is not None
+
+    @property
+    def Samples(self) -> int:
+        ''' Gets the number of samples taken. '''
+        return self.__samples
+    #endregion
+
+    #region Public methods
+    def Start(self):
+        '''
+            Discards previous results and starts sampling.
+        '''
+        if self.__thread is not None: return
+        self.__stacks = Counter()
+        self.__attached = Counter()
+        self.__samples = 0
+        self.__stop.clear()
+        self.__started = time.monotonic()
+        self.__thread = threading.Thread(target=self.__run, name="profiler", daemon=True)
+        self.__thread.start()
+        for name, (start, _) in list(SamplingProfiler.__sources.items()):
+            try:
+                start(self.__interval, self.__mode)
+            except Exception as e:
+                logging.warning(f"Cannot profile {name}: {e}")
+
+    def Stop(self):
+        '''
+            Stops sampling. The results are kept until the profiler is started again.
+        '''
+        thread = self.__thread
+        if thread is None: return
+        self.__stop.set()
+        thread.join()
+        self.__elapsed = time.monotonic() - self.__started
+        self.__thread = None
+        for name, (_, stop) in list(SamplingProfiler.__sources.items()):
+            try:
+                stacks = stop()
+            except Exception as e:
+                logging.warning(f"Cannot collect the profile of {name}: {e}")
+                continue
+            for stack, samples in (stacks or {}).items(): self.__attached[(f"{name}/{stack[0]}", ) + tuple(stack[1:])] += samples
+
+    def Stacks(self) -> dict:
+        '''
+            Gets the recorded stacks with the frames formatted, e.g. to send them to the process the profiler 
+            is attached to.
+            Returns:
+                Dictionary of the number of samples per stack, a tuple (thread, outer frame, ..., inner frame).
+        '''
+        stacks = Counter(self.__attached)
+        for stack, samples in list(self.__stacks.items()):
+            stacks[(stack[0], ) + tuple(SamplingProfiler.__label(code) for code in stack[1:])] += samples
+        return dict(stacks)
+
+    def Top(self, count: int = 10) -> list:
+        '''
+            Gets the functions most often found running, i.e. at the top of a sampled stack.
+            Parameters:
+                count:      int, optional
+                            Number of functions to return.
+            Returns:
+                List of (function, share) tuples, share being the fraction of the recorded stacks.
+        '''
+        leaves = Counter()
+        for stack, samples in self.Stacks().items():
+            if len(stack) > 1: leaves[stack[-1]] += samples
+        total = sum(leaves.values())
+        if not total: return []
+        return [(function, samples / total) for function, samples in leaves.most_common(count)]
+
+    def Write(self, path: str) -> int:
+        '''
+            Writes the recorded stacks in the collapsed stack format. The file is only readable by the current user 
+            and a symbolic link at path is not followed.
+            Parameters:
+                path:       str
+                            Path of the file to write.
+            Returns:
+                The number of distinct stacks written.
+        '''
+        stacks = list(self.Stacks().items())
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
+        with open(fd, "w") as f:
+            for stack, samples in stacks:
+                f.write(";".join(frame.replace(";", ":") for frame in stack) + f" {samples}\n")
+        logging.info(f"Wrote {len(stacks)} stacks from {self.__samples} samples to {path}")
+        return len(stacks)
+    #endregion
+
+    #region Public class (static) methods
+    @staticmethod
+    def Attach(name: str, start: callable, stop: callable):
+        '''
+            Attaches a child process to all profilers of this process.
+            Parameters:
+                name:       str
+                            Name of the process, prefixed to its thread names.
+                start:      callable
+                            Function starting the sampler in the process, called with the interval and mode.
+                stop:       callable
+                            Function stopping the sampler in the process and returning its stacks, see Stacks.
+        '''
+        SamplingProfiler.__sources[name] = (start, stop)
+
+    @staticmethod
+    def Detach(name: str):
+        '''
+            Detaches a child process attached with Attach.
+            Parameters:
+                name:       str
+                            Name of the process.
+        '''
+        SamplingProfiler.__sources.pop(name, None)
+    #endregion
+
+    #region Private method implementations
+    def __run(self):
+        '''
+            Thread entry point taking samples until the profiler is stopped.
+        '''
+        own = threading.get_ident()
+        clocks = {}
+        names = {}
+        while not self.__stop.wait(self.__interval):
+            frames = sys._current_frames()
+            if len(names) != len(frames) or any(ident not in names for ident in frames):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own: continue
+                if self.__mode == MODE_CPU and not SamplingProfiler.__busy(ident, clocks): continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stack.reverse()
+                self.__stacks[tuple(stack)] += 1
+            self.__samples += 1
+
+    @staticmethod
+    def __busy(ident: int, clocks: dict) -> bool:
+        '''
+            Determines whether a thread used CPU time since the previous sample.
+        '''
+        try:
+            used = time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (OSError, AttributeError):
+            return True
+        previous = clocks.get(ident)
+        clocks[ident] = used
+        return previous is None or used > previous
+
+    @staticmethod
+    def __label(code) -> str:
+        '''
+            Formats a code object as 'function (file:line)'.
+        '''
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    #endregion
@@ -0,0 +1,166 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Compact binary ring log for high frequency events, decoded offline.
+"""
+import time
+import sys
+import json
+import logging
+import mmap
+import struct
+import itertools
+
+MAGIC = b"PIRING1\0"
+HEADER = struct.Struct("<8sII")             # magic, capacity, length of the kind table
+HEADER_SIZE = 4096
+RECORD = struct.Struct("<QdiHH")            # sequence, time, value, kind, aux
+DEFAULT_CAPACITY = 65536
+
+EVENT_INPUT = 1                             # value: event type, aux: presses delivered at once
+EVENT_FRAME = 2                             # value: bytes sent, aux: transfer time in 0.1ms
+EVENT_COMMAND = 3                           # value: return code, aux: run time in 0.1s
+EVENT_IDLE = 4                              # value: idle state
+KINDS = {EVENT_INPUT: "input", EVENT_FRAME: "frame", EVENT_COMMAND: "command", EVENT_IDLE: "idle"}
+
+class RingLog(object):
+    '''
+        The RingLog class records events as fixed size binary records in a memory mapped file, overwriting the 
+        oldest records once the file is full. Recording an event packs one record into the map, without a lock, 
+        a system call or formatting; the file can be read by Decode while the menu runs or after it crashed, 
+        e.g. 'python3 -m diagnostics.ringlog /dev/shm/controllerMenu.ring'.
+    '''
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY, kinds: dict = None):
+        '''
+            Constructor - Creates the ring log file, replacing an existing one.
+            Parameters:
+                path:       str
+                            Path of the file, e.g. on /dev/shm.
+                capacity:   int, optional
+                            Number of records kept.
+                kinds:      dict, optional
+                            Names of the event kinds, stored in the file for decoding. Defaults to KINDS.
+        '''
+        table = json.dumps({str(kind): name for kind, name in (kinds or KINDS).items()}).encode()
+        if HEADER.size + len(table) > HEADER_SIZE:
+            message = "Too many event kinds for the ring log header"
+            logging.error(message)
+            raise Exception(message)
+        self.__capacity = capacity
+        self.__path = path
+        with open(path, "w+b") as f:
+            f.truncate(HEADER_SIZE + capacity * RECORD.size)
+            self.__map = mmap.mmap(f.fileno(), 0)
+        HEADER.pack_into(self.__map, 0, MAGIC, capacity, len(table))
+        self.__map[HEADER.size:HEADER.size + len(table)] = table
+        self.__sequence = itertools.count(1)
+
+    #region Public properties
+    @property
+    def Path(self) -> str:
+        ''' Gets the path of the ring log file. '''
+        return self.__path
+    #endregion
+
+    #region Public methods
+    def Close(self):
+        '''
+            Closes the ring log. The file is kept for decoding.
+        '''
+        self.__map.close()
+
+    def Record(self, kind: int, value: int = 0, aux: int = 0):
+        '''
+            Records an event. Safe to call from any thread.
+            Parameters:
+                kind:       int
+                            The event kind, e.g. EVENT_INPUT.
+                value:      int, optional
+                            32 bit signed value.
+                aux:        int, optional
+                            16 bit unsigned value, clipped.
+        '''
+        sequence = next(self.__sequence)
+        offset = HEADER_SIZE + (sequence % self.__capacity) * RECORD.size
+        RECORD.pack_into(self.__map, offset, sequence, time.time(), value, kind, max(0, min(aux, 0xffff)))
+    #endregion
+
+    #region Public class (static) methods
+    @staticmethod
+    def Decode(path: str) -> list:
+        '''
+            Reads the records of a ring log file.
+            Parameters:
+                path:       str
+                            Path of the file.
+            Returns:
+                List of (sequence, time, kind name, value, aux) tuples, oldest first.
+        '''
+        with open(path, "rb") as f: data = f.read()
+        magic, capacity, length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            message = f"{path} is not a ring log"
+            logging.error(message)
+            raise Exception(message)
+        kinds = {int(kind): name for kind, name in json.loads(data[HEADER.size:HEADER.size + length]).items()}
+        records = []
+        for sequence, created, value, kind, aux in RECORD.iter_unpack(data[HEADER_SIZE:HEADER_SIZE + capacity * RECORD.size]):
+            if sequence: records.append((sequence, created, kinds.get(kind, str(kind)), value, aux))
+        records.sort()
+        return records
+    #endregion
+
+__ring = None
+
+def Open(path: str, capacity: int = DEFAULT_CAPACITY) -> RingLog:
+    '''
+        Opens the process wide ring log used by Event.
+        Parameters:
+            path:       str
+                        Path of the file.
+            capacity:   int, optional
+                        Number of records kept.
+        Returns:
+            The RingLog.
+    '''
+    global __ring
+    __ring = RingLog(path, capacity)
+    return __ring
+
+def Close():
+    '''
+        Closes the process wide ring log. Events are no longer recorded.
+    '''
+    global __ring
+    ring, __ring = __ring, None
+    if ring is not None: ring.Close()
+
+def Event(kind: int, value: int = 0, aux: int = 0):
+    '''
+        Records an event in the process wide ring log, if one is open. See RingLog.Record.
+    '''
+    ring = __ring
+    if ring is not None: ring.Record(kind, value, aux)
+
+if __name__ == "__main__":
+    for sequence, created, kind, value, aux in RingLog.Decode(sys.argv[1]):
+        stamp = time.strftime("%H:%M:%S", time.localtime(created)) + f"{created % 1:.6f}"[1:]
+        print(f"{sequence:10d} {stamp} {kind:10s} {value:10d} {aux:6d}")
@@ -0,0 +1,99 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+import os
+import logging
+
+class StartupTimer(object):
+    '''
+        The StartupTimer class records the duration of the startup phases up to the first menu frame. The first 
+        phase is the time the interpreter took to start, derived from the process start time in /proc.
+    '''
+    def __init__(self):
+        '''
+            Constructor - Creates a new instance of the StartupTimer class. Create the instance as early as possible.
+        '''
+        self.__phases = []
+        self.__last = time.monotonic()
+        self.__start = self.__last - StartupTimer.__processAge()
+        if self.__last > self.__start: self.__phases.append(("interpreter", self.__last - self.__start))
+
+    @property
+    def Phases(self) -> list:
+        ''' Gets the list of (phase, seconds) tuples recorded so far. '''
+        return self.__phases
+
+    @property
+    def Total(self) -> float:
+        ''' Gets the time in seconds from process start to the last mark. '''
+        return self.__last - self.__start
+
+    def Mark(self, phase: str):
+        '''
+            Marks the end of a startup phase.
+            Parameters:
+                phase:      str
+                            Name of the phase that just completed.
+        '''
+        now = time.monotonic()
+        self.__phases.append((phase, now - self.__last))
+        self.__last = now
+
+    def Record(self, path: str):
+        '''
+            Appends the startup breakdown to a CSV file, so time-to-first-frame can be tracked across releases and 
+            devices. The header is written when the file is created.
+            Parameters:
+                path:       str
+                            Path of the CSV file.
+        '''
+        try:
+            exists = os.path.exists(path)
+            with open(path, "a") as file:
+                if not exists: file.write("timestamp,total," + ",".join(name for name, _ in self.__phases) + "\n")
+                file.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')},{self.Total:.4f}," + 
+                    ",".join(f"{seconds:.4f}" for _, seconds in self.__phases) + "\n")
+        except OSError as e:
+            logging.warning(f"Could not record startup time to {path}: {e}")
+
+    def Report(self) -> str:
+        '''
+            Formats and logs the startup breakdown.
+            Returns:
+                The breakdown as text.
+        '''
+        report = f"Time to first frame {self.Total*1000:.0f}ms: " + \
+            ", ".join(f"{name} {seconds*1000:.0f}ms" for name, seconds in self.__phases)
+        logging.info(report)
+        return report
+
+    @staticmethod
+    def __processAge() -> float:
+        '''
+            Gets the time in seconds since the process was started, or 0 if it cannot be determined.
+        '''
+        try:
+            with open("/proc/self/stat", "rb") as file: stat = file.read()
+            with open("/proc/uptime", "rb") as file: uptime = float(file.read().split()[0])
+            started = int(stat[stat.rfind(b")") + 2:].split()[19]) / os.sysconf("SC_CLK_TCK")
+            return max(0.0, uptime - started)
+        except (OSError, ValueError, IndexError):
+            return 0.0
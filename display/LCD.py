@@ -25,9 +25,10 @@
  # THE SOFTWARE.
  #
 
+import time
 from . import LCD_Config
+from . import rgb565
 import RPi.GPIO as GPIO
-import numpy as np
 
 LCD_WIDTH  = 160
 LCD_HEIGHT = 128
@@ -48,6 +49,9 @@ D2U_L2R = 7
 D2U_R2L = 8
 SCAN_DIR_DFT = U2D_R2L
 
+BACKLIGHT_PWM_FREQUENCY = 200   #Hz, software PWM on the backlight pin
+SLEEP_OUT_DELAY = 0.12          #seconds required between sleep in and sleep out
+
 ##***********************************************************************************************************************
 #------------------------------------------------------------------------
 #|\\\                                                                #/|
@@ -62,6 +66,8 @@ class LCD:
         self.LCD_Scan_Dir = SCAN_DIR_DFT
         self.LCD_X_Adjust = LCD_X
         self.LCD_Y_Adjust = LCD_Y
+        self.LCD_Backlight_PWM = None
+        self.LCD_Sleep_Time = 0
 
     """    Hardware reset     """
     def  LCD_Reset(self):
@@ -348,15 +354,63 @@ class LCD:
         if (Image == None):
             return
         
-        self.LCD_SetWindows ( 0, 0, self.LCD_Dis_Column , self.LCD_Dis_Page  )
-        GPIO.output(LCD_Config.LCD_DC_PIN, GPIO.HIGH)
-        # Pixels = Image.load()
-        img = np.asarray(Image)
-        pix = np.zeros((Image.height,Image.width, 2), dtype = np.uint8)
-        pix[...,[0]] = np.add(np.bitwise_and(img[...,[0]],0xF8),np.right_shift(img[...,[1]],5))
-        pix[...,[1]] = np.add(np.bitwise_and(np.left_shift(img[...,[1]],3),0xE0), np.right_shift(img[...,[2]],3))
-        pix = pix.flatten().tolist()
-        
-        for i in range(0,len(pix),4096):
-            LCD_Config.SPI_Write_Byte(pix[i:i+4096])
+        # converted with PIL lookup tables: no numpy and no full frame of temporaries
+        self.LCD_ShowRaw(rgb565.FromImage(Image), 0, 0, self.LCD_Dis_Column, self.LCD_Dis_Page)
+
+
+    #/********************************************************************************
+    #function:    Sets the backlight brightness, using software PWM between off and full
+    #parameter: 
+    #        Level  :   Brightness in percent, 0 turns the backlight off
+    #********************************************************************************/
+    def LCD_SetBacklight(self, Level):
+        Level = max(0, min(100, Level))
+        if Level == 0 or Level == 100:
+            if self.LCD_Backlight_PWM is not None:
+                self.LCD_Backlight_PWM.stop()
+                self.LCD_Backlight_PWM = None
+            GPIO.output(LCD_Config.LCD_BL_PIN, GPIO.HIGH if Level else GPIO.LOW)
+        elif self.LCD_Backlight_PWM is None:
+            self.LCD_Backlight_PWM = GPIO.PWM(LCD_Config.LCD_BL_PIN, BACKLIGHT_PWM_FREQUENCY)
+            self.LCD_Backlight_PWM.start(Level)
+        else:
+            self.LCD_Backlight_PWM.ChangeDutyCycle(Level)
+
+    #/********************************************************************************
+    #function:    Turns the display off and puts the controller into sleep mode. 
+    #             The frame memory is kept.
+    #********************************************************************************/
+    def LCD_Sleep(self):
+        self.LCD_WriteReg(0x28)         #display off
+        self.LCD_WriteReg(0x10)         #sleep in
+        self.LCD_Sleep_Time = time.monotonic()
 
+    #/********************************************************************************
+    #function:    Wakes the controller up from sleep mode and turns the display on
+    #********************************************************************************/
+    def LCD_Wake(self):
+        wait = SLEEP_OUT_DELAY - (time.monotonic() - self.LCD_Sleep_Time)
+        if wait > 0: time.sleep(wait)
+        self.LCD_WriteReg(0x11)         #sleep out
+        LCD_Config.Driver_Delay_ms(5)
+        self.LCD_WriteReg(0x29)         #display on
+
+    #/********************************************************************************
+    #function:    Sends RGB565 pixels (high byte first) to a region of the display
+    #parameter: 
+    #        Data   :   The pixels of the region, row by row
+    #        Xstart :   Start point x coordinate
+    #        Ystart :   Start point y coordinate
+    #        Xend   :   End point x coordinate (exclusive), defaults to the display width
+    #        Yend   :   End point y coordinate (exclusive), defaults to the display height
+    #********************************************************************************/
+    def LCD_ShowRaw(self, Data, Xstart = 0, Ystart = 0, Xend = None, Yend = None):
+        if Xend is None: Xend = self.LCD_Dis_Column
+        if Yend is None: Yend = self.LCD_Dis_Page
+        if (Xend <= Xstart) or (Yend <= Ystart):
+            return
+        
+        self.LCD_SetWindows ( Xstart, Ystart, Xend, Yend )
+        GPIO.output(LCD_Config.LCD_DC_PIN, GPIO.HIGH)
+        for i in range(0,len(Data),4096):
+            LCD_Config.SPI_Write_Byte(list(Data[i:i+4096]))
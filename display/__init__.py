@@ -23,3 +23,9 @@
 """
 from .display import Display
 from .display import CONFIRM_CANCEL, CONFIRM_OK
+from .display import MODE_MENU, MODE_CONFIRM, MODE_OUTPUT, MODE_EXTERNAL
+from .headless import HeadlessLCD
+from .framebuffer import FrameBuffer
+from .external import FrameServer, FrameClient
+from .idle import IdleManager, IDLE_ACTIVE, IDLE_DIMMED, IDLE_ASLEEP
+from .assets import AssetCache, Asset
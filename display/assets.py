@@ -0,0 +1,227 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Cache of images converted to the RGB565 pixel format of the panel, e.g. menu icons and the boot splash.
+"""
+import os
+import mmap
+import struct
+import hashlib
+import logging
+from array import array
+from collections import OrderedDict
+from PIL import Image
+from . import rgb565
+
+ASSET_DIR = "./.assets"
+DEFAULT_CAPACITY = 256 * 1024
+MAGIC = b"R565"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")         # magic, width, height, number of opaque spans
+
+class Asset(object):
+    '''
+        The Asset class is an image converted to RGB565, memory-mapped from the asset cache. Transparency is 
+        stored as the opaque spans of each row, so blitting copies whole spans into the frame without looking 
+        at individual pixels. Partially transparent pixels are blended with the background color when the image 
+        is converted.
+    '''
+    def __init__(self, path: str):
+        '''
+            Constructor - Maps an asset file.
+            Parameters:
+                path:       str
+                            Path of the asset file in the cache.
+        '''
+        with open(path, "rb") as f: self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.__width, self.__height, count = HEADER.unpack_from(self.__map)
+        if magic != MAGIC: 
+            self.__map.close()
+            raise ValueError(f"{path} is not an asset file")
+        self.__spans = array("H", self.__map[HEADER.size:HEADER.size + count * 6])
+        self.__offset = HEADER.size + count * 6
+        self.__pixels = memoryview(self.__map)[self.__offset:self.__offset + self.__width * self.__height * 2]
+
+    #region Public properties
+    @property
+    def Dimensions(self) -> (int, int):
+        ''' Gets the width and height of the asset. '''
+        return (self.__width, self.__height)
+
+    @property
+    def Size(self) -> int:
+        ''' Gets the number of bytes mapped. '''
+        return len(self.__map)
+    #endregion
+
+    #region Public methods
+    def Blit(self, frame: bytearray, width: int, x: int, y: int):
+        '''
+            Copies the opaque pixels of the asset into an RGB565 frame.
+            Parameters:
+                frame:      bytearray
+                            The frame, two bytes per pixel, row by row.
+                width:      int
+                            Width of the frame.
+                x, y:       int
+                            Position of the top left corner of the asset in the frame. The asset is clipped to 
+                            the frame.
+        '''
+        height = len(frame) // (width * 2)
+        pixels = self.__pixels
+        spans = self.__spans
+        for idx in range(0, len(spans), 3):
+            row, start, length = spans[idx], spans[idx + 1], spans[idx + 2]
+            top = y + row
+            if top < 0 or top >= height: continue
+            first, last = max(start, -x), min(start + length, width - x)
+            if first >= last: continue
+            source = (row * self.__width + first) * 2
+            target = (top * width + x + first) * 2
+            frame[target:target + (last - first) * 2] = pixels[source:source + (last - first) * 2]
+
+    def Close(self):
+        ''' Unmaps the asset. '''
+        self.__pixels.release()
+        self.__map.close()
+    #endregion
+
+class AssetCache(object):
+    '''
+        The AssetCache class converts images to RGB565 once and keeps the result in a directory, keyed by a hash 
+        of the image content and the requested size, so an image is only converted again when it changes. 
+        Converted assets are memory-mapped; the least recently used ones are unmapped when the mapped size 
+        exceeds the capacity, so memory stays bounded however many images the menu uses.
+    '''
+    def __init__(self, directory: str = ASSET_DIR, capacity: int = DEFAULT_CAPACITY, background: tuple = (0, 0, 0)):
+        '''
+            Constructor - Creates a new instance of the AssetCache class.
+            Parameters:
+                directory:  str, optional
+                            The directory of the converted assets. Created if it does not exist.
+                capacity:   int, optional
+                            Maximum number of bytes mapped at a time.
+                background: tuple(int, int, int), optional
+                            Color partially transparent pixels are blended with.
+        '''
+        self.__directory = directory
+        self.__capacity = capacity
+        self.__background = tuple(background)
+        self.__sources = {}
+        self.__missing = set()
+        self.__assets = OrderedDict()
+        self.__mapped = 0
+
+    #region Public methods
+    def Close(self):
+        ''' Unmaps all assets. '''
+        for asset in self.__assets.values(): asset.Close()
+        self.__assets.clear()
+        self.__mapped = 0
+
+    def Load(self, path: str, size: tuple = None) -> Asset:
+        '''
+            Gets an image as an asset, converting it on first use. 
+            Parameters:
+                path:       str
+                            Path of the image, in any format PIL reads.
+                size:       tuple(int, int), optional
+                            Box the image is scaled down to fit into, keeping its aspect ratio. 
+            Returns:
+                The Asset, or None if the image cannot be read.
+        '''
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            if path not in self.__missing: logging.warning("Image %s not found: %s", path, e)
+            self.__missing.add(path)
+            return None
+        key = (path, size)
+        source = self.__sources.get(key)
+        if source is None or source[0] != (st.st_mtime_ns, st.st_size):
+            name = self.__convert(path, size)
+            if name is None: return None
+            source = ((st.st_mtime_ns, st.st_size), name)
+            self.__sources[key] = source
+        name = source[1]
+        asset = self.__assets.get(name)
+        if asset is not None:
+            self.__assets.move_to_end(name)
+            return asset
+        asset = Asset(os.path.join(self.__directory, name))
+        self.__assets[name] = asset
+        self.__mapped += asset.Size
+        while self.__mapped > self.__capacity and len(self.__assets) > 1:
+            _, evicted = self.__assets.popitem(last=False)
+            self.__mapped -= evicted.Size
+            evicted.Close()
+        return asset
+    #endregion
+
+    #region Private methods
+    def __convert(self, path: str, size: tuple) -> str:
+        '''
+            Converts an image into an asset file unless the cache already has it.
+            Returns:
+                The name of the asset file, or None if the image cannot be read.
+        '''
+        try:
+            with open(path, "rb") as f: content = f.read()
+        except OSError as e:
+            logging.warning("Image %s not read: %s", path, e)
+            return None
+        digest = hashlib.blake2b(content, digest_size=16)
+        digest.update(repr((VERSION, size, self.__background)).encode())
+        name = digest.hexdigest() + ".565"
+        target = os.path.join(self.__directory, name)
+        if os.path.exists(target): return name
+        try:
+            image = Image.open(path)
+            image.load()
+        except Exception as e:
+            logging.warning("Image %s not converted: %s", path, e)
+            return None
+        opaque = image.mode not in ("RGBA", "LA", "PA") and "transparency" not in image.info
+        image = image.convert("RGBA")
+        if size is not None: image.thumbnail(size)
+        width, height = image.size
+        alpha = image.getchannel("A").tobytes()
+        spans = array("H")
+        for row in range(height):
+            start = None
+            for column in range(width + 1):
+                visible = column < width and (opaque or alpha[row * width + column] > 0)
+                if visible and start is None: start = column
+                elif not visible and start is not None:
+                    spans.extend((row, start, column - start))
+                    start = None
+        background = Image.new("RGBA", image.size, self.__background + (255, ))
+        pixels = rgb565.FromImage(Image.alpha_composite(background, image).convert("RGB"))
+        os.makedirs(self.__directory, exist_ok=True)
+        temporary = f"{target}.{os.getpid()}"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, width, height, len(spans) // 3))
+            f.write(spans.tobytes())
+            f.write(pixels)
+        os.replace(temporary, target)
+        logging.info("Converted %s to %s", path, target)
+        return name
+    #endregion
@@ -21,10 +21,16 @@
 #
 # pylint: disable=C0103
 import time
+import logging
+import functools
 import threading
 from PIL import Image, ImageDraw, ImageFont
-from navigation import UP_CLICK, DOWN_CLICK, LEFT_CLICK, RIGHT_CLICK, SELECT_CLICK
-from . import LCD, LCD_Config
+from navigation import UP_CLICK, DOWN_CLICK, LEFT_CLICK, RIGHT_CLICK, SELECT_CLICK, PAGE_UP_CLICK, PAGE_DOWN_CLICK
+from diagnostics import ringlog
+from diagnostics.metrics import Counter, Histogram
+from .menuList import MenuList
+from .outputView import OutputView
+from . import rgb565
 
 MODE_MENU = 0
 MODE_CONFIRM = 1
@@ -38,8 +44,26 @@ MSG_RUN = "You are about to run"
 MSG_PROCEED = "Proceed?"
 MSG_RESULTS = "'%s'"
 MSG_CODE = "Return Code: %x"
-MSG_OUTPUT = "Output:"
+MSG_PAGE = "%d/%d"
+SPINNER_INTERVAL = 0.05
+SPINNER_STEP = 15
 
+FRAMES = Counter("pimenu_display_frames_total", "Frames and regions sent to the panel.")
+SPI_BYTES = Counter("pimenu_display_spi_bytes_total", "Pixel bytes sent to the panel.")
+RENDER_SECONDS = Histogram("pimenu_display_render_seconds", "Time to draw a frame before it is sent to the panel.")
+TRANSFER_SECONDS = Histogram("pimenu_display_transfer_seconds", "Time to send a frame or region to the panel.")
+
+def dispatched(method):
+    """
+        Decorator for Display methods changing the display state. With a Runtime attached to the display, the
+        method runs on the runtime's loop thread and the calling thread waits for it to complete.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        runtime = self.Runtime
+        if runtime is None: return method(self, *args, **kwargs)
+        return runtime.Invoke(method, self, *args, **kwargs)
+    return wrapper
 
 class Display(object):
     """
@@ -47,32 +71,50 @@ class Display(object):
     """
 
     #region  Constructors
-    def __init__(self):
+    def __init__(self, driver = None, shareCanvas: bool = False):
         """
             Creates a new instance of hte Display class
+            Parameters:
+                driver:     object
+                            Optional. The panel driver. Defaults to the ST7735 LCD driver. Pass a HeadlessLCD 
+                            to run without hardware.
+                shareCanvas: bool
+                            Optional. True to let built-in commands draw on the canvas of the display instead of 
+                            their own, saving a full frame image. 
         """
         self.__mode = MODE_MENU
-        self.__disp = LCD.LCD()                                             # setup LCD
-        self.__scanDirection = LCD.D2U_L2R
-        self.__disp.LCD_Init(self.__scanDirection)
-        self.__disp.LCD_Clear(0x0)
-        self.__width = self.__disp.LCD_Dis_Column
+        self.__scanDirection = None                                         # drivers passed in keep their own
+        if driver is None:
+            from . import LCD
+            driver = LCD.LCD()                                              # setup LCD
+            self.__scanDirection = LCD.D2U_L2R
+        self.__disp = driver
+        self.__width = self.__disp.LCD_Dis_Column                           # D2U_L2R keeps the default geometry
         self.__height = self.__disp.LCD_Dis_Page
+        self.__ready = threading.Event()
+        self.__runtime = None                                               # read by the panel initialization
+        self.__bootFrame = None                                             # splash drawn before the panel was ready
+        threading.Thread(target=self.__initPanel, name="lcdInit", daemon=True).start()
 
-        self.__scrollStartIndex = 0
-        self.__scrollDown = False
-        self.__scrollUp = False
-        self.__selectedIndex = -1
-        self.__maxIndex = -1
         self.__selectCallback = None
         self.__upCallback = None
         self.__confirmCallback = None
+        self.__externalCallback = None
+        self.__frameCallback = None
         self.__image = Image.new('RGB', (self.__width, self.__height))      # setup canvas
         self.__draw = ImageDraw.Draw(self.__image)                          # Get drawing object
+        self.__shareCanvas = shareCanvas
         
         self.__spinnerThread = None
         self.__stopSpinner = False
+        self.__spinnerTimer = None
+        self.__spinnerAngle = 0
         self.__stopCommand = False
+        self.__asleep = False
+        self.__stale = False                                                # last frame not sent to the panel
+        self.__backlight = None                                             # level set, None if never changed
+        self.__lastFrame = None
+        self.__assets = None
 
         self.__confirmCommand = None
         self.__confirmState = CONFIRM_CANCEL
@@ -86,26 +128,55 @@ class Display(object):
         self.__selectedColor = "#FFFFFF"
         self.__navigationColor = "#00FF00"
         self.__padding = 10
-        self.__items = []
-        self.DrawMenu()
+        self.__menu = MenuList(self.__width, self.__height, self.__font, self.__padding, self.__textColor, 
+            self.__selectedColor, self.__navigationColor)
+        self.__outputTop = self.__padding + self.__lineHeight(self.__font) + self.__lineHeight(self.__smallFont) + 4
+        self.__outputBottom = self.__height - self.__padding//2 - self.__lineHeight(self.__font) - 6
+        self.__output = OutputView(self.__width - 2*self.__padding, self.__outputBottom - self.__outputTop, self.__smallFont, 
+            self.__textColor)
+        self.__outputHeader = ("", 0)
     #endregion
 
     #region Property implementations
+    @property
+    def Assets(self):
+        """ Gets the AssetCache providing the icons. """
+        return self.__assets
+
+    @Assets.setter
+    def Assets(self, assets):
+        """ Sets the AssetCache providing the icons. Icons are only shown with an AssetCache. """
+        self.__assets = assets
+
+    @property
+    def Asleep(self) -> bool:
+        """ Gets whether the panel is asleep. Frames drawn while asleep are not sent to the panel. """
+        return self.__asleep
+
+    @property
+    def Icons(self) -> dict:
+        """ Gets the paths of the images shown next to menu items, by item. """
+        return self.__menu.Icons
+
+    @Icons.setter
+    def Icons(self, icons: dict):
+        """ Sets the paths of the images shown next to menu items, by item. Takes effect on the next draw. """
+        self.__menu.Icons = icons
+
     @property
     def Items(self):
         """ Gets the list of current menu items. """
-        return self.__items
+        return self.__menu.Items
 
     @Items.setter
     def Items(self, items):
         """ Sets the list of current menu items and intiates a redraw of the menu. """
-        self.__items = items
-        self.__scrollDown = False
-        self.__scrollUp = False
-        self.__scrollStartIndex = 0
-        self.__selectedIndex = 0
-        self.__maxIndex = len(items)
-        self.DrawMenu()      
+        self.ShowMenu(items)
+
+    @property
+    def Cursor(self) -> (int, int):
+        """ Gets the selected index and the index of the first visible item of the current menu. """
+        return (self.__menu.Selected, self.__menu.Top)
 
     @property
     def ConfirmCallback(self) -> callable:
@@ -128,11 +199,61 @@ class Display(object):
         """ Gets the dimensions of the display """
         return (self.__width, self.__height)
 
+    @property
+    def ExternalCallback(self) -> callable:
+        """ Gets the delegate receiving navigation events while a built-in command owns the display. """
+        return self.__externalCallback
+
+    @ExternalCallback.setter
+    def ExternalCallback(self, callback):
+        """
+            Sets the delegate receiving navigation events while a built-in command owns the display. SELECT_CLICK and 
+            LEFT_CLICK set the StopCommand flag before the delegate is invoked. The delegate should have the following signature
+            (eventType: int) -> None
+        """
+        self.__externalCallback = callback
+
+    @property
+    def Driver(self):
+        """ Gets the panel driver. """
+        return self.__disp
+
     @property
     def Font(self) -> ImageFont:
         """ Gets the active display font """
         return self.__font
 
+    @property
+    def FrameCallback(self) -> callable:
+        """ Gets the delegate invoked once the next frame has been sent to the panel. """
+        return self.__frameCallback
+
+    @FrameCallback.setter
+    def FrameCallback(self, callback):
+        """
+            Sets the delegate invoked once the next frame has been sent to the panel. The delegate is invoked a single 
+            time on the thread sending the frame and should have the following signature () -> None
+        """
+        self.__frameCallback = callback
+
+    @property
+    def Mode(self) -> int:
+        """ Gets the current display mode. One of MODE_MENU, MODE_CONFIRM, MODE_OUTPUT or MODE_EXTERNAL. """
+        return self.__mode
+
+    @property
+    def Runtime(self):
+        """ Gets the Runtime whose loop thread owns the display, or None. """
+        return self.__runtime
+
+    @Runtime.setter
+    def Runtime(self, runtime):
+        """ 
+            Sets the Runtime whose loop thread owns the display. Drawing and navigation methods called on other 
+            threads are then run on the loop thread, and the spinner is animated by a loop timer.
+        """
+        self.__runtime = runtime
+
     @property
     def SelectCallback(self) -> callable:
         """ Gets the delegate invoked when the user selects a menu item. """
@@ -146,6 +267,11 @@ class Display(object):
         """
         self.__selectCallback = callback
 
+    @property
+    def SharedCanvas(self) -> tuple:
+        """ Gets the (Image, ImageDraw) canvas built-in commands draw on, or None if they use their own. """
+        return (self.__image, self.__draw) if self.__shareCanvas else None
+
     @property
     def SmallFont(self) -> ImageFont:
         """ Gets the active small display font """
@@ -182,6 +308,7 @@ class Display(object):
     #endregion
 
     #region Public method implementations
+    @dispatched
     def DrawConfirmation(self, command=None, state = CONFIRM_CANCEL):
         """
             Draws the confirmation dialog on the display. 
@@ -193,6 +320,7 @@ class Display(object):
                             Pass COMFIRM_CANCEL to put the focus on the Cancel button, CONFIRM_OK to put the 
                             focus on the Ok button.  
         """
+        started = time.perf_counter()
         self.__mode = MODE_CONFIRM
         self.__draw.rectangle((0, 0, self.__width, self.__height), outline=0, fill=0)
         if command != None: self.__confirmCommand = command
@@ -218,19 +346,72 @@ class Display(object):
         self.__draw.rectangle(c2, fill=self.__selectedColor if state==CONFIRM_CANCEL else self.__textColor)
         self.__draw.text(c3, MSG_OK, font=self.__font, fill="#000000")
         self.__draw.text(c4, MSG_CANCEL, font=self.__font, fill="#000000")
-        self.__disp.LCD_ShowImage(self.__image)
+        self.__show(self.__image, started)
 
-    def DrawImage(self, image:Image):
+    @dispatched
+    def DrawAsset(self, asset):
+        """
+            Draws an asset centered on a black screen, e.g. a splash screen. The asset is blitted into the frame 
+            without any conversion. Drawn while the panel initializes, the asset is shown as soon as the panel is up.
+            Parameters:
+                asset:      Asset
+                            The asset, see AssetCache.
+        """
+        started = time.perf_counter()
+        frame = bytearray(self.__width * self.__height * 2)
+        width, height = asset.Dimensions
+        asset.Blit(frame, self.__width, (self.__width - width) // 2, (self.__height - height) // 2)
+        if not self.__ready.is_set(): self.__bootFrame = frame          # shown by the panel initialization
+        self.__showRaw(frame, started)
+
+    @dispatched
+    def DrawImage(self, image:Image, boxes:list=None):
         """
             Draws an image onto the display. Used mostly for built-in commands 
             Parameters:
                 image:  Image
                         Reference to an Image object containing the image to be drawn. 
+                boxes:  list(tuple(int, int, int, int))
+                        Optional. The regions (left, top, right, bottom) of the image that changed since it was last 
+                        drawn. Only these are sent to the panel if the image is still shown. 
         """
+        started = time.perf_counter()
+        if boxes is not None and self.__mode == MODE_EXTERNAL and self.__lastFrame is image and not self.__stale and \
+            not self.__asleep and self.__ready.is_set():
+            for box in boxes:
+                transferStarted = time.perf_counter()
+                self.__disp.LCD_ShowRaw(rgb565.FromImage(image.crop(box)), *box)
+                self.__sent(transferStarted, (box[2] - box[0]) * (box[3] - box[1]) * 2)
+            return
         self.__mode = MODE_EXTERNAL
-        self.__draw.rectangle((0, 0, self.__width, self.__height), outline=0, fill=0)
-        self.__disp.LCD_ShowImage(image)
+        if image is not self.__image: self.__draw.rectangle((0, 0, self.__width, self.__height), outline=0, fill=0)
+        self.__show(image, started)
 
+    @dispatched
+    def DrawFrameBuffer(self, frameBuffer, box:tuple=None):
+        """
+            Sends the pixels of a shared framebuffer to the display without converting them, e.g. the frames 
+            drawn by built-in commands running in the command worker process. 
+            Parameters:
+                frameBuffer:    FrameBuffer
+                                The framebuffer. It must have the dimensions of the display.
+                box:            tuple(int, int, int, int)
+                                Optional. The region (left, top, right, bottom) to update. The whole frame if None.
+        """
+        self.__mode = MODE_EXTERNAL
+        self.__lastFrame = frameBuffer
+        if self.__asleep:
+            self.__stale = True
+            return
+        if box is None: box = (0, 0, self.__width, self.__height)
+        if not self.__panelReady():
+            self.__stale = True
+            return
+        started = time.perf_counter()
+        self.__disp.LCD_ShowRaw(frameBuffer.Read(box), *box)
+        self.__sent(started, (box[2] - box[0]) * (box[3] - box[1]) * 2)
+
+    @dispatched
     def DrawMenu(self, items:list=None):
         """
             Draws a menu based on the items contained in Display.Items. Setting Display.Items will implicitely 
@@ -242,33 +423,29 @@ class Display(object):
                             contained in Display.Items will be used. If specified, the supplied list will be stored in 
                             Display.Items. 
         """
+        started = time.perf_counter()
         self.__mode = MODE_MENU
         self.__draw.rectangle((0, 0, self.__width, self.__height), outline=0, fill=0)
-
-        x = self.__padding
-        y = self.__padding
-        if items != None: self.__items = items
-        self.__scrollDown = False
-        self.__scrollUp = self.__scrollStartIndex > 0
-        idx = self.__scrollStartIndex
-        while idx < len(self.__items):
-            item = self.__items[idx]
-            __y = self.__font.getsize(item)[1]
-            if y + __y > self.__height: 
-                self.__scrollDown = True
-                break
-
-            self.__draw.text((x, y), item, font=self.__font, 
-                fill= self.__selectedColor if idx == self.__selectedIndex else self.__textColor)
-            idx += 1
-            y += __y + self.__padding
-        self.__maxIndex = idx
-        self.__drawScrollArrows()
-        self.__disp.LCD_ShowImage(self.__image)
-
+        if items != None: self.__menu.Show(items, self.__menu.Selected, self.__menu.Top)
+        placements = self.__menu.Draw(self.__draw)
+        if not placements or self.__assets is None: 
+            self.__show(self.__image, started)
+            return
+        # icons are blitted into the converted frame, they are never decoded or converted per frame
+        frame = bytearray(rgb565.FromImage(self.__image))
+        size = self.__menu.IconSize
+        for path, x, y in placements:
+            asset = self.__assets.Load(path, (size, size))
+            if asset is None: continue
+            width, height = asset.Dimensions
+            asset.Blit(frame, self.__width, x + (size - width) // 2, y + (size - height) // 2)
+        self.__showRaw(frame, started)
+
+    @dispatched
     def DrawOutput(self, command:str, code:int, message:str=""):
         """
-            Draws the output of a command (or any string, really).
+            Draws the output of a command (or any string, really). The output is wrapped to the display width, 
+            ANSI colours are applied and long output is shown a page at a time; UP and DOWN page through it.
             Parameters:
                 command:    str
                             Contains the name (command line) of the command whose output is shown
@@ -277,25 +454,29 @@ class Display(object):
                 message:    str
                             Optional. Output to display.  
         """
+        started = time.perf_counter()
         self.__mode = MODE_OUTPUT
-        self.__draw.rectangle((0, 0, self.__width, self.__height), outline=0, fill=0)
-        x = self.__padding
-        y = self.__padding
-        self.__draw.text((x, y), MSG_RESULTS %command, font=self.__font, fill=self.__textColor)
-        y += self.__font.getsize(MSG_RESULTS)[1] + self.__padding
-        self.__draw.text((x, y), MSG_CODE %code, font=self.__font, fill=self.__textColor)                
-        y += self.__font.getsize(MSG_CODE)[1] + self.__padding 
-        if message != "":
-            self.__draw.text((x, y), MSG_OUTPUT, font=self.__font, fill=self.__textColor)
-            y += self.__font.getsize(MSG_OUTPUT)[1] + self.__padding
-            self.__draw.multiline_text((x + self.__padding,y), message, fill=self.__textColor)
-
-        c1 = [(self.__width/2 + 10, self.__height-40), (self.__width - 10, self.__height-15)]
-        c2 = (3*self.__width/4 - self.__draw.textsize(MSG_OK, font=self.__font)[0]/2, self.__height-35)
-        self.__draw.rectangle(c1, fill=self.__textColor)
-        self.__draw.text(c2, MSG_OK, font=self.__font, fill="#000000")        
-        self.__disp.LCD_ShowImage(self.__image)
+        self.__outputHeader = (command, code)
+        self.__output.Show(message or "")
+        self.__drawOutput(started)
 
+    @dispatched
+    def ShowMenu(self, items:list, selectedIndex:int=0, scrollStartIndex:int=0):
+        """
+            Shows a menu with the given selection and scroll position, e.g. to restore the cursor position when 
+            returning to a menu.
+            Parameters:
+                items:              list(str)
+                                    The menu items. The list is stored by reference and must not be modified afterwards. 
+                selectedIndex:      int
+                                    Optional. The index of the selected item.
+                scrollStartIndex:   int
+                                    Optional. The index of the first visible item. 
+        """
+        self.__menu.Show(items, selectedIndex, scrollStartIndex)
+        self.DrawMenu()
+
+    @dispatched
     def Spinner(self, run=True):
         """
             Loads the spinner screen while a command executes. This will start a background thread when invoked with run=True and 
@@ -304,6 +485,16 @@ class Display(object):
                 run:    bool
                         Optional. Pass True to start the spinner, false to derminate the spinner.
         """
+        if self.__runtime is not None:
+            if run==True and self.__spinnerTimer is None:
+                self.__spinnerAngle = 0
+                self.__spinnerTimer = self.__runtime.Every(SPINNER_INTERVAL, self.__stepSpinner)
+            elif run!=True and self.__spinnerTimer is not None:
+                self.__spinnerTimer.Cancel()
+                self.__spinnerTimer = None
+                self.__draw.pieslice(self.__spinnerBox(), -90, 270, outline=self.__textColor, fill=self.__textColor)
+                self.__show(self.__image)
+            return
         if run==True:
             self.__stopSpinner = False
             self.__spinnerThread = threading.Thread(target=self.__drawSpinner, name="spinner", args=(lambda : self.__stopSpinner, ))
@@ -313,7 +504,8 @@ class Display(object):
             self.__stopSpinner = True
             self.__spinnerThread.join()
 
-    def ProcessNavigationEvent(self, eventType):
+    @dispatched
+    def ProcessNavigationEvent(self, eventType, count=1):
         """
             Delegate called by the Navigation model when a navigation event occurs on the GPIO. Handles 
             corresponding invokation of the various display draw and/or command execution delegates. 
@@ -325,23 +517,24 @@ class Display(object):
                                 LEFT_CLICK
                                 RIGHT_CLICK
                                 SELECT_CLICK
+                                PAGE_UP_CLICK
+                                PAGE_DOWN_CLICK
+                            In a menu, RIGHT_CLICK pages down like PAGE_DOWN_CLICK. In the output screen, UP_CLICK and
+                            DOWN_CLICK page through the output.
+                count:      int
+                            Optional. Number of coalesced presses. The selection moves by count items (or pages) and 
+                            the menu is redrawn once. 
         """
-        if eventType is DOWN_CLICK and self.__mode == MODE_MENU:
-            if self.__selectedIndex == self.__maxIndex-1 and self.__scrollDown is False: return
-            if self.__selectedIndex == self.__maxIndex-1: self.__scrollStartIndex +=1
-            self.__selectedIndex += 1
-            self.DrawMenu()
+        if self.__mode == MODE_MENU and eventType in (UP_CLICK, DOWN_CLICK, RIGHT_CLICK, PAGE_UP_CLICK, PAGE_DOWN_CLICK):
+            if eventType is UP_CLICK: moved = self.__menu.Move(-count)
+            elif eventType is DOWN_CLICK: moved = self.__menu.Move(count)
+            elif eventType is PAGE_UP_CLICK: moved = self.__menu.Page(-count)
+            else: moved = self.__menu.Page(count)
+            if moved: self.DrawMenu()
             return
 
-        if eventType is UP_CLICK and self.__mode == MODE_MENU:
-            if self.__selectedIndex == 0 and self.__scrollUp is False: return
-            if self.__selectedIndex == -1: 
-                self.__selectedIndex = 0
-                self.__scrollStartIndex = 0
-            else:
-                if self.__selectedIndex == self.__scrollStartIndex: self.__scrollStartIndex -= 1
-                self.__selectedIndex -= 1
-            self.DrawMenu()
+        if self.__mode == MODE_OUTPUT and eventType in (UP_CLICK, DOWN_CLICK, RIGHT_CLICK, PAGE_UP_CLICK, PAGE_DOWN_CLICK):
+            if self.__output.Move(-count if eventType in (UP_CLICK, PAGE_UP_CLICK) else count): self.__drawOutput()
             return
 
         if eventType is LEFT_CLICK and self.__mode == MODE_MENU and self.__upCallback: 
@@ -355,10 +548,11 @@ class Display(object):
             return
 
         if eventType is SELECT_CLICK and self.__mode == MODE_MENU:
-            if self.__selectedIndex == 0 and self.__items[0] == ".." and self.__upCallback:
+            selectedIndex, items = self.__menu.Selected, self.__menu.Items
+            if selectedIndex == 0 and items[0] == ".." and self.__upCallback:
                 self.__upCallback()
-            elif self.__selectCallback and self.__selectedIndex > -1: 
-                self.__selectCallback(self.__selectedIndex, self.__items[self.__selectedIndex])
+            elif self.__selectCallback and selectedIndex > -1: 
+                self.__selectCallback(selectedIndex, items[selectedIndex])
             return
         if eventType is SELECT_CLICK and self.__mode == MODE_CONFIRM and self.__confirmCallback:
             self.__confirmCallback(self.__confirmCommand, self.__confirmState)
@@ -366,35 +560,216 @@ class Display(object):
         if eventType is SELECT_CLICK and self.__mode == MODE_OUTPUT:
             self.DrawMenu()
             return
-        if self.__mode == MODE_EXTERNAL and (eventType is SELECT_CLICK or eventType is LEFT_CLICK):
-            self.__stopCommand = True
+        if self.__mode == MODE_EXTERNAL:
+            if eventType is SELECT_CLICK or eventType is LEFT_CLICK: self.__stopCommand = True
+            if self.__externalCallback: self.__externalCallback(eventType)
             return
 
+    @dispatched
     def ResetMenu(self):
         """
             Resets the current menu to an unselected state.
         """
-        self.__selectedIndex = -1
+        self.__menu.Show(self.__menu.Items, -1, self.__menu.Top)
         self.DrawMenu()
+
+    @dispatched
+    def SetBacklight(self, level:int):
+        """
+            Sets the backlight brightness.
+            Parameters:
+                level:      int
+                            Brightness in percent. 0 turns the backlight off.
+        """
+        self.__backlight = level
+        if self.__panelReady(): self.__disp.LCD_SetBacklight(level)
+
+    @dispatched
+    def Sleep(self):
+        """
+            Turns the backlight off and puts the panel to sleep. Frames drawn while asleep are not sent to the panel;
+            the last one is sent by Wake.
+        """
+        if self.__asleep: return
+        self.__asleep = True
+        if not self.__panelReady(): return                                  # sent by __flush
+        self.__disp.LCD_SetBacklight(0)
+        self.__disp.LCD_Sleep()
+
+    @dispatched
+    def Wake(self):
+        """
+            Wakes the panel up, redraws the last frame if it changed while the panel was asleep and turns the 
+            backlight on. The panel keeps its frame memory while asleep, so there is nothing to redraw otherwise.
+        """
+        if not self.__asleep: return
+        self.__asleep = False
+        self.__backlight = 100
+        if not self.__panelReady(): return                                  # sent by __flush
+        self.__disp.LCD_Wake()
+        self.__resend()
+        self.__disp.LCD_SetBacklight(100)
     #endregion
 
     #region Private method implementations
-    def __drawScrollArrows(self):
-        """
-            Handles drawing of the Scroll Arrows for the menu as needed
-        """
-        if self.__scrollDown: 
-            self.__draw.polygon([
-                (self.__width-5, self.__height-10),
-                (self.__width-15, self.__height-10),
-                (self.__width-10, self.__height-5)
-            ], fill=self.__navigationColor, outline=self.__navigationColor)
-        if self.__scrollUp:
-            self.__draw.polygon([
-                (self.__width-5, 10),
-                (self.__width-15, 10),
-                (self.__width-10, 5)
-            ], fill=self.__navigationColor, outline=self.__navigationColor)
+    def __drawOutput(self, started:float=None):
+        """
+            Draws the output screen with the visible page of the output.
+            Parameters:
+                started:    float
+                            Optional. perf_counter value when drawing was started.
+        """
+        if started is None: started = time.perf_counter()
+        command, code = self.__outputHeader
+        self.__draw.rectangle((0, 0, self.__width, self.__height), outline=0, fill=0)
+        x = self.__padding
+        y = self.__padding
+        self.__draw.text((x, y), MSG_RESULTS %command, font=self.__font, fill=self.__textColor)
+        y += self.__lineHeight(self.__font)
+        self.__draw.text((x, y), MSG_CODE %code, font=self.__smallFont, fill=self.__textColor)
+        self.__output.Draw(self.__draw, x, self.__outputTop)
+
+        y = self.__outputBottom + 4
+        w = self.__draw.textsize(MSG_OK, font=self.__font)[0] + 2*self.__padding
+        self.__draw.rectangle([(self.__width - self.__padding - w, y), (self.__width - self.__padding, self.__height - self.__padding//2)], 
+            fill=self.__textColor)
+        self.__draw.text((self.__width - self.__padding - w + self.__padding, y + 1), MSG_OK, font=self.__font, fill="#000000")
+        if self.__output.Pages > 1:
+            self.__draw.text((x, y + 1), MSG_PAGE %(self.__output.Page + 1, self.__output.Pages), font=self.__font, 
+                fill=self.__textColor)
+        self.__show(self.__image, started)
+
+    def __initPanel(self):
+        """
+            Thread entry point for the panel initialization. The LCD reset and sleep-out delays run while fonts are 
+            loaded and commands are set up on the main thread. Once the panel is up, the splash drawn in the meantime or
+            a minimal boot frame is shown, until the loop thread sends the current frame.
+        """
+        try:
+            self.__disp.LCD_Init(self.__scanDirection)
+            frame = self.__bootFrame
+            if frame is not None:
+                self.__disp.LCD_ShowRaw(frame, 0, 0, self.__width, self.__height)
+            else:
+                self.__disp.LCD_Clear(0x0)
+                self.__disp.LCD_SetArealColor(self.__width//4, self.__height//2 - 1, self.__width*3//4, 
+                    self.__height//2 + 1, 0x07E0)
+        except Exception:
+            logging.error("Panel initialization failed.", exc_info=True)
+        finally:
+            self.__ready.set()
+            runtime = self.Runtime
+            if runtime is not None: runtime.Call(self.__flush)
+
+    def __flush(self):
+        """
+            Applies the frame and panel state set while the panel was initializing. Called on the loop thread once
+            the initialization has completed.
+        """
+        if self.__asleep:
+            self.__disp.LCD_SetBacklight(0)
+            self.__disp.LCD_Sleep()
+            return
+        self.__resend()
+        if self.__backlight is not None: self.__disp.LCD_SetBacklight(self.__backlight)
+
+    def __panelReady(self) -> bool:
+        """
+            Determines whether the panel initialization has completed. With a Runtime attached, the loop thread never 
+            waits for it: callers keep their state and __flush applies it. Without one, the calling thread waits.
+        """
+        if self.__ready.is_set(): return True
+        if self.Runtime is not None: return False
+        self.__ready.wait()
+        return True
+
+    def __resend(self):
+        """
+            Sends the last frame if it was not sent to the panel when it was drawn.
+        """
+        if not self.__stale: return
+        self.__stale = False
+        frame = self.__lastFrame
+        if isinstance(frame, Image.Image): self.__show(frame)
+        elif isinstance(frame, bytearray): self.__showRaw(frame)
+        elif frame is not None: self.DrawFrameBuffer(frame)
+
+    @staticmethod
+    def __lineHeight(font: ImageFont) -> int:
+        """
+            Gets the height of a line of text in a font.
+        """
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+
+    def __show(self, image:Image, started:float=None):
+        """
+            Sends an image to the panel, waiting for the panel initialization to complete on first use.
+            Parameters:
+                image:      Image
+                            The image to show.
+                started:    float
+                            Optional. The time.perf_counter() value when drawing the frame started.
+        """
+        self.__lastFrame = image
+        if self.__asleep or not self.__panelReady():
+            self.__stale = True
+            return
+        transferStarted = time.perf_counter()
+        if started is not None: RENDER_SECONDS.Observe(transferStarted - started)
+        self.__disp.LCD_ShowImage(image)
+        self.__sent(transferStarted, self.__width * self.__height * 2)
+
+    def __showRaw(self, frame:bytearray, started:float=None):
+        """
+            Sends a frame of RGB565 pixels to the panel, waiting for the panel initialization to complete on first use.
+            Parameters:
+                frame:      bytearray
+                            The pixels of the whole display.
+                started:    float
+                            Optional. The time.perf_counter() value when drawing the frame started.
+        """
+        self.__lastFrame = frame
+        if self.__asleep or not self.__panelReady():
+            self.__stale = True
+            return
+        transferStarted = time.perf_counter()
+        if started is not None: RENDER_SECONDS.Observe(transferStarted - started)
+        self.__disp.LCD_ShowRaw(frame, 0, 0, self.__width, self.__height)
+        self.__sent(transferStarted, len(frame))
+
+    def __sent(self, started:float, size:int):
+        """
+            Records a transfer to the panel in the metrics and the ring log and invokes the frame callback.
+            Parameters:
+                started:    float
+                            The time.perf_counter() value when the transfer started.
+                size:       int
+                            The number of bytes sent.
+        """
+        elapsed = time.perf_counter() - started
+        TRANSFER_SECONDS.Observe(elapsed)
+        FRAMES.Inc()
+        SPI_BYTES.Inc(size)
+        ringlog.Event(ringlog.EVENT_FRAME, size, int(elapsed * 10000))
+        callback, self.__frameCallback = self.__frameCallback, None
+        if callback is not None: callback()
+
+    def __spinnerBox(self) -> list:
+        """
+            Gets the bounding box of the spinner.
+        """
+        return [(self.__width - self.__height)/2+25, 25, (self.__width + self.__height)/2-25, self.__height-25]
+
+    def __stepSpinner(self):
+        """
+            Timer callback advancing the spinner started by Display.Spinner() on the runtime's loop.
+        """
+        if self.__spinnerAngle == 0: self.__draw.rectangle((0, 0, self.__width, self.__height), outline=0, fill=0)
+        self.__spinnerAngle += SPINNER_STEP
+        self.__draw.pieslice(self.__spinnerBox(), -90, -90+self.__spinnerAngle, outline=self.__textColor, fill=self.__textColor)
+        self.__show(self.__image)
+        if self.__spinnerAngle >= 360: self.__spinnerAngle = 0
 
     def __drawSpinner(self, stop: callable):
         """
@@ -406,7 +781,7 @@ class Display(object):
                         will terminate. If the delegate returns False, the spinner will continue. The delegate is 
                         evaluated roughly every 2-3ms
         """
-        box = [(self.__width - self.__height)/2+25, 25, (self.__width + self.__height)/2-25, self.__height-25]
+        box = self.__spinnerBox()
         while True:
             if stop() : break
             deg = 1
@@ -414,9 +789,9 @@ class Display(object):
             while deg<=360: 
                 if stop(): break
                 self.__draw.pieslice(box, -90, -90+deg, outline=self.__textColor, fill=self.__textColor)
-                self.__disp.LCD_ShowImage(self.__image)
+                self.__show(self.__image)
                 deg += 1
                 time.sleep(0.001)
         self.__draw.pieslice(box, -90, 270, outline=self.__textColor, fill=self.__textColor)
-        self.__disp.LCD_ShowImage(self.__image)
+        self.__show(self.__image)
     #endregion
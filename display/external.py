@@ -0,0 +1,357 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Shared framebuffer and control socket letting local processes draw on the display.
+"""
+import os
+import socket
+import select
+import asyncio
+import logging
+from navigation.events import EVENT_NAMES, LEFT_CLICK
+from .display import MODE_MENU, MODE_OUTPUT
+from .framebuffer import FrameBuffer
+from runtime import RUNTIME_DIR, PrivateDirectory
+
+FRAMEBUFFER_PATH = os.path.join(RUNTIME_DIR, "display.fb")
+SOCKET_PATH = os.path.join(RUNTIME_DIR, "display")
+EVENT_TYPES = {v: k for k, v in EVENT_NAMES.items()}
+
+class FrameServer(object):
+    '''
+        The FrameServer class exposes the display to local processes. Clients draw RGB565 pixels directly into a 
+        memory mapped framebuffer and send short text commands over a Unix stream socket, one per line:
+
+            info                        replies 'ok <width> <height> rgb565 <path>'
+            acquire                     takes over the display, replies 'ok <width> <height> rgb565 <path>'
+            present [l t r b]           sends the region (right and bottom exclusive) or the whole frame to the panel
+            sync                        replies 'ok' once all previous presents reached the panel
+            release                     returns the display to the menu, replies 'ok'
+
+        Presents are not acknowledged; regions presented before the loop gets to them are merged into one dirty 
+        region, so a fast client never queues frames. While a client owns the display, navigation events are sent 
+        to it as 'event <name>' lines. LEFT returns to the menu and sends 'released'. The display is only handed 
+        out while the menu or command output is shown.
+    '''
+    def __init__(self, display, runtime, socketPath: str = SOCKET_PATH, path: str = FRAMEBUFFER_PATH):
+        '''
+            Constructor - Creates the framebuffer. Call Start on the loop to accept clients.
+            Parameters:
+                display:    Display
+                            The display.
+                runtime:    Runtime
+                            The runtime owning the display.
+                socketPath: str, optional
+                            Path of the control socket. Only the user running the menu can connect to it.
+                path:       str, optional
+                            Path of the framebuffer. Only the user running the menu can open it.
+        '''
+        if RUNTIME_DIR in (os.path.dirname(socketPath), os.path.dirname(path)): PrivateDirectory()
+        width, height = display.Dimensions
+        self.__disp = display
+        self.__runtime = runtime
+        self.__socketPath = socketPath
+        self.__frameBuffer = FrameBuffer(width, height, path, create=True)
+        self.__server = None
+        self.__owner = None
+        self.__dirty = None
+        self.__clients = set()
+
+    #region Public properties
+    @property
+    def Path(self) -> str:
+        ''' Gets the path of the framebuffer. '''
+        return self.__frameBuffer.Path
+
+    @property
+    def SocketPath(self) -> str:
+        ''' Gets the path of the control socket. '''
+        return self.__socketPath
+    #endregion
+
+    #region Public methods
+    async def Start(self):
+        '''
+            Starts accepting clients on the control socket. Must run on the loop.
+        '''
+        if os.path.exists(self.__socketPath): os.unlink(self.__socketPath)
+        self.__server = await asyncio.start_unix_server(self.__serve, path=self.__socketPath)
+        os.chmod(self.__socketPath, 0o600)
+        logging.info(f"External display on {self.__socketPath}, framebuffer {self.__frameBuffer.Path}")
+
+    def Stop(self):
+        '''
+            Closes the control socket and the client connections and removes the framebuffer. Must run on the loop.
+        '''
+        if self.__server is not None: 
+            self.__server.close()
+            self.__server = None
+            if os.path.exists(self.__socketPath): os.unlink(self.__socketPath)
+        for writer in list(self.__clients): writer.close()
+        self.__owner = None
+        self.__frameBuffer.Close()
+    #endregion
+
+    #region Private method implementations
+    async def __serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''
+            Handles the commands of a client connection.
+        '''
+        self.__clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                words = line.decode("ascii", "replace").split()
+                if not words: continue
+                reply = self.__execute(writer, words[0].lower(), words[1:])
+                if reply is None: continue
+                writer.write(reply.encode("ascii") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.CancelledError, ValueError):
+            pass
+        finally:
+            self.__clients.discard(writer)
+            if self.__owner is writer: self.__release()
+            writer.close()
+
+    def __execute(self, writer: asyncio.StreamWriter, command: str, args: list) -> str:
+        '''
+            Executes a client command. 
+            Returns:
+                The reply line, or None if the command is not answered.
+        '''
+        width, height = self.__frameBuffer.Dimensions
+        if command == "info":
+            return f"ok {width} {height} rgb565 {self.__frameBuffer.Path}"
+        if command == "acquire":
+            if self.__owner is not None and self.__owner is not writer: return "error busy"
+            if self.__owner is None and self.__disp.Mode not in (MODE_MENU, MODE_OUTPUT): return "error busy"
+            self.__owner = writer
+            self.__disp.StopCommand = False
+            self.__disp.ExternalCallback = self.__navigate
+            self.__invalidate((0, 0, width, height))
+            return f"ok {width} {height} rgb565 {self.__frameBuffer.Path}"
+        if self.__owner is not writer: 
+            return "error not acquired"
+        if command == "present":
+            box = self.__parseBox(args, width, height)
+            if box is None: return "error invalid region"
+            if box[0] < box[2] and box[1] < box[3]: self.__invalidate(box)
+            return None
+        if command == "sync":
+            self.__flush()
+            return "ok"
+        if command == "release":
+            self.__release()
+            return "ok"
+        return f"error unknown command '{command}'"
+
+    def __flush(self):
+        '''
+            Sends the dirty region of the framebuffer to the panel.
+        '''
+        box, self.__dirty = self.__dirty, None
+        if box is None or self.__owner is None: return
+        self.__disp.DrawFrameBuffer(self.__frameBuffer, box)
+
+    def __invalidate(self, box: tuple):
+        '''
+            Adds a region to the dirty region, scheduling a flush if none is pending.
+        '''
+        if self.__dirty is None:
+            self.__dirty = box
+            self.__runtime.Call(self.__flush)
+        else:
+            self.__dirty = (min(self.__dirty[0], box[0]), min(self.__dirty[1], box[1]), 
+                max(self.__dirty[2], box[2]), max(self.__dirty[3], box[3]))
+
+    def __navigate(self, eventType: int):
+        '''
+            Forwards a navigation event to the client owning the display.
+        '''
+        owner = self.__owner
+        if owner is None: return
+        if eventType == LEFT_CLICK:
+            self.__release()
+            owner.write(b"released\n")
+        elif eventType in EVENT_TYPES:
+            owner.write(f"event {EVENT_TYPES[eventType]}\n".encode("ascii"))
+
+    def __release(self):
+        '''
+            Returns the display to the menu.
+        '''
+        self.__owner = None
+        self.__dirty = None
+        self.__disp.ExternalCallback = None
+        self.__disp.StopCommand = False
+        self.__disp.DrawMenu()
+
+    @staticmethod
+    def __parseBox(args: list, width: int, height: int) -> tuple:
+        '''
+            Parses and clips the region of a present command. 
+            Returns:
+                The region (left, top, right, bottom), or None if the arguments are invalid.
+        '''
+        if not args: return (0, 0, width, height)
+        if len(args) != 4: return None
+        try:
+            left, top, right, bottom = (int(arg) for arg in args)
+        except ValueError:
+            return None
+        return (max(0, left), max(0, top), min(width, right), min(height, bottom))
+    #endregion
+
+class FrameClient(object):
+    '''
+        The FrameClient class is used by local scripts to draw on the display through a FrameServer, e.g.
+
+            client = FrameClient()
+            client.Acquire()
+            client.Draw(image)
+            for event in client.Events(timeout=1): ...
+            client.Close()
+    '''
+    def __init__(self, socketPath: str = SOCKET_PATH):
+        '''
+            Constructor - Connects to the control socket.
+            Parameters:
+                socketPath: str, optional
+                            Path of the control socket.
+        '''
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.connect(socketPath)
+        self.__file = self.__socket.makefile("rwb", buffering=0)
+        self.__pending = b""
+        self.__replies = []
+        self.__events = []
+        self.__frameBuffer = None
+        self.__released = False
+
+    #region Public properties
+    @property
+    def FrameBuffer(self) -> FrameBuffer:
+        ''' Gets the framebuffer after Acquire, or None. '''
+        return self.__frameBuffer
+
+    @property
+    def Released(self) -> bool:
+        ''' Gets whether the user returned to the menu. '''
+        return self.__released
+    #endregion
+
+    #region Public methods
+    def Acquire(self) -> FrameBuffer:
+        '''
+            Takes over the display. 
+            Returns:
+                The framebuffer to draw into.
+        '''
+        words = self.__request("acquire").split()
+        if self.__frameBuffer is None: self.__frameBuffer = FrameBuffer(int(words[1]), int(words[2]), words[4])
+        self.__released = False
+        return self.__frameBuffer
+
+    def Close(self):
+        '''
+            Returns the display to the menu and closes the connection.
+        '''
+        if self.__frameBuffer is not None: self.__frameBuffer.Close()
+        self.__frameBuffer = None
+        self.__file.close()
+        self.__socket.close()
+
+    def Draw(self, image, position: tuple = (0, 0)):
+        '''
+            Writes an image into the framebuffer and presents the changed region.
+            Parameters:
+                image:      Image
+                            The image to draw.
+                position:   tuple(int, int), optional
+                            The top left corner of the image on the display.
+        '''
+        self.Present(self.__frameBuffer.Write(image, position))
+
+    def Events(self, timeout: float = 0) -> list:
+        '''
+            Gets the navigation events received since the last call.
+            Parameters:
+                timeout:    float, optional
+                            Seconds to wait for an event if none was received yet.
+            Returns:
+                The list of event names, e.g. ['down', 'select'].
+        '''
+        if not self.__events and select.select([self.__socket], [], [], timeout)[0]: self.__read()
+        events, self.__events = self.__events, []
+        return events
+
+    def Present(self, box: tuple = None):
+        '''
+            Sends a region of the framebuffer to the panel. Does not wait for the transfer.
+            Parameters:
+                box:        tuple(int, int, int, int), optional
+                            The region (left, top, right, bottom). The whole frame if None.
+        '''
+        self.__file.write(b"present\n" if box is None else ("present %d %d %d %d\n" % tuple(box)).encode("ascii"))
+
+    def Release(self):
+        '''
+            Returns the display to the menu.
+        '''
+        self.__request("release")
+
+    def Sync(self):
+        '''
+            Waits until all presented regions reached the panel.
+        '''
+        self.__request("sync")
+    #endregion
+
+    #region Private method implementations
+    def __read(self):
+        '''
+            Reads available lines from the socket, collecting events and replies. 
+        '''
+        data = self.__socket.recv(4096)
+        if not data: raise ConnectionError("Display closed the connection")
+        lines = (self.__pending + data).split(b"\n")
+        self.__pending = lines.pop()
+        for line in lines:
+            line = line.decode("ascii")
+            if line.startswith("event "): self.__events.append(line[6:])
+            elif line == "released": self.__released = True
+            else: self.__replies.append(line)
+
+    def __request(self, command: str) -> str:
+        '''
+            Sends a command and waits for its reply.
+        '''
+        self.__file.write(command.encode("ascii") + b"\n")
+        while not self.__replies: self.__read()
+        reply = self.__replies.pop(0)
+        if not reply.startswith("ok"):
+            message = f"Display command '{command}' failed: {reply}"
+            logging.error(message)
+            raise Exception(message)
+        return reply
+    #endregion
@@ -0,0 +1,157 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Memory mapped RGB565 framebuffer shared between processes.
+"""
+import os
+import mmap
+import tempfile
+from PIL import Image
+from . import rgb565
+
+SHM_DIR = "/dev/shm"
+
+class FrameBuffer(object):
+    '''
+        The FrameBuffer class implements a memory mapped RGB565 framebuffer in a file, on /dev/shm where available. 
+        One process draws into the buffer and another one sends it to the panel without copying the frame through 
+        a pipe. Pixels are stored row by row, two bytes per pixel with the high byte first, as the panel expects.
+    '''
+    def __init__(self, width: int, height: int, path: str = None, create: bool = False):
+        '''
+            Constructor - Creates or opens a framebuffer.
+            Parameters:
+                width:      int
+                            Width of the framebuffer in pixels.
+                height:     int
+                            Height of the framebuffer in pixels.
+                path:       str, optional
+                            Path of the framebuffer. A new framebuffer with a unique name is created if None.
+                create:     bool, optional
+                            True to create the framebuffer at path, replacing an existing file. The new file is 
+                            only accessible to the current user and a symbolic link planted at path is removed 
+                            rather than followed. An existing framebuffer is opened otherwise.
+        '''
+        self.__width = width
+        self.__height = height
+        self.__size = width * height * 2
+        self.__owner = path is None or create
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="controllerMenu.", suffix=".fb", 
+                dir=SHM_DIR if os.path.isdir(SHM_DIR) else None)
+        elif create:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_NOFOLLOW)
+        if self.__owner: os.ftruncate(fd, self.__size)
+        self.__path = path
+        try:
+            self.__map = mmap.mmap(fd, self.__size)
+        finally:
+            os.close(fd)
+
+    #region Property implementations
+    @property
+    def Buffer(self) -> memoryview:
+        ''' Gets the framebuffer memory. '''
+        return memoryview(self.__map)
+
+    @property
+    def Dimensions(self) -> (int, int):
+        ''' Gets the dimensions of the framebuffer. '''
+        return (self.__width, self.__height)
+
+    @property
+    def Path(self) -> str:
+        ''' Gets the path of the framebuffer file, used to open it in another process. '''
+        return self.__path
+    #endregion
+
+    #region Public method implementations
+    def Close(self):
+        '''
+            Unmaps the framebuffer. The file is removed if the framebuffer was created by this instance.
+        '''
+        if self.__map is None: return
+        self.__map.close()
+        self.__map = None
+        if self.__owner:
+            try:
+                os.unlink(self.__path)
+            except OSError:
+                pass
+
+    def Read(self, box: tuple = None) -> bytes:
+        '''
+            Reads the pixels of the framebuffer or a region of it.
+            Parameters:
+                box:        tuple(int, int, int, int), optional
+                            The region (left, top, right, bottom), right and bottom exclusive. The whole 
+                            framebuffer if None.
+            Returns:
+                The RGB565 pixels of the region, row by row.
+        '''
+        if box is None or box == (0, 0, self.__width, self.__height): return self.__map[:self.__size]
+        left, top, right, bottom = box
+        stride = self.__width * 2
+        return b"".join(self.__map[y*stride + left*2:y*stride + right*2] for y in range(top, bottom))
+
+    def Write(self, image: Image, position: tuple = (0, 0)):
+        '''
+            Converts an image to RGB565 and writes it into the framebuffer.
+            Parameters:
+                image:      Image
+                            The image. It is clipped to the framebuffer.
+                position:   tuple(int, int), optional
+                            Position of the top left corner of the image in the framebuffer.
+            Returns:
+                The region written (left, top, right, bottom), or None if the image is outside the framebuffer.
+        '''
+        left, top = position
+        right, bottom = min(self.__width, left + image.width), min(self.__height, top + image.height)
+        if left < 0 or top < 0 or right <= left or bottom <= top: return None
+        if (right - left, bottom - top) != image.size: image = image.crop((0, 0, right - left, bottom - top))
+        self.WriteRaw(rgb565.FromImage(image), (left, top, right, bottom))
+        return (left, top, right, bottom)
+
+    def WriteRaw(self, data: bytes, box: tuple = None):
+        '''
+            Writes RGB565 pixels into the framebuffer.
+            Parameters:
+                data:       bytes
+                            The pixels of the region, row by row.
+                box:        tuple(int, int, int, int), optional
+                            The region (left, top, right, bottom). The whole framebuffer if None.
+        '''
+        if box is None or box == (0, 0, self.__width, self.__height):
+            self.__map[:self.__size] = data
+            return
+        left, top, right, bottom = box
+        stride = self.__width * 2
+        row = (right - left) * 2
+        for y in range(top, bottom):
+            offset = (y - top) * row
+            self.__map[y*stride + left*2:y*stride + right*2] = data[offset:offset + row]
+    #endregion
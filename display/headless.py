@@ -0,0 +1,91 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Headless stand-in for the LCD driver, used to run the menu off-device.
+"""
+import os
+import time
+from . import rgb565
+
+LCD_WIDTH  = 160
+LCD_HEIGHT = 128
+
+class HeadlessLCD(object):
+    '''
+        The HeadlessLCD class implements the part of the LCD driver interface used by the Display class without 
+        any hardware. It counts the frames and the time spent preparing them, including the RGB565 conversion 
+        of images the LCD driver does, and can optionally save the frames as images.
+    '''
+    def __init__(self, width: int = LCD_WIDTH, height: int = LCD_HEIGHT, frameDir: str = None):
+        '''
+            Constructor - Creates a new instance of the HeadlessLCD class.
+            Parameters:
+                width:      int, optional
+                            Width of the simulated panel. Defaults to 160.
+                height:     int, optional
+                            Height of the simulated panel. Defaults to 128.
+                frameDir:   str, optional
+                            Directory to save each frame to as PNG. Frames are not saved if None.
+        '''
+        self.LCD_Dis_Column = width
+        self.LCD_Dis_Page = height
+        self.Frames = 0
+        self.FrameTime = 0.0
+        self.Backlight = 100
+        self.Sleeping = False
+        self.__frameDir = frameDir
+        if frameDir is not None: os.makedirs(frameDir, exist_ok=True)
+
+    def LCD_Init(self, Lcd_ScanDir):
+        pass
+
+    def LCD_Clear(self, color):
+        pass
+
+    def LCD_SetArealColor(self, Xstart, Ystart, Xend, Yend, Color):
+        pass
+
+    def LCD_SetBacklight(self, Level):
+        self.Backlight = Level
+
+    def LCD_Sleep(self):
+        self.Sleeping = True
+
+    def LCD_Wake(self):
+        self.Sleeping = False
+
+    def LCD_ShowRaw(self, Data, Xstart = 0, Ystart = 0, Xend = None, Yend = None):
+        if Xend is None: Xend = self.LCD_Dis_Column
+        if Yend is None: Yend = self.LCD_Dis_Page
+        if Xend <= Xstart or Yend <= Ystart: return
+        start = time.perf_counter()
+        for i in range(0, len(Data), 4096): list(Data[i:i+4096])           # the chunks the LCD driver writes to SPI
+        self.Frames += 1
+        self.FrameTime += time.perf_counter() - start
+        if self.__frameDir is not None: 
+            rgb565.ToImage(Data, Xend - Xstart, Yend - Ystart).save(os.path.join(self.__frameDir, "frame%06d.png" % self.Frames))
+
+    def LCD_ShowImage(self, Image):
+        if Image is None: return
+        start = time.perf_counter()
+        data = rgb565.FromImage(Image)                                      # the conversion the LCD driver does
+        self.FrameTime += time.perf_counter() - start
+        self.LCD_ShowRaw(data, 0, 0, self.LCD_Dis_Column, self.LCD_Dis_Page)
@@ -0,0 +1,156 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Idle handling dimming and switching off the display when no button is pressed.
+"""
+import time
+import logging
+from diagnostics import ringlog
+
+IDLE_ACTIVE = 0
+IDLE_DIMMED = 1
+IDLE_ASLEEP = 2
+DEFAULT_DIM = 60
+DEFAULT_SLEEP = 300
+DEFAULT_LEVEL = 20
+
+class IdleManager(object):
+    '''
+        The IdleManager class dims the backlight once no button was pressed for a while and later turns it off and 
+        puts the panel to sleep. Refreshes of the running built-in are paused from the first step on. The first press 
+        after the panel was switched off wakes it up and is not passed on to the menu; a press while the display is 
+        only dimmed restores the brightness and is handled as usual. The manager runs on the runtime's loop: Touch 
+        must be called there and the timeouts are loop timers.
+    '''
+    def __init__(self, display, runtime, dim: float = DEFAULT_DIM, sleep: float = DEFAULT_SLEEP, level: int = DEFAULT_LEVEL):
+        '''
+            Constructor - Creates a new instance of the IdleManager class. Call Start to arm the timeouts.
+            Parameters:
+                display:    Display
+                            The display.
+                runtime:    Runtime
+                            The runtime owning the display.
+                dim:        float, optional
+                            Seconds without input before the backlight is dimmed. Not dimmed if None.
+                sleep:      float, optional
+                            Seconds without input before the backlight is turned off and the panel is put to 
+                            sleep. Never if None.
+                level:      int, optional
+                            Backlight brightness in percent while dimmed.
+        '''
+        self.__disp = display
+        self.__runtime = runtime
+        self.__steps = sorted(step for step in ((dim, IDLE_DIMMED), (sleep, IDLE_ASLEEP)) if step[0] is not None)
+        self.__level = level
+        self.__state = IDLE_ACTIVE
+        self.__last = time.monotonic()
+        self.__timer = None
+        self.__pausers = []
+
+    #region Public properties
+    @property
+    def State(self) -> int:
+        ''' Gets the idle state. One of IDLE_ACTIVE, IDLE_DIMMED or IDLE_ASLEEP. '''
+        return self.__state
+    #endregion
+
+    #region Public methods
+    def OnPause(self, callback: callable):
+        '''
+            Registers a function pausing and resuming refreshes. 
+            Parameters:
+                callback:   callable
+                            The function. It is called with True when the display goes idle and False when it 
+                            becomes active again.
+        '''
+        self.__pausers.append(callback)
+
+    def Start(self):
+        '''
+            Arms the timeouts. Must be called on the loop.
+        '''
+        self.__last = time.monotonic()
+        self.__schedule()
+
+    def Stop(self):
+        '''
+            Disarms the timeouts.
+        '''
+        if self.__timer is not None: self.__timer.cancel()
+        self.__timer = None
+
+    def Touch(self) -> bool:
+        '''
+            Records user activity, restoring the display if it is dimmed or off. Must be called on the loop.
+            Returns:
+                True if the display was off and the input should be ignored, False otherwise.
+        '''
+        self.__last = time.monotonic()
+        state = self.__state
+        if state == IDLE_ACTIVE: return False
+        self.__state = IDLE_ACTIVE
+        if state == IDLE_ASLEEP: self.__disp.Wake()
+        else: self.__disp.SetBacklight(100)
+        self.__pause(False)
+        self.__schedule()
+        ringlog.Event(ringlog.EVENT_IDLE, IDLE_ACTIVE)
+        logging.info("Display active")
+        return state == IDLE_ASLEEP
+    #endregion
+
+    #region Private method implementations
+    def __check(self):
+        '''
+            Timer callback advancing to the next idle step once its timeout expired.
+        '''
+        self.__timer = None
+        idle = time.monotonic() - self.__last
+        for timeout, state in self.__steps:
+            if idle < timeout or state <= self.__state: continue
+            if self.__state == IDLE_ACTIVE: self.__pause(True)
+            self.__state = state
+            if state == IDLE_DIMMED: self.__disp.SetBacklight(self.__level)
+            else: self.__disp.Sleep()
+            ringlog.Event(ringlog.EVENT_IDLE, state)
+            logging.info("Display dimmed" if state == IDLE_DIMMED else "Display asleep")
+        self.__schedule()
+
+    def __pause(self, paused: bool):
+        '''
+            Pauses or resumes refreshes.
+        '''
+        for callback in self.__pausers:
+            try:
+                callback(paused)
+            except Exception as e:
+                logging.exception(e)
+
+    def __schedule(self):
+        '''
+            Schedules the timer for the next idle step, if any.
+        '''
+        if self.__timer is not None: self.__timer.cancel()
+        self.__timer = None
+        pending = [timeout for timeout, state in self.__steps if state > self.__state]
+        if not pending: return
+        delay = max(0, min(pending) - (time.monotonic() - self.__last))
+        self.__timer = self.__runtime.After(delay, self.__check)
+    #endregion
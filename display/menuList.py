@@ -0,0 +1,208 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Virtualized list widget used to draw the menus.
+"""
+from PIL import ImageDraw, ImageFont
+
+SCROLLBAR_WIDTH = 3
+SCROLLBAR_MIN_THUMB = 6
+
+class MenuList(object):
+    '''
+        The MenuList class implements a virtualized list of menu items. All rows have the same height, computed
+        once from the font metrics, so the visible range follows from the scroll position without measuring any
+        item and drawing a frame costs the same for ten items as for ten thousand. A proportional scrollbar 
+        shows the position in lists longer than the display.
+    '''
+    def __init__(self, width: int, height: int, font: ImageFont, padding: int = 10, textColor: str = "#00FF00", 
+            selectedColor: str = "#FFFFFF", scrollbarColor: str = "#00FF00"):
+        '''
+            Constructor - Creates a new instance of the MenuList class.
+            Parameters:
+                width:          int
+                                Width of the list area in pixels.
+                height:         int
+                                Height of the list area in pixels.
+                font:           ImageFont
+                                Font used for the items.
+                padding:        int, optional
+                                Space in pixels around and between the items.
+                textColor:      str, optional
+                                Color of the items.
+                selectedColor:  str, optional
+                                Color of the selected item.
+                scrollbarColor: str, optional
+                                Color of the scrollbar.
+        '''
+        self.__width = width
+        self.__height = height
+        self.__font = font
+        self.__padding = padding
+        self.__textColor = textColor
+        self.__selectedColor = selectedColor
+        self.__scrollbarColor = scrollbarColor
+        ascent, descent = font.getmetrics()
+        self.__lineHeight = ascent + descent
+        self.__rowHeight = self.__lineHeight + padding
+        self.__rows = max(1, (height - padding - self.__lineHeight) // self.__rowHeight + 1)
+        self.__items = []
+        self.__selected = -1
+        self.__top = 0
+        self.__icons = {}
+
+    #region Property implementations
+    @property
+    def Icons(self) -> dict:
+        ''' Gets the icons shown next to the items, by item. '''
+        return self.__icons
+
+    @Icons.setter
+    def Icons(self, icons: dict):
+        ''' Sets the icons shown next to the items, by item. With icons, the items are indented by IconSize. '''
+        self.__icons = icons or {}
+
+    @property
+    def IconSize(self) -> int:
+        ''' Gets the width and height of the space for an icon. '''
+        return self.__lineHeight
+
+    @property
+    def Items(self) -> list:
+        ''' Gets the list items. '''
+        return self.__items
+
+    @property
+    def Rows(self) -> int:
+        ''' Gets the number of rows fitting on the display. '''
+        return self.__rows
+
+    @property
+    def Selected(self) -> int:
+        ''' Gets the index of the selected item, or -1 if no item is selected. '''
+        return self.__selected
+
+    @property
+    def Top(self) -> int:
+        ''' Gets the index of the first visible item. '''
+        return self.__top
+    #endregion
+
+    #region Public method implementations
+    def Draw(self, draw: ImageDraw, x: int = 0, y: int = 0):
+        '''
+            Draws the visible rows and the scrollbar. The area is expected to be cleared. Icons are not drawn, 
+            their positions are returned to be drawn by the caller.
+            Parameters:
+                draw:       ImageDraw
+                            The drawing context.
+                x:          int, optional
+                            Left edge of the list area.
+                y:          int, optional
+                            Top edge of the list area.
+            Returns:
+                The list of (icon, x, y) placements of the icons of the visible items.
+        '''
+        top = y + self.__padding
+        indent = self.__lineHeight + self.__padding // 2 if self.__icons else 0
+        placements = []
+        for idx in range(self.__top, min(len(self.__items), self.__top + self.__rows)):
+            item = self.__items[idx]
+            icon = self.__icons.get(item)
+            if icon is not None: placements.append((icon, x + self.__padding, top))
+            draw.text((x + self.__padding + indent, top), item, font=self.__font, 
+                fill=self.__selectedColor if idx == self.__selected else self.__textColor)
+            top += self.__rowHeight
+        count = len(self.__items)
+        if count <= self.__rows: return placements
+        track = self.__height - self.__padding
+        thumb = max(SCROLLBAR_MIN_THUMB, track * self.__rows // count)
+        start = y + self.__padding // 2 + (track - thumb) * self.__top // (count - self.__rows)
+        draw.rectangle((x + self.__width - SCROLLBAR_WIDTH, start, x + self.__width - 1, start + thumb - 1), 
+            fill=self.__scrollbarColor)
+        return placements
+
+    def Move(self, delta: int) -> bool:
+        '''
+            Moves the selection by a number of items and scrolls as needed to keep it visible. Without a selection
+            the first step selects the first item.
+            Parameters:
+                delta:      int
+                            Number of items to move, negative to move up.
+            Returns:
+                True if the selection changed, False otherwise.
+        '''
+        if not self.__items or delta == 0: return False
+        if self.__selected == -1: return self.__select(delta - 1 if delta > 0 else 0)
+        return self.__select(self.__selected + delta)
+
+    def Page(self, pages: int) -> bool:
+        '''
+            Moves the selection and the scroll position by a number of pages.
+            Parameters:
+                pages:      int
+                            Number of pages to move, negative to move up.
+            Returns:
+                True if the selection changed, False otherwise.
+        '''
+        if not self.__items or pages == 0: return False
+        previous = max(0, self.__selected)
+        self.__top = self.__top + pages * self.__rows
+        return self.__select(previous + pages * self.__rows)
+
+    def Show(self, items: list, selected: int = -1, top: int = 0):
+        '''
+            Sets the items, selection and scroll position. The selection is kept visible.
+            Parameters:
+                items:      list(str)
+                            The items. The list is stored by reference and must not be modified afterwards. 
+                selected:   int, optional
+                            Index of the selected item, -1 for no selection.
+                top:        int, optional
+                            Index of the first visible item.
+        '''
+        self.__items = items
+        self.__top = top
+        self.__selected = -1
+        if selected < 0 or not items: self.__clampTop(0, len(items) - 1)
+        else: self.__select(selected)
+    #endregion
+
+    #region Private method implementations
+    def __clampTop(self, first: int, last: int):
+        '''
+            Clamps the scroll position so the items first to last are visible and the display is filled.
+        '''
+        self.__top = max(first - self.__rows + 1, min(self.__top, last))
+        self.__top = max(0, min(self.__top, len(self.__items) - self.__rows))
+
+    def __select(self, index: int) -> bool:
+        '''
+            Selects an item, clamping the index to the list, and scrolls to keep it visible.
+            Returns:
+                True if the selection changed, False otherwise.
+        '''
+        index = max(0, min(index, len(self.__items) - 1))
+        changed = index != self.__selected
+        self.__selected = index
+        self.__clampTop(index, index)
+        return changed
+    #endregion
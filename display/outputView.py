@@ -0,0 +1,237 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Paginated view of command output with ANSI colours and cached line breaking.
+"""
+import re
+from PIL import ImageDraw, ImageFont
+
+TAB_SIZE = 4
+ANSI_COLORS = ("#808080", "#FF5555", "#55FF55", "#FFFF55", "#5555FF", "#FF55FF", "#55FFFF", "#FFFFFF")
+ANSI_BRIGHT = ("#A0A0A0", "#FF8080", "#80FF80", "#FFFF80", "#8080FF", "#FF80FF", "#80FFFF", "#FFFFFF")
+CONTROL = {code: None for code in range(32) if code != 9}
+ANSI_ESCAPE = re.compile(r"\x1b(?:\[([0-9;?]*)([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+def ParseAnsi(text: str, color: str) -> list:
+    '''
+        Splits text into lines of colored runs. SGR foreground colours are applied, all other escape and 
+        control sequences are removed. A carriage return within a line starts the line over, as on a terminal.
+        Parameters:
+            text:       str
+                        The text to parse.
+            color:      str
+                        The default color.
+        Returns:
+            A list with a list of (text, color) runs per line.
+    '''
+    lines = []
+    current = color
+    for line in text.split("\n"):
+        if "\r" in line: line = line.rstrip("\r").rsplit("\r", 1)[-1]
+        runs = []
+        start = 0
+        for match in ANSI_ESCAPE.finditer(line):
+            if match.start() > start: runs.append((line[start:match.start()], current))
+            start = match.end()
+            if match.group(2) == "m": current = _sgr(match.group(1), current, color)
+        if start < len(line): runs.append((line[start:], current))
+        runs = [(run.translate(CONTROL).expandtabs(TAB_SIZE), runColor) for run, runColor in runs]
+        lines.append([(run, runColor) for run, runColor in runs if run])
+    if lines and not lines[-1]: lines.pop()
+    return lines
+
+def _sgr(parameters: str, current: str, color: str) -> str:
+    '''
+        Applies the parameters of an SGR sequence to the current foreground color. 
+    '''
+    codes = [int(code) for code in parameters.split(";") if code.isdigit()] or [0]
+    for code in codes:
+        if code == 0 or code == 39: current = color
+        elif 30 <= code <= 37: current = ANSI_COLORS[code - 30]
+        elif 90 <= code <= 97: current = ANSI_BRIGHT[code - 90]
+    return current
+
+class TextWrapper(object):
+    '''
+        The TextWrapper class breaks lines of colored runs to a width in pixels. The advance of each glyph is 
+        measured once and cached, so wrapping costs a dictionary lookup per character. Lines are broken after 
+        the last break character (a space by default) fitting on the line, words longer than the width are 
+        broken anywhere.
+    '''
+    def __init__(self, font: ImageFont, width: int, breaks: str = " "):
+        '''
+            Constructor - Creates a new instance of the TextWrapper class.
+            Parameters:
+                font:       ImageFont
+                            Font the text is drawn with.
+                width:      int
+                            Width available for a line in pixels.
+                breaks:     str, optional
+                            Characters after which a line may be broken, e.g. ":" for IPv6 addresses.
+        '''
+        self.__font = font
+        self.__width = width
+        self.__breaks = breaks
+        self.__advances = {}
+
+    #region Public method implementations
+    def Wrap(self, runs: list) -> list:
+        '''
+            Wraps a line.
+            Parameters:
+                runs:       list
+                            The (text, color) runs of the line, see ParseAnsi.
+            Returns:
+                A list of wrapped lines, each a list of (x, text, color) runs positioned from the left edge.
+        '''
+        text = "".join(run for run, _ in runs)
+        advances = [self.__advance(char) for char in text]
+        lines = []
+        start = 0
+        used = 0
+        space = -1
+        for idx, advance in enumerate(advances):
+            if used + advance > self.__width and idx > start:
+                end = space + 1 if space >= start else idx
+                lines.append(self.__place(runs, advances, start, end))
+                start = end
+                used = sum(advances[start:idx])
+                space = -1
+            if text[idx] in self.__breaks: space = idx
+            used += advance
+        lines.append(self.__place(runs, advances, start, len(text)))
+        return lines
+    #endregion
+
+    #region Private method implementations
+    def __advance(self, char: str) -> int:
+        '''
+            Gets the advance of a glyph, measuring it on first use.
+        '''
+        advance = self.__advances.get(char)
+        if advance is None:
+            advance = self.__font.getsize(char)[0]
+            self.__advances[char] = advance
+        return advance
+
+    @staticmethod
+    def __place(runs: list, advances: list, start: int, end: int) -> list:
+        '''
+            Cuts the characters start to end out of the runs and positions them. 
+        '''
+        placed = []
+        offset = 0
+        x = 0
+        for run, color in runs:
+            first, last = max(start, offset), min(end, offset + len(run))
+            if first < last:
+                placed.append((x, run[first - offset:last - offset], color))
+                x += sum(advances[first:last])
+            offset += len(run)
+        return placed
+    #endregion
+
+class OutputView(object):
+    '''
+        The OutputView class shows command output a page at a time. The output is parsed, wrapped and split into 
+        pages once when it is shown; drawing a page only draws its prepared runs, so paging through long output 
+        costs the same as drawing a short one. 
+    '''
+    def __init__(self, width: int, height: int, font: ImageFont, textColor: str = "#00FF00"):
+        '''
+            Constructor - Creates a new instance of the OutputView class.
+            Parameters:
+                width:          int
+                                Width of the output area in pixels.
+                height:         int
+                                Height of the output area in pixels.
+                font:           ImageFont
+                                Font used for the output.
+                textColor:      str, optional
+                                Color of text without an ANSI colour.
+        '''
+        self.__font = font
+        self.__textColor = textColor
+        self.__wrapper = TextWrapper(font, width)
+        ascent, descent = font.getmetrics()
+        self.__lineHeight = ascent + descent
+        self.__rows = max(1, height // self.__lineHeight)
+        self.__text = None
+        self.__lines = []
+        self.__page = 0
+
+    #region Property implementations
+    @property
+    def Page(self) -> int:
+        ''' Gets the index of the visible page. '''
+        return self.__page
+
+    @property
+    def Pages(self) -> int:
+        ''' Gets the number of pages. '''
+        return max(1, (len(self.__lines) + self.__rows - 1) // self.__rows)
+    #endregion
+
+    #region Public method implementations
+    def Draw(self, draw: ImageDraw, x: int, y: int):
+        '''
+            Draws the visible page. The area is expected to be cleared.
+            Parameters:
+                draw:       ImageDraw
+                            The drawing context.
+                x:          int
+                            Left edge of the output area.
+                y:          int
+                            Top edge of the output area.
+        '''
+        start = self.__page * self.__rows
+        for line in self.__lines[start:start + self.__rows]:
+            for offset, text, color in line:
+                draw.text((x + offset, y), text, font=self.__font, fill=color)
+            y += self.__lineHeight
+
+    def Move(self, pages: int) -> bool:
+        '''
+            Moves by a number of pages.
+            Parameters:
+                pages:      int
+                            Number of pages to move, negative to move back.
+            Returns:
+                True if the visible page changed, False otherwise.
+        '''
+        page = min(max(0, self.__page + pages), self.Pages - 1)
+        if page == self.__page: return False
+        self.__page = page
+        return True
+
+    def Show(self, text: str):
+        '''
+            Shows output from its first page. The output is only laid out again if it differs from the 
+            output shown last.
+            Parameters:
+                text:       str
+                            The output, optionally containing ANSI escape sequences.
+        '''
+        self.__page = 0
+        if text == self.__text: return
+        self.__text = text
+        self.__lines = [wrapped for line in ParseAnsi(text, self.__textColor) for wrapped in self.__wrapper.Wrap(line)]
+    #endregion
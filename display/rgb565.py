@@ -0,0 +1,77 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Conversion between PIL images and the big endian RGB565 pixel format of the ST7735 panel.
+"""
+from PIL import Image, ImageChops
+
+__highRed = [v & 0xF8 for v in range(256)]
+__highGreen = [v >> 5 for v in range(256)]
+__lowGreen = [(v << 3) & 0xE0 for v in range(256)]
+__lowBlue = [v >> 3 for v in range(256)]
+__red = [v & 0xF8 for v in range(256)]
+__greenHigh = [(v & 0x07) << 5 for v in range(256)]
+__greenLow = [(v & 0xE0) >> 3 for v in range(256)]
+__blue = [(v & 0x1F) << 3 for v in range(256)]
+
+def FromImage(image: Image) -> bytes:
+    '''
+        Converts an image into RGB565 pixels, two bytes per pixel with the high byte first. The conversion uses 
+        lookup tables applied by PIL, so it runs in C without numpy.
+        Parameters:
+            image:      Image
+                        The image to convert.
+        Returns:
+            The pixel data.
+    '''
+    if image.mode != "RGB": image = image.convert("RGB")
+    r, g, b = image.split()
+    high = ImageChops.add(r.point(__highRed), g.point(__highGreen))
+    low = ImageChops.add(g.point(__lowGreen), b.point(__lowBlue))
+    return Image.merge("LA", (high, low)).tobytes()
+
+def ToImage(data: bytes, width: int, height: int) -> Image:
+    '''
+        Converts RGB565 pixels back into an RGB image, e.g. to save the frames of a headless display.
+        Parameters:
+            data:       bytes
+                        The pixel data, high byte first.
+            width:      int
+                        Width of the image.
+            height:     int
+                        Height of the image.
+        Returns:
+            The image.
+    '''
+    high, low = Image.frombytes("LA", (width, height), bytes(data)).split()
+    return Image.merge("RGB", (high.point(__red), 
+        ImageChops.add(high.point(__greenHigh), low.point(__greenLow)), low.point(__blue)))
+
+def Color(r: int, g: int, b: int) -> int:
+    '''
+        Converts a color into its RGB565 value.
+        Parameters:
+            r, g, b:    int
+                        The color components (0-255).
+        Returns:
+            The 16 bit color value.
+    '''
+    return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
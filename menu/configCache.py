@@ -0,0 +1,90 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import sys
+import pickle
+import logging
+
+CACHE_VERSION = 1
+
+class ConfigCache(object):
+    '''
+        The ConfigCache class loads the menu configuration from a pickled cache next to the YAML file. The cache 
+        is only used if the modification time and size of the YAML file match, so parsing YAML (and importing the 
+        yaml module) is skipped on all but the first start after a change. 
+    '''
+    def __init__(self, path: str, cachePath: str = None):
+        '''
+            Constructor - Creates a new instance of the ConfigCache class.
+            Parameters:
+                path:       str
+                            Path of the YAML configuration file.
+                cachePath:  str, optional
+                            Path of the cache file. Defaults to a hidden file next to the configuration.
+        '''
+        self.__path = path
+        directory, name = os.path.split(os.path.abspath(path))
+        self.__cachePath = cachePath or os.path.join(directory, f".{name}.cache")
+        self.__hit = False
+
+    @property
+    def Hit(self) -> bool:
+        """ Gets whether the last Load was served from the cache. """
+        return self.__hit
+
+    def Load(self) -> dict:
+        '''
+            Loads the configuration, from the cache if it is valid, otherwise by parsing the YAML file and refreshing
+            the cache.
+            Returns:
+                The configuration.
+        '''
+        st = os.stat(self.__path)
+        key = (CACHE_VERSION, sys.version_info[:2], st.st_mtime_ns, st.st_size)
+        try:
+            with open(self.__cachePath, "rb") as file:
+                cached = pickle.load(file)
+            if cached[0] == key:
+                self.__hit = True
+                return cached[1]
+        except (OSError, EOFError, pickle.UnpicklingError, IndexError, TypeError):
+            pass
+        self.__hit = False
+        config = ConfigCache.__parse(self.__path)
+        try:
+            temp = self.__cachePath + ".tmp"
+            with open(temp, "wb") as file:
+                pickle.dump((key, config), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.__cachePath)
+        except OSError as e:
+            logging.warning(f"Could not write configuration cache {self.__cachePath}: {e}")
+        return config
+
+    @staticmethod
+    def __parse(path: str) -> dict:
+        '''
+            Parses the YAML configuration file, using the libyaml based loader if available.
+        '''
+        import yaml
+        with open(path) as file:
+            # The FullLoader parameter handles the conversion from YAML
+            # scalar values to Python dictionary format
+            return yaml.load(file, Loader=getattr(yaml, "CFullLoader", yaml.FullLoader))
@@ -0,0 +1,245 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import time
+import shlex
+import logging
+import threading
+import subprocess
+
+DYNAMIC_KEY = "dynamic"
+ITEM_PLACEHOLDER = "{item}"
+DEFAULT_TTL = 60
+DEFAULT_PAGE_SIZE = 50
+
+class DynamicSource(object):
+    '''
+        The DynamicSource class provides the items of a dynamic menu from the output of a generator command, one 
+        item per line. The output is read page by page as the items are requested, so a long listing does not 
+        delay the menu. Items are cached for a time to live; a refresh runs in the background and replaces the 
+        items once the new output has caught up with the items already shown.
+    '''
+    def __init__(self, generator: str, ttl: float = DEFAULT_TTL, pageSize: int = DEFAULT_PAGE_SIZE, 
+            field: int = None, cwd: str = None):
+        '''
+            Constructor - Creates a new instance of the DynamicSource class.
+            Parameters:
+                generator:  str
+                            Shell command listing the items.
+                ttl:        float, optional
+                            Seconds the items are cached before they are refreshed.
+                pageSize:   int, optional
+                            Number of items read ahead of the last requested item.
+                field:      int, optional
+                            Index of the white space separated field of a line to use as item. The whole line is 
+                            used if None.
+                cwd:        str, optional
+                            Working directory of the generator.
+        '''
+        self.__generator = generator
+        self.__ttl = ttl
+        self.__pageSize = max(1, pageSize)
+        self.__field = field
+        self.__cwd = cwd
+        self.__lock = threading.Lock()
+        self.__items = []                   # published items
+        self.__pending = []                 # items read by the current generation
+        self.__process = None
+        self.__generation = 0
+        self.__started = None               # time the current generation was started
+        self.__wanted = self.__pageSize
+        self.__reading = False
+        self.__complete = False
+        self.Changed: callable = None       # invoked without arguments when the items changed
+
+    #region Property implementations
+    @property
+    def Complete(self) -> bool:
+        ''' Gets whether the generator output has been read completely. '''
+        return self.__complete
+
+    @property
+    def Items(self) -> list:
+        ''' Gets the items read so far. The list is replaced, not modified, when items are added. '''
+        return self.__items
+
+    @property
+    def Loading(self) -> bool:
+        ''' Gets whether items are being read. '''
+        return self.__reading
+    #endregion
+
+    #region Public method implementations
+    def Close(self):
+        '''
+            Stops reading and terminates the generator.
+        '''
+        with self.__lock:
+            self.__generation += 1
+            self.__reading = False
+            self.__kill()
+
+    def Refresh(self, force: bool = False):
+        '''
+            Starts reading the generator output in the background if the items are older than the time to live.
+            Parameters:
+                force:      bool, optional
+                            True to refresh regardless of the age of the items.
+        '''
+        with self.__lock:
+            if not force and self.__started is not None and time.monotonic() - self.__started < self.__ttl: return
+            self.__kill()
+            self.__generation += 1
+            self.__started = time.monotonic()
+            self.__pending = []
+            self.__complete = False
+            self.__start()
+
+    def Request(self, index: int):
+        '''
+            Requests the items up to index plus a page to be read, reading the next page in the background.
+            Parameters:
+                index:      int
+                            Index of the last item about to be shown.
+        '''
+        with self.__lock:
+            self.__wanted = max(self.__wanted, index + self.__pageSize)
+            if self.__process is not None and not self.__reading and len(self.__pending) < self.__wanted: self.__start()
+    #endregion
+
+    #region Private method implementations
+    def __kill(self):
+        '''
+            Terminates the generator of the current generation. Called with the lock held.
+        '''
+        if self.__process is None: return
+        try:
+            self.__process.kill()
+            self.__process.stdout.close()
+            self.__process.wait()
+        except OSError:
+            pass
+        self.__process = None
+
+    def __parse(self, line: str) -> str:
+        '''
+            Parses a line of generator output into an item.
+        '''
+        if self.__field is None: return line.strip()
+        fields = line.split()
+        return fields[self.__field] if -len(fields) <= self.__field < len(fields) else ""
+
+    def __publish(self):
+        '''
+            Notifies the Changed delegate that new items have been published. Called without the lock held.
+        '''
+        changed = self.Changed
+        if changed is not None:
+            try:
+                changed()
+            except Exception as e:
+                logging.exception(e)
+
+    def __read(self, generation: int):
+        '''
+            Thread entry point reading the generator output until the wanted number of items is available.
+            Parameters:
+                generation: int
+                            The generation to read. Reading stops once a refresh starts a new generation.
+        '''
+        process = self.__process
+        if process is None:
+            try:
+                process = subprocess.Popen(self.__generator, shell=True, cwd=self.__cwd, stdout=subprocess.PIPE, 
+                    stderr=subprocess.DEVNULL, universal_newlines=True)
+            except OSError as e:
+                logging.error(f"Dynamic menu generator '{self.__generator}' failed: {e}")
+                process = None
+            with self.__lock:
+                if generation != self.__generation:
+                    if process is not None: process.kill()
+                    return
+                self.__process = process
+                if process is None:
+                    self.__reading = False
+                    self.__complete = True
+                    return
+        read = []
+        while True:
+            with self.__lock:
+                if generation != self.__generation: return
+                self.__pending.extend(read)
+                read = []
+                if len(self.__pending) >= self.__wanted:
+                    self.__reading = False
+                    self.__items = list(self.__pending)
+                    break
+            try:
+                line = process.stdout.readline()
+            except (OSError, ValueError):
+                line = ""
+            if not line:
+                code = process.wait()
+                if code != 0: logging.warning("Dynamic menu generator '%s' returned %d", self.__generator, code)
+                with self.__lock:
+                    if generation != self.__generation: return
+                    process.stdout.close()
+                    self.__process = None
+                    self.__reading = False
+                    self.__complete = True
+                    self.__items = list(self.__pending)
+                break
+            item = self.__parse(line)
+            if item: read.append(item)
+        self.__publish()
+
+    def __start(self):
+        '''
+            Starts a reader thread for the current generation. Called with the lock held.
+        '''
+        self.__reading = True
+        threading.Thread(target=self.__read, args=(self.__generation, ), name="dynamicMenu", daemon=True).start()
+
+    def __del__(self):
+        '''
+            Destructor - terminates a generator that has not been read completely.
+        '''
+        self.Close()
+    #endregion
+
+def Expand(template: dict, item: str) -> dict:
+    '''
+        Creates the configuration of the command for an item of a dynamic menu by replacing the {item} placeholder
+        in the string values of the template. The item is quoted in the command line of shell commands.
+        Parameters:
+            template:   dict
+                        The command configuration with placeholders.
+            item:       str
+                        The selected item.
+        Returns:
+            The command configuration.
+    '''
+    def expand(value, quote: bool):
+        if isinstance(value, str): return value.replace(ITEM_PLACEHOLDER, shlex.quote(item) if quote else item)
+        if isinstance(value, dict): return {key: expand(entry, False) for key, entry in value.items()}
+        if isinstance(value, list): return [expand(entry, False) for entry in value]
+        return value
+    shell = template.get("type") == "shell"
+    return {key: expand(value, shell and key == "command") for key, value in template.items()}
@@ -0,0 +1,284 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import logging
+from .dynamic import DynamicSource, Expand, DYNAMIC_KEY, DEFAULT_TTL, DEFAULT_PAGE_SIZE
+
+PARENT_ITEM = ".."
+LOADING_ITEM = "Loading..."
+EMPTY_ITEM = "(no items)"
+ITEM_COMMANDS = 16          # commands of recently selected dynamic items kept for reuse
+
+class MenuNode(object):
+    '''
+        The MenuNode class represents an entry of the menu tree compiled from the 'root' section of controllerMenu.yaml. 
+        Submenus know their parent, carry the precomputed list of display items (including '..') and remember the 
+        cursor position, so navigating up and down the tree does not walk or copy the configuration. Dynamic menus
+        take their items from a DynamicSource and run a command created from a template for the selected item.
+    '''
+    __slots__ = ("Name", "Parent", "CommandName", "Command", "Config", "Children", "Items", "Entries", "Cursor", 
+        "ScrollStart", "Dynamic", "Template", "Commands")
+
+    def __init__(self, name: str, parent = None, commandName: str = None, command = None):
+        '''
+            Constructor - Creates a new instance of the MenuNode class.
+            Parameters:
+                name:       str
+                            The display name of the node.
+                parent:     MenuNode, optional
+                            The parent menu. None for the root menu. 
+                commandName: str, optional
+                            For leaf nodes, the key of the command in the 'commands' section.
+                command:    Command, optional
+                            For leaf nodes, the resolved command.
+        '''
+        self.Name: str = name
+        self.Parent = parent
+        self.CommandName: str = commandName
+        self.Command = command
+        self.Config = None              # the configuration the node was compiled from
+        self.Children: list = []
+        self.Items: list = []           # display items, including '..' for submenus
+        self.Entries: list = []         # node for each display item, the parent for '..'
+        self.Cursor: int = 0            # selected index when the menu was last shown
+        self.ScrollStart: int = 0       # first visible index when the menu was last shown
+        self.Dynamic: DynamicSource = None  # item source of a dynamic menu
+        self.Template: dict = None      # command configuration of a dynamic menu, with {item} placeholders
+        self.Commands: dict = {}        # commands of recently selected dynamic items, least recent first
+
+    @property
+    def IsLeaf(self) -> bool:
+        ''' Gets whether the node represents a command rather than a submenu. '''
+        return self.CommandName is not None
+
+    @property
+    def IsDynamic(self) -> bool:
+        ''' Gets whether the node is a dynamic menu. '''
+        return self.Dynamic is not None
+
+    @property
+    def Path(self) -> list:
+        ''' Gets the names of the nodes from the root menu (excluded) to this node. '''
+        path = []
+        node = self
+        while node.Parent is not None:
+            path.append(node.Name)
+            node = node.Parent
+        path.reverse()
+        return path
+
+    def Child(self, name: str):
+        '''
+            Gets a child node by name.
+            Parameters:
+                name:       str
+                            The display name of the child.
+            Returns:
+                The child MenuNode or None.
+        '''
+        for child in self.Children:
+            if child.Name == name: return child
+        return None
+
+    def Find(self, path: list):
+        '''
+            Gets the node at a path below this node.
+            Parameters:
+                path:       list(str)
+                            Names of the nodes leading to the node.
+            Returns:
+                The MenuNode, or None if the path does not exist.
+        '''
+        node = self
+        for name in path:
+            node = node.Child(name)
+            if node is None: return None
+        return node
+
+    def Item(self, index: int) -> str:
+        '''
+            Gets the generated item shown at a display index of a dynamic menu.
+            Parameters:
+                index:      int
+                            The display index.
+            Returns:
+                The item, or None for '..' and the placeholders.
+        '''
+        items = self.Dynamic.Items
+        return items[index - 1] if 0 < index <= len(items) else None
+
+    def Update(self):
+        '''
+            Updates the display items of a dynamic menu from its source. A placeholder is shown until the first 
+            items are available.
+        '''
+        items = self.Dynamic.Items
+        if not items: items = [EMPTY_ITEM if self.Dynamic.Complete else LOADING_ITEM]
+        self.Items = [PARENT_ITEM] + items
+
+    def ItemCommand(self, item: str, create: callable):
+        '''
+            Gets the command for an item of a dynamic menu, created from the template when the item is first 
+            selected. The commands of recently selected items are kept, so selecting an item again reuses the 
+            command and its built-in instance.
+            Parameters:
+                item:       str
+                            The selected item.
+                create:     callable
+                            Function creating the command from its configuration.
+            Returns:
+                The command.
+        '''
+        command = self.Commands.pop(item, None)
+        if command is None: command = create(Expand(self.Template, item))
+        self.Commands[item] = command
+        if len(self.Commands) > ITEM_COMMANDS: del self.Commands[next(iter(self.Commands))]
+        return command
+
+    def Remember(self, cursor: int, scrollStart: int):
+        '''
+            Remembers the cursor position of the menu.
+            Parameters:
+                cursor:     int
+                            The selected index.
+                scrollStart: int
+                            The first visible index.
+        '''
+        self.Cursor = cursor
+        self.ScrollStart = scrollStart
+
+    @staticmethod
+    def Compile(config: dict, commands: dict, name: str = "", parent = None, previous = None):
+        '''
+            Compiles a menu configuration into a tree of MenuNode instances.
+            Parameters:
+                config:     dict
+                            The menu configuration, i.e. the 'root' section of controllerMenu.yaml.
+                commands:   dict
+                            The Command instances by key.
+                name:       str, optional
+                            The name of the compiled menu.
+                parent:     MenuNode, optional
+                            The parent of the compiled menu.
+                previous:   MenuNode, optional
+                            The node compiled from the previous version of the configuration. Subtrees whose
+                            configuration and commands did not change are reused, and the cursor positions of 
+                            changed menus are carried over. The previous tree is left untouched if the 
+                            compilation fails; once the new tree is in use, call Release on the previous tree.
+            Returns:
+                The compiled MenuNode.
+        '''
+        attachments = []
+        node = MenuNode.__compile(config, commands, name, parent, previous, attachments)
+        # reused nodes are only moved to the new tree once all of it compiled
+        for reused, newParent in attachments: reused.__attach(newParent)
+        return node
+
+    def Release(self, successor = None):
+        '''
+            Closes the dynamic sources of the tree that are not reused by the tree compiled to replace it.
+            Parameters:
+                successor:  MenuNode, optional
+                            The root of the tree replacing this one. None to close all dynamic sources.
+        '''
+        kept = {id(node) for node in successor.__nodes()} if successor is not None else set()
+        for node in self.__nodes():
+            if node.IsDynamic and id(node) not in kept: node.Dynamic.Close()
+
+    @staticmethod
+    def __compile(config: dict, commands: dict, name: str, parent, previous, attachments: list):
+        '''
+            Compiles a menu, collecting the reused nodes and their new parents in attachments.
+        '''
+        if previous is not None and previous.Config == config and previous.__unchanged(commands):
+            attachments.append((previous, parent))
+            return previous
+        node = MenuNode(name, parent)
+        node.Config = config
+        if previous is not None: node.Remember(previous.Cursor, previous.ScrollStart)
+        if parent is not None:
+            node.Items.append(PARENT_ITEM)
+            node.Entries.append(parent)
+        for item, value in config.items():
+            before = previous.Child(item) if previous is not None else None
+            if isinstance(value, dict) and isinstance(value.get(DYNAMIC_KEY), dict):
+                child = MenuNode.__compileDynamic(value, item, node, before, attachments)
+            elif isinstance(value, dict):
+                child = MenuNode.__compile(value, commands, item, node, 
+                    before if before is not None and not before.IsLeaf else None, attachments)
+            else:
+                if value not in commands:
+                    message = f"Menu item '{item}' references the unknown command '{value}'."
+                    logging.error(message)
+                    raise Exception(message)
+                if before is not None and before.CommandName == value and before.Command is commands[value]:
+                    child = before
+                    attachments.append((child, node))
+                else:
+                    child = MenuNode(item, node, value, commands[value])
+            node.Children.append(child)
+            node.Items.append(item)
+            node.Entries.append(child)
+        return node
+
+    @staticmethod
+    def __compileDynamic(config: dict, name: str, parent, previous, attachments: list):
+        '''
+            Compiles a dynamic menu. An unchanged dynamic menu is reused with its cached items.
+        '''
+        if previous is not None and previous.IsDynamic and previous.Config == config:
+            attachments.append((previous, parent))
+            return previous
+        dynamic = config[DYNAMIC_KEY]
+        template = dynamic.get("command")
+        if not dynamic.get("generator") or not isinstance(template, dict):
+            message = f"Dynamic menu '{name}' requires a 'generator' and a 'command' configuration."
+            logging.error(message)
+            raise Exception(message)
+        node = MenuNode(name, parent)
+        node.Config = config
+        node.Template = template
+        node.Dynamic = DynamicSource(dynamic["generator"], dynamic.get("ttl", DEFAULT_TTL), 
+            dynamic.get("pageSize", DEFAULT_PAGE_SIZE), dynamic.get("field"), dynamic.get("cwd"))
+        if previous is not None: node.Remember(previous.Cursor, previous.ScrollStart)
+        node.Entries.append(parent)
+        node.Update()
+        return node
+
+    def __attach(self, parent):
+        '''
+            Attaches a reused node to its new parent.
+        '''
+        self.Parent = parent
+        if parent is not None and self.Entries: self.Entries[0] = parent
+
+    def __unchanged(self, commands: dict) -> bool:
+        '''
+            Determines whether all commands referenced in the subtree are still the same instances.
+        '''
+        if self.IsLeaf: return commands.get(self.CommandName) is self.Command
+        return all(child.__unchanged(commands) for child in self.Children)
+
+    def __nodes(self):
+        '''
+            Iterates over the nodes of the subtree.
+        '''
+        yield self
+        for child in self.Children: yield from child.__nodes()
@@ -22,4 +22,6 @@
     Module to implement the navigation controls of the menu.
 """
 from .buttons import Navigation
-from .buttons import UP_CLICK, DOWN_CLICK, LEFT_CLICK, RIGHT_CLICK, SELECT_CLICK
+from .events import EventQueue, UP_CLICK, DOWN_CLICK, LEFT_CLICK, RIGHT_CLICK, SELECT_CLICK, PAGE_UP_CLICK, PAGE_DOWN_CLICK
+from .backends import InputBackend, GpioBackend, EvdevBackend, StdinBackend, SocketBackend, CreateBackend
+from .trace import Recorder, ReplayBackend
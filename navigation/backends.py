@@ -0,0 +1,360 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Input backends delivering navigation events to the Navigation class.
+"""
+import os
+import sys
+import time
+import socket
+import logging
+import threading
+from abc import ABC, abstractmethod
+from .events import UP_CLICK, DOWN_CLICK, LEFT_CLICK, RIGHT_CLICK, SELECT_CLICK, PAGE_UP_CLICK, PAGE_DOWN_CLICK, EVENT_NAMES
+from .debounce import Debouncer
+from runtime import RUNTIME_DIR, PrivateDirectory
+
+#region Globals
+GPIO_UP = 17
+GPIO_DOWN = 5
+GPIO_LEFT = 6
+GPIO_RIGHT = 22
+GPIO_SELECT = 18
+DEBOUNCE = 20                       # ms the level has to be stable to confirm a press
+INPUT_SOCKET = os.path.join(RUNTIME_DIR, "input")
+
+STDIN_KEYS = {
+    "w": UP_CLICK, "k": UP_CLICK, "\x1b[A": UP_CLICK,
+    "s": DOWN_CLICK, "j": DOWN_CLICK, "\x1b[B": DOWN_CLICK,
+    "a": LEFT_CLICK, "h": LEFT_CLICK, "\x1b[D": LEFT_CLICK,
+    "d": RIGHT_CLICK, "l": RIGHT_CLICK, "\x1b[C": RIGHT_CLICK,
+    "\n": SELECT_CLICK, "\r": SELECT_CLICK, " ": SELECT_CLICK,
+    "\x02": PAGE_UP_CLICK, "\x1b[5~": PAGE_UP_CLICK,
+    "\x06": PAGE_DOWN_CLICK, "\x1b[6~": PAGE_DOWN_CLICK
+}
+EVDEV_KEYS = {
+    "KEY_UP": UP_CLICK,
+    "KEY_DOWN": DOWN_CLICK,
+    "KEY_LEFT": LEFT_CLICK,
+    "KEY_RIGHT": RIGHT_CLICK,
+    "KEY_ENTER": SELECT_CLICK,
+    "KEY_KPENTER": SELECT_CLICK,
+    "KEY_SELECT": SELECT_CLICK,
+    "KEY_PAGEUP": PAGE_UP_CLICK,
+    "KEY_PAGEDOWN": PAGE_DOWN_CLICK
+}
+#endregion
+
+class InputBackend(ABC):
+    '''
+        The InputBackend class is the abstract base class for the sources of navigation events. A backend
+        calls the emit delegate passed to InputBackend.Start for each button press. 
+    '''
+    def __init__(self):
+        '''
+            Constructor - Creates a new instance of the InputBackend class.
+        '''
+        self._emit = None
+        super().__init__()
+
+    def IsHeld(self, eventType: int) -> bool:
+        '''
+            Determines whether the button for an event type is still held down. Used for auto repeat. Backends 
+            that cannot detect held buttons return False.
+            Parameters:
+                eventType:  int
+                            The event type, e.g. DOWN_CLICK
+        '''
+        return False
+
+    def Start(self, emit: callable):
+        '''
+            Starts delivering events.
+            Parameters:
+                emit:       callable
+                            Delegate called for each button press. The delegate has the following signature
+                            (eventType: int, timestamp: float) -> None, timestamp being time.monotonic()
+        '''
+        self._emit = emit
+        self._start()
+
+    @abstractmethod
+    def _start(self):
+        '''
+            Abstract for starting the backend. To be implemented in derived classes.
+        '''
+        pass
+
+    def Stop(self):
+        '''
+            Stops delivering events and releases the resources of the backend.
+        '''
+        pass
+
+    def _thread(self, target: callable, name: str):
+        '''
+            Starts a daemon thread for backends reading from a blocking source.
+        '''
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
+
+class GpioBackend(InputBackend):
+    '''
+        The GpioBackend class implements the interaction with the GPIO driven tactile buttons. Both edges are 
+        timestamped and debounced in software, so the press rate is not capped by a fixed bounce time.
+    '''
+    def __init__(self, pins: list=[GPIO_UP, GPIO_DOWN, GPIO_LEFT, GPIO_RIGHT, GPIO_SELECT], debounce: int=DEBOUNCE, 
+            debounceByPin: dict=None):
+        '''
+            Constructor - Creates a new instance of the GpioBackend class.
+            Parameters:
+                pins :      [int], optional
+                            Sepcify the GPIO pins that connect the tactile buttons: [up, down, left, right, select]. The defaults are
+                            [17, 5, 6, 22, 18]. Buttons on spare pins for page up and page down may be appended:
+                            [up, down, left, right, select, pageup, pagedown].
+                debounce:   int, optional
+                            Time in ms the level of a pin has to be stable to confirm a press. The default is 20ms 
+                debounceByPin: dict, optional
+                            Debounce time in ms per pin, overriding the default for switches that bounce longer.
+        '''
+        super().__init__()
+        if not SELECT_CLICK < len(pins) <= PAGE_DOWN_CLICK + 1:
+            message = f"Expected 5 to 7 GPIO pins (up, down, left, right, select, pageup, pagedown), got {pins}"
+            logging.error(message)
+            raise Exception(message)
+        import RPi.GPIO as GPIO
+        self.__gpio = GPIO
+        self.__pins = pins
+        self.__debouncer = Debouncer(
+            read=lambda pin: GPIO.input(pin) == GPIO.HIGH, 
+            pressed=self.__buttonPressEvent,
+            stable=debounce / 1000.0,
+            stableByPin={int(pin): ms / 1000.0 for pin, ms in (debounceByPin or {}).items()})
+
+    @property
+    def Debouncer(self) -> Debouncer:
+        ''' Gets the debouncer, e.g. to inspect the bounce statistics. '''
+        return self.__debouncer
+
+    def IsHeld(self, eventType: int) -> bool:
+        ''' Determines whether the button for an event type is still held down. '''
+        return self.__debouncer.IsPressed(self.__pins[eventType])
+
+    def _start(self):
+        '''
+            Configures the GPIO pins and registers the edge callback.
+        '''
+        GPIO = self.__gpio
+        GPIO.setwarnings(False)                                     # Ignore warning for now
+        GPIO.setmode(GPIO.BCM)                                      # Use physical pin numbering
+        for pin in self.__pins:
+            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)    # Set pin to be an input pin and set initial value to be pulled low (off)
+            GPIO.add_event_detect(pin, GPIO.BOTH,                   # Setup event on both edges, debounced in software
+                callback=self.__debouncer.Edge)
+
+    def Stop(self):
+        ''' Logs the bounce statistics and cleans up GPIO resources. '''
+        for pin, statistics in self.__debouncer.Statistics.items():
+            logging.info(f"Bounce statistics for GPIO {pin}: {statistics}")
+        self.__gpio.cleanup()
+
+    def __buttonPressEvent(self, channel: int, timestamp: float):
+        '''
+            Raised by the debouncer when a press on a tactile button has been confirmed. 
+            Parameters:
+                channel:    int
+                            The GPIO channel on which the click occured. 
+                timestamp:  float
+                            Time of the first edge of the press.
+        '''
+        self._emit(self.__pins.index(channel) if channel in self.__pins else -1, timestamp)
+
+class EvdevBackend(InputBackend):
+    '''
+        The EvdevBackend class reads key presses from a Linux input device, e.g. a USB keyboard or keypad. 
+        Requires the evdev package.
+    '''
+    def __init__(self, device: str, keys: dict = None):
+        '''
+            Constructor - Creates a new instance of the EvdevBackend class.
+            Parameters:
+                device:     str
+                            Path of the input device, e.g. /dev/input/event0
+                keys:       dict, optional
+                            Maps evdev key names to navigation events. Defaults to the arrow and enter keys.
+        '''
+        super().__init__()
+        import evdev
+        self.__evdev = evdev
+        self.__device = evdev.InputDevice(device)
+        self.__keys = keys or EVDEV_KEYS
+        self.__held = set()
+
+    def IsHeld(self, eventType: int) -> bool:
+        ''' Determines whether the key for an event type is still held down. '''
+        return eventType in self.__held
+
+    def _start(self):
+        ''' Starts the thread reading the input device. '''
+        self._thread(self.__read, "evdev")
+
+    def Stop(self):
+        ''' Closes the input device. '''
+        self.__device.close()
+
+    def __read(self):
+        '''
+            Thread entry point reading key events from the device.
+        '''
+        ecodes = self.__evdev.ecodes
+        try:
+            for event in self.__device.read_loop():
+                if event.type != ecodes.EV_KEY: continue
+                names = ecodes.KEY.get(event.code, [])
+                for name in names if isinstance(names, list) else [names]:
+                    if name not in self.__keys: continue
+                    eventType = self.__keys[name]
+                    if event.value == 1:
+                        self.__held.add(eventType)
+                        self._emit(eventType, time.monotonic())
+                    elif event.value == 0:
+                        self.__held.discard(eventType)
+                    break
+        except OSError:
+            pass
+
+class StdinBackend(InputBackend):
+    '''
+        The StdinBackend class reads navigation keys from standard input: w/a/s/d, h/j/k/l or the arrow keys 
+        and enter or space to select, page up/down or ctrl-b/ctrl-f to page. If standard input is a terminal 
+        it is switched to cbreak mode. 
+    '''
+    def __init__(self):
+        '''
+            Constructor - Creates a new instance of the StdinBackend class.
+        '''
+        super().__init__()
+        self.__terminal = None
+
+    def _start(self):
+        ''' Starts the thread reading standard input. '''
+        if sys.stdin.isatty():
+            import termios, tty
+            self.__terminal = termios.tcgetattr(sys.stdin.fileno())
+            tty.setcbreak(sys.stdin.fileno())
+        self._thread(self.__read, "stdin")
+
+    def Stop(self):
+        ''' Restores the terminal settings. '''
+        if self.__terminal is not None:
+            import termios
+            termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN, self.__terminal)
+            self.__terminal = None
+
+    def __read(self):
+        '''
+            Thread entry point reading standard input.
+        '''
+        fd = sys.stdin.fileno()
+        pending = ""
+        while True:
+            data = os.read(fd, 32)
+            if not data: break
+            pending += data.decode(errors="ignore")
+            while pending:
+                if pending[0] == "\x1b" and len(pending) < 3: break
+                length = 4 if pending[0] == "\x1b" and pending[2].isdigit() else 3
+                if pending[0] == "\x1b" and len(pending) < length: break
+                key = pending[:length] if pending[0] == "\x1b" else pending[0]
+                pending = pending[len(key):]
+                if key[0] != "\x1b": key = key.lower()
+                if key in STDIN_KEYS: self._emit(STDIN_KEYS[key], time.monotonic())
+
+class SocketBackend(InputBackend):
+    '''
+        The SocketBackend class receives navigation events from other local processes on a Unix datagram 
+        socket. Each datagram contains one or more event names (up, down, left, right, select, pageup, 
+        pagedown) separated by white space, e.g. 'echo down down select | socat - UNIX-SENDTO:$XDG_RUNTIME_DIR/controllerMenu-$UID/input'.
+        The socket is only accessible to the user running the menu.
+    '''
+    def __init__(self, path: str = INPUT_SOCKET):
+        '''
+            Constructor - Creates a new instance of the SocketBackend class.
+            Parameters:
+                path:       str, optional
+                            Path of the socket. Defaults to input in the private runtime directory.
+        '''
+        super().__init__()
+        self.__path = path
+        self.__socket = None
+
+    def _start(self):
+        ''' Binds the socket and starts the thread receiving events. '''
+        if os.path.dirname(self.__path) == RUNTIME_DIR: PrivateDirectory()
+        if os.path.exists(self.__path): os.unlink(self.__path)
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.__socket.bind(self.__path)
+        os.chmod(self.__path, 0o600)
+        self._thread(self.__receive, "inputSocket")
+
+    def Stop(self):
+        ''' Closes and removes the socket. '''
+        if self.__socket is not None: self.__socket.close()
+        if os.path.exists(self.__path): os.unlink(self.__path)
+
+    def __receive(self):
+        '''
+            Thread entry point receiving datagrams.
+        '''
+        while True:
+            try:
+                data = self.__socket.recv(1024)
+            except OSError:
+                break
+            for name in data.decode(errors="ignore").lower().split():
+                if name in EVENT_NAMES: self._emit(EVENT_NAMES[name], time.monotonic())
+                else: logging.warning("Unknown navigation event '%s' received on %s", name, self.__path)
+
+def CreateBackend(settings: dict) -> InputBackend:
+    '''
+        Creates the input backend described by the 'input' settings in controllerMenu.yaml.
+        Parameters:
+            settings:   dict
+                        The input settings. 'backend' is one of gpio (default), evdev, stdin, socket or replay.
+        Returns:
+            The input backend.
+    '''
+    settings = settings or {}
+    backend = settings.get("backend", "gpio")
+    if backend == "gpio": return GpioBackend(
+        pins=settings.get("pins", [GPIO_UP, GPIO_DOWN, GPIO_LEFT, GPIO_RIGHT, GPIO_SELECT]),
+        debounce=settings.get("debounce", DEBOUNCE),
+        debounceByPin=settings.get("debounceByPin"))
+    if backend == "evdev": return EvdevBackend(settings.get("device", "/dev/input/event0"))
+    if backend == "stdin": return StdinBackend()
+    if backend == "socket": return SocketBackend(settings.get("socket", INPUT_SOCKET))
+    if backend == "replay":
+        from .trace import ReplayBackend
+        return ReplayBackend(settings["trace"], speed=settings.get("speed", 1.0))
+    message = f"Unknown input backend '{backend}'. Expect one of gpio, evdev, stdin, socket or replay."
+    logging.error(message)
+    raise Exception(message)
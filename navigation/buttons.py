@@ -18,79 +18,134 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-import RPi.GPIO as GPIO # Import Raspberry Pi GPIO library
+import time
 import logging
+import threading
+from .events import EventQueue, UP_CLICK, DOWN_CLICK, LEFT_CLICK, RIGHT_CLICK, SELECT_CLICK
+from diagnostics.metrics import Counter, Histogram
+from .backends import InputBackend, GpioBackend
 
 #region Globals
-GPIO_UP = 17
-GPIO_DOWN = 5
-GPIO_LEFT = 6
-GPIO_RIGHT = 22
-GPIO_SELECT = 18
-DEBOUNCE = 250
+REPEAT_DELAY = 0.4                  # time a key has to be held before it starts repeating
+REPEAT_INTERVAL = 0.15              # initial interval between repeats
+REPEAT_MIN_INTERVAL = 0.03          # fastest repeat interval
+REPEAT_ACCELERATION = 0.85          # factor applied to the repeat interval after each repeat
+CLICK_TYPES = ["up", "down", "left", "right", "select", "page up", "page down"]
 
-UP_CLICK = 0
-DOWN_CLICK = 1
-LEFT_CLICK = 2
-RIGHT_CLICK = 3
-SELECT_CLICK = 4
+INPUT_EVENTS = Counter("pimenu_input_events_total", "Navigation events received from the input backend.", ("event", ))
+INPUT_DROPPED = Counter("pimenu_input_dropped_total", "Navigation events dropped because the queue was full.")
+INPUT_QUEUE_SECONDS = Histogram("pimenu_input_queue_seconds", "Time from a press to its delivery to the menu.")
 #endregion
 
 class Navigation(object):
     '''
-        The Navigation class implments the interaction with the GPIO driven tactile 
-        buttons. It configures the appropriate GPIO pints and setsup the callback for 
-        when a button is pressed
+        The Navigation class implments the interaction with the navigation buttons. Presses are reported by 
+        an input backend (the GPIO driven tactile buttons by default), queued and delivered to the callback 
+        on a separate dispatch thread, so no press is lost while the display redraws.
     '''
-    def __init__(self, 
-            callback: callable,
-            pins: list=[GPIO_UP, GPIO_DOWN, GPIO_LEFT, GPIO_RIGHT, GPIO_SELECT], 
-            debounce: int=DEBOUNCE):
+    def __init__(self, callback: callable, backend: InputBackend = None, recorder = None):
         '''
             Constructor - Creates a new instance of the Navigation class.
             Parameters:
-                pins :      [int], optional
-                            Sepcify the GPIO pins that connect the tactile buttons: [up, down, left, right, select]. The defaults are
-                            [17, 5, 6, 22, 18]
-                debounce:   int, optional
-                            Specify a debounce time to prevent multiple firings when a button is clicked. The default is 250ms 
+                callback:   callable
+                            Delegate invoked on the dispatch thread for each navigation event, in the order of the 
+                            presses. The delegate should have the following signature (eventType: int, count: int) -> None. 
+                            It should return quickly; presses are not coalesced here, the consumer coalesces them if 
+                            it falls behind.
+                backend:    InputBackend, optional
+                            The source of the button presses. Defaults to the GPIO buttons on the default pins.
+                recorder:   Recorder, optional
+                            If specified, all button presses are written to the recorder's trace.  
         '''
-        self.__pins = pins
-        self.__debounce = debounce
         self.__callback = callback
-        GPIO.setwarnings(False)                                     # Ignore warning for now
-        GPIO.setmode(GPIO.BCM)                                      # Use physical pin numbering
-        for pin in self.__pins:
-            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)    # Set pin to be an input pin and set initial value to be pulled low (off)
-            GPIO.add_event_detect(pin, GPIO.RISING,                 # Setup event on pin 10 rising edge
-                callback=self.__buttonPressEvent, bouncetime=self.__debounce)
+        self.__backend = backend or GpioBackend()
+        self.__recorder = recorder
+        self.__queue = EventQueue()
+        self.__held = None                                          # (eventType, next repeat, interval) of the held key
+        self.__lock = threading.Lock()
+        self.__stopping = False
+        self.__dispatchThread = threading.Thread(target=self.__dispatch, name="navigation", daemon=True)
 
-    def __buttonPressEvent(self, channel: int):
+    @property
+    def Backend(self) -> InputBackend:
+        ''' Gets the input backend. '''
+        return self.__backend
+
+    @property
+    def Queue(self) -> EventQueue:
+        ''' Gets the queue of pending navigation events. '''
+        return self.__queue
+
+    def Start(self):
+        '''
+            Starts dispatching events and the input backend. Events may be delivered before Start returns.
+        '''
+        self.__dispatchThread.start()
+        self.__backend.Start(self.__inputEvent)
+
+    def Stop(self):
+        '''
+            Stops the input backend and the dispatch thread and closes the recorder. Events still queued are 
+            delivered before the dispatch thread exits.
         '''
-            Raised when a tactile button on the GPIO channels is pressed. In turn raises the callback passed into the constructor with 
-            the argument UP_ClICK, DOWN_CLICK, LEFT_CLICK, RIGHT_CLICK, SELECT_CLICK as appropriate. 
+        if self.__stopping: return
+        self.__stopping = True
+        self.__backend.Stop()
+        self.__queue.Close()
+        thread = self.__dispatchThread
+        if thread.is_alive() and thread is not threading.current_thread(): thread.join()
+        if self.__recorder is not None: self.__recorder.Close()
+
+    def __inputEvent(self, eventType: int, timestamp: float):
+        '''
+            Called by the input backend when a button is pressed. Queues the UP_ClICK, DOWN_CLICK, LEFT_CLICK, 
+            RIGHT_CLICK, SELECT_CLICK event and returns immediately. 
             Parameters:
-                channel:    int
-                            The GPIO channel on which the click occured. 
+                eventType:  int
+                            The event type.
+                timestamp:  float
+                            The time of the press (time.monotonic)
         '''
-        clickType = "unknown"
-        if(channel == self.__pins[0]): clickType = "up"
-        if(channel == self.__pins[1]): clickType = "down"
-        if(channel == self.__pins[2]): clickType = "left"
-        if(channel == self.__pins[3]): clickType = "right"
-        if(channel == self.__pins[4]): clickType = "select"  
-        logging.info(f"Navigation event received on channel: {channel}; interpreted as '{clickType}' click")
+        clickType = CLICK_TYPES[eventType] if 0 <= eventType < len(CLICK_TYPES) else "unknown"
+        logging.debug("Navigation event received; interpreted as '%s' click", clickType)
 
-        if(channel == self.__pins[0]): self.__callback(UP_CLICK)
-        elif(channel == self.__pins[1]): self.__callback(DOWN_CLICK)
-        elif(channel == self.__pins[2]): self.__callback(LEFT_CLICK)
-        elif(channel == self.__pins[3]): self.__callback(RIGHT_CLICK)
-        elif(channel == self.__pins[4]): self.__callback(SELECT_CLICK)
-        else: self.__callback(-1)
+        if self.__recorder is not None: self.__recorder.Record(eventType, timestamp)
+        if eventType in (UP_CLICK, DOWN_CLICK):
+            with self.__lock: self.__held = (eventType, timestamp + REPEAT_DELAY, REPEAT_INTERVAL)
+        INPUT_EVENTS.Inc(labels=(clickType, ))
+        if not self.__queue.Put(eventType, timestamp): INPUT_DROPPED.Inc()
 
-    def __del__(self):
+    def __dispatch(self):
         '''
-            Destructor - cleans up GPIO resources when the object is destroyed. 
+            Dispatch thread entry point. Delivers the queued events to the callback and generates the auto 
+            repeat events for a held UP or DOWN key until the navigation is stopped. The repeat interval shrinks 
+            the longer the key is held.
         '''
-        GPIO.cleanup()                                              # Clean up
+        while True:
+            with self.__lock: held = self.__held
+            timeout = None if held is None else max(0, held[1] - time.monotonic())
+            event = self.__queue.Get(timeout)
+            if event is not None:
+                INPUT_QUEUE_SECONDS.Observe(time.monotonic() - event.timestamp)
+                try:
+                    self.__callback(event.type, event.count)
+                except Exception as e:
+                    logging.exception(e)
+                self.__queue.Done()
+                continue
+            if self.__stopping: break
+            if held is None: continue
+            with self.__lock:
+                if self.__held is not held: continue
+                if not self.__backend.IsHeld(held[0]):
+                    self.__held = None
+                    continue
+                interval = held[2]
+                self.__held = (held[0], time.monotonic() + interval, max(REPEAT_MIN_INTERVAL, interval * REPEAT_ACCELERATION))
+            self.__queue.Put(held[0], time.monotonic())
 
+    def __del__(self):
+        '''
+            Destructor - releases the input backend when the object is destroyed. 
+        '''
+        self.Stop()
@@ -0,0 +1,160 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Timestamp based software debouncing of push buttons.
+"""
+import time
+import bisect
+import threading
+
+BURST_BUCKETS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1]
+
+class BounceStatistics(object):
+    '''
+        The BounceStatistics class collects the bounce behaviour of a single button. A burst is the sequence of 
+        edges between the first edge and the point the level has been stable for the debounce period.
+    '''
+    def __init__(self):
+        '''
+            Constructor - Creates a new instance of the BounceStatistics class.
+        '''
+        self.Edges = 0              # total number of edges seen
+        self.Presses = 0            # confirmed presses
+        self.Releases = 0           # confirmed releases
+        self.Glitches = 0           # bursts that ended in the level they started with
+        self.MaxBurst = 0.0         # longest burst (first to last edge) in seconds
+        self.Bursts = [0] * (len(BURST_BUCKETS) + 1)
+
+    def Recommend(self, margin: float = 1.5, minimum: float = 0.002) -> float:
+        '''
+            Recommends a debounce period based on the longest burst observed.
+            Parameters:
+                margin:     float, optional
+                            Factor applied to the longest burst. 
+                minimum:    float, optional
+                            Lower bound of the recommendation in seconds.
+            Returns:
+                The recommended stable period in seconds.
+        '''
+        return max(minimum, self.MaxBurst * margin)
+
+    def __str__(self) -> str:
+        buckets = " ".join(f"<{b*1000:g}ms:{n}" for b, n in zip(BURST_BUCKETS, self.Bursts)) + f" >:{self.Bursts[-1]}"
+        return (f"edges {self.Edges}, presses {self.Presses}, releases {self.Releases}, glitches {self.Glitches}, " + 
+            f"max burst {self.MaxBurst*1000:.2f}ms, bursts [{buckets}], recommended {self.Recommend()*1000:.1f}ms")
+
+class Debouncer(object):
+    '''
+        The Debouncer class confirms button presses from raw edge timestamps. Each edge restarts the stable period 
+        of its pin; once the level has not changed for the stable period, the level is read and a press (or release)
+        is confirmed. Presses are reported with the timestamp of the first edge, so the debounce period does not 
+        show up as input latency in the event timestamps. 
+    '''
+    def __init__(self, read: callable, pressed: callable, stable: float = 0.02, stableByPin: dict = None):
+        '''
+            Constructor - Creates a new instance of the Debouncer class.
+            Parameters:
+                read:       callable
+                            Delegate returning the current level of a pin: (pin: int) -> bool
+                pressed:    callable
+                            Delegate called for each confirmed press: (pin: int, timestamp: float) -> None
+                stable:     float, optional
+                            Time in seconds the level has to be stable to confirm a press. Defaults to 20ms.
+                stableByPin: dict, optional
+                            Stable period per pin, overriding the default. 
+        '''
+        self.__read = read
+        self.__pressed = pressed
+        self.__stable = stable
+        self.__stableByPin = stableByPin or {}
+        self.__levels = {}                  # pin -> confirmed level
+        self.__bursts = {}                  # pin -> [first edge, last edge, deadline]
+        self.__statistics = {}
+        self.__condition = threading.Condition()
+        self.__thread = threading.Thread(target=self.__confirm, name="debounce", daemon=True)
+        self.__thread.start()
+
+    @property
+    def Statistics(self) -> dict:
+        ''' Gets the BounceStatistics per pin. '''
+        return self.__statistics
+
+    def Edge(self, pin: int, timestamp: float = None):
+        '''
+            Records an edge on a pin. Call from the GPIO edge callback for both rising and falling edges.
+            Parameters:
+                pin:        int
+                            The pin on which the edge occured.
+                timestamp:  float, optional
+                            Time of the edge (time.monotonic). Defaults to now.
+        '''
+        if timestamp is None: timestamp = time.monotonic()
+        with self.__condition:
+            statistics = self.__statistics.get(pin)
+            if statistics is None:
+                statistics = BounceStatistics()
+                self.__statistics[pin] = statistics
+            statistics.Edges += 1
+            deadline = timestamp + self.__stableByPin.get(pin, self.__stable)
+            burst = self.__bursts.get(pin)
+            if burst is None: self.__bursts[pin] = [timestamp, timestamp, deadline]
+            else:
+                burst[1] = timestamp
+                burst[2] = deadline
+            self.__condition.notify()
+
+    def IsPressed(self, pin: int) -> bool:
+        '''
+            Gets the confirmed (debounced) state of a pin.
+        '''
+        return self.__levels.get(pin, False)
+
+    def __confirm(self):
+        '''
+            Thread entry point confirming the level of pins whose stable period has elapsed.
+        '''
+        while True:
+            confirmed = []
+            with self.__condition:
+                if not self.__bursts: self.__condition.wait()
+                now = time.monotonic()
+                wakeup = None
+                for pin, burst in list(self.__bursts.items()):
+                    if burst[2] > now:
+                        wakeup = burst[2] if wakeup is None else min(wakeup, burst[2])
+                        continue
+                    del self.__bursts[pin]
+                    level = bool(self.__read(pin))
+                    statistics = self.__statistics[pin]
+                    duration = burst[1] - burst[0]
+                    statistics.MaxBurst = max(statistics.MaxBurst, duration)
+                    statistics.Bursts[bisect.bisect_left(BURST_BUCKETS, duration)] += 1
+                    if level == self.__levels.get(pin, False):
+                        statistics.Glitches += 1
+                        continue
+                    self.__levels[pin] = level
+                    if level:
+                        statistics.Presses += 1
+                        confirmed.append((pin, burst[0]))
+                    else:
+                        statistics.Releases += 1
+                if not confirmed and wakeup is not None: self.__condition.wait(wakeup - now)
+            for pin, timestamp in confirmed: self.__pressed(pin, timestamp)
@@ -0,0 +1,139 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import threading
+from collections import deque, namedtuple
+
+#region Globals
+UP_CLICK = 0
+DOWN_CLICK = 1
+LEFT_CLICK = 2
+RIGHT_CLICK = 3
+SELECT_CLICK = 4
+PAGE_UP_CLICK = 5
+PAGE_DOWN_CLICK = 6
+
+EVENT_NAMES = {
+    "up": UP_CLICK,
+    "down": DOWN_CLICK,
+    "left": LEFT_CLICK,
+    "right": RIGHT_CLICK,
+    "select": SELECT_CLICK,
+    "pageup": PAGE_UP_CLICK,
+    "pagedown": PAGE_DOWN_CLICK
+}
+#endregion
+
+InputEvent = namedtuple("InputEvent", ["type", "timestamp", "count"])
+
+class EventQueue(object):
+    '''
+        The EventQueue class is a bounded queue of timestamped navigation events between the input thread and
+        the thread processing the events. Consecutive events of a coalescable type are merged into a single 
+        event with a count, so a burst of presses results in one multi-step move.
+    '''
+    def __init__(self, coalesce: tuple = (), maxlen: int = 32):
+        '''
+            Constructor - Creates a new instance of the EventQueue class.
+            Parameters:
+                coalesce:   tuple(int), optional
+                            Event types that are merged with a preceding queued event of the same type.
+                maxlen:     int, optional
+                            Maximum number of queued events. Events arriving at a full queue are dropped.
+        '''
+        self.__coalesce = coalesce
+        self.__maxlen = maxlen
+        self.__events = deque()
+        self.__condition = threading.Condition()
+        self.__dropped = 0
+        self.__unfinished = 0
+        self.__closed = False
+
+    @property
+    def Dropped(self) -> int:
+        ''' Gets the number of events dropped because the queue was full. '''
+        return self.__dropped
+
+    def Done(self):
+        '''
+            Called by the consumer once an event returned by EventQueue.Get has been processed.
+        '''
+        with self.__condition:
+            self.__unfinished -= 1
+            if self.__unfinished <= 0: self.__condition.notify_all()
+
+    def Join(self, timeout: float = None) -> bool:
+        '''
+            Waits until all queued events have been processed.
+            Parameters:
+                timeout:    float, optional
+                            Maximum time to wait in seconds. Waits indefinitely if None.
+            Returns:
+                True if all events have been processed, False if the timeout expired.
+        '''
+        with self.__condition:
+            return self.__condition.wait_for(lambda: self.__unfinished <= 0, timeout)
+
+    def Get(self, timeout: float = None) -> InputEvent:
+        '''
+            Removes and returns the oldest event, waiting for one to arrive if necessary.
+            Parameters:
+                timeout:    float, optional
+                            Maximum time to wait in seconds. Waits indefinitely if None.
+            Returns:
+                The event, or None if the timeout expired or the queue is closed and empty.
+        '''
+        with self.__condition:
+            if not self.__events and not self.__closed: self.__condition.wait(timeout)
+            return self.__events.popleft() if self.__events else None
+
+    def Put(self, eventType: int, timestamp: float, count: int = 1) -> bool:
+        '''
+            Adds an event to the queue.
+            Parameters:
+                eventType:  int
+                            The type of event, e.g. UP_CLICK
+                timestamp:  float
+                            The time the event occured (time.monotonic)
+                count:      int, optional
+                            Number of repetitions the event represents.
+            Returns:
+                False if the event was dropped, True otherwise.
+        '''
+        with self.__condition:
+            if self.__events and eventType in self.__coalesce and self.__events[-1].type == eventType:
+                last = self.__events[-1]
+                self.__events[-1] = InputEvent(eventType, last.timestamp, last.count + count)
+            elif len(self.__events) < self.__maxlen:
+                self.__events.append(InputEvent(eventType, timestamp, count))
+                self.__unfinished += 1
+            else:
+                self.__dropped += 1
+                return False
+            self.__condition.notify()
+            return True
+
+    def Close(self):
+        '''
+            Closes the queue. EventQueue.Get no longer waits and returns None once the queued events are taken.
+        '''
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
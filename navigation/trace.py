@@ -0,0 +1,123 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Recording and replay of navigation event traces.
+"""
+import time
+import logging
+import threading
+from .events import EVENT_NAMES
+from .backends import InputBackend
+
+TRACE_HEADER = "# piControllerMenu input trace v1"
+EVENT_TYPES = {v: k for k, v in EVENT_NAMES.items()}
+
+class Recorder(object):
+    '''
+        The Recorder class writes timestamped navigation events to a trace file. Each line contains the 
+        seconds since the start of the recording and the event name, e.g. '1.250000 down'.
+    '''
+    def __init__(self, path: str):
+        '''
+            Constructor - Creates a new instance of the Recorder class.
+            Parameters:
+                path:       str
+                            Path of the trace file. An existing file is overwritten.
+        '''
+        self.__file = open(path, "w", buffering=1)
+        self.__file.write(TRACE_HEADER + "\n")
+        self.__start = None
+        self.__lock = threading.Lock()
+        logging.info(f"Recording navigation events to {path}")
+
+    def Close(self):
+        ''' Closes the trace file. '''
+        with self.__lock:
+            if not self.__file.closed: self.__file.close()
+
+    def Record(self, eventType: int, timestamp: float):
+        '''
+            Records an event.
+            Parameters:
+                eventType:  int
+                            The event type, e.g. DOWN_CLICK
+                timestamp:  float
+                            The time the event occured (time.monotonic)
+        '''
+        with self.__lock:
+            if self.__file.closed or eventType not in EVENT_TYPES: return
+            if self.__start is None: self.__start = timestamp
+            self.__file.write(f"{timestamp - self.__start:.6f} {EVENT_TYPES[eventType]}\n")
+
+class ReplayBackend(InputBackend):
+    '''
+        The ReplayBackend class feeds a recorded trace back as navigation events, either at the original pace or 
+        accelerated. Combined with the headless display this turns a recorded operator session into a reproducible
+        benchmark.
+    '''
+    def __init__(self, path: str, speed: float = 1.0, completed: callable = None):
+        '''
+            Constructor - Creates a new instance of the ReplayBackend class.
+            Parameters:
+                path:       str
+                            Path of the trace file written by the Recorder class.
+                speed:      float, optional
+                            Replay speed factor. 1.0 replays at the original pace, 10.0 ten times faster and 0 
+                            as fast as possible. 
+                completed:  callable, optional
+                            Delegate called once all events have been replayed. The delegate receives the number
+                            of events and the elapsed time in seconds: (count: int, elapsed: float) -> None
+        '''
+        super().__init__()
+        self.__events = []
+        self.__speed = speed
+        self.__stopped = threading.Event()
+        self.Completed = completed
+        with open(path) as file:
+            for line in file:
+                if line.startswith("#") or not line.strip(): continue
+                offset, name = line.split()
+                self.__events.append((float(offset), EVENT_NAMES[name]))
+
+    def _start(self):
+        ''' Starts the replay thread. '''
+        self._thread(self.__replay, "replay")
+
+    def Stop(self):
+        ''' Stops the replay. '''
+        self.__stopped.set()
+
+    def __replay(self):
+        '''
+            Thread entry point replaying the trace.
+        '''
+        start = time.monotonic()
+        count = 0
+        for offset, eventType in self.__events:
+            if self.__speed > 0:
+                delay = start + offset / self.__speed - time.monotonic()
+                if delay > 0 and self.__stopped.wait(delay): break
+            if self.__stopped.is_set(): break
+            self._emit(eventType, time.monotonic())
+            count += 1
+        elapsed = time.monotonic() - start
+        logging.info(f"Replayed {count} navigation events in {elapsed:.3f}s")
+        if self.Completed is not None: self.Completed(count, elapsed)
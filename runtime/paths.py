@@ -0,0 +1,47 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Location of the sockets through which local processes talk to the menu.
+"""
+import os
+import stat
+import logging
+
+RUNTIME_DIR = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp", f"controllerMenu-{os.getuid()}")
+
+def PrivateDirectory(path: str = RUNTIME_DIR) -> str:
+    '''
+        Creates a directory only the user running the menu can access. An existing directory is only accepted if 
+        it is owned by that user and is not a symbolic link, so another local user cannot plant it in /tmp.
+        Parameters:
+            path:       str, optional
+                        Path of the directory. Defaults to RUNTIME_DIR.
+        Returns:
+            The path of the directory.
+    '''
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        message = f"{path} is not a directory owned by the menu user."
+        logging.error(message)
+        raise Exception(message)
+    if stat.S_IMODE(st.st_mode) != 0o700: os.chmod(path, 0o700)
+    return path
@@ -0,0 +1,305 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import signal
+import asyncio
+import logging
+import functools
+import threading
+import concurrent.futures
+
+class Timer(object):
+    '''
+        The Timer class represents a function called periodically on the event loop. Ticks are scheduled
+        against the loop clock, so the period does not drift with the duration of the calls.
+    '''
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float, callback: callable, args: tuple):
+        '''
+            Constructor - Creates and starts a new instance of the Timer class. Use Runtime.Every to create timers.
+            Parameters:
+                loop:       AbstractEventLoop
+                            The event loop.
+                interval:   float
+                            Period in seconds.
+                callback:   callable
+                            The function to call.
+                args:       tuple
+                            Arguments passed to the function.
+        '''
+        self.__loop = loop
+        self.__interval = interval
+        self.__callback = callback
+        self.__args = args
+        self.__next = loop.time() + interval
+        self.__handle = loop.call_at(self.__next, self.__tick)
+
+    @property
+    def Active(self) -> bool:
+        ''' Gets whether the timer is still running. '''
+        return self.__handle is not None
+
+    def Cancel(self):
+        '''
+            Stops the timer. Must be called on the event loop thread.
+        '''
+        if self.__handle is not None: self.__handle.cancel()
+        self.__handle = None
+
+    def __tick(self):
+        '''
+            Calls the function and schedules the next tick, skipping ticks that have already passed.
+        '''
+        try:
+            self.__callback(*self.__args)
+        except Exception as e:
+            logging.exception(e)
+        if self.__handle is None: return
+        now = self.__loop.time()
+        self.__next += self.__interval
+        if self.__next < now: self.__next = now + self.__interval
+        self.__handle = self.__loop.call_at(self.__next, self.__tick)
+
+class Runtime(object):
+    '''
+        The Runtime class implements the event loop owning the menu state. The menu, the display and the timers 
+        are only touched on the loop thread. Other threads (input, file watching, built-in data collection) hand 
+        work to the loop with Call, Invoke or Spawn, and blocking work is moved off the loop with Submit. 
+        SIGTERM and SIGINT stop the loop and run the registered shutdown hooks.
+    '''
+    def __init__(self, workers: int = 2):
+        '''
+            Constructor - Creates a new instance of the Runtime class. The thread creating the instance is 
+            considered the loop thread until Run is called.
+            Parameters:
+                workers:    int, optional
+                            Number of executor threads for blocking work such as shell commands.
+        '''
+        self.__loop = asyncio.new_event_loop()
+        self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="executor")
+        self.__loop.set_default_executor(self.__executor)
+        self.__owner = threading.get_ident()
+        self.__shutdown = []
+        self.__closed = False
+        self.__invoked = set()                                      # Invoke calls not run by the loop yet
+        self.__invokedLock = threading.Lock()
+
+    #region Property implementations
+    @property
+    def IsLoopThread(self) -> bool:
+        ''' Gets whether the calling thread is the loop thread. '''
+        return threading.get_ident() == self.__owner
+
+    @property
+    def Loop(self) -> asyncio.AbstractEventLoop:
+        ''' Gets the event loop. '''
+        return self.__loop
+    #endregion
+
+    #region Public method implementations
+    def After(self, delay: float, callback: callable, *args) -> asyncio.TimerHandle:
+        '''
+            Calls a function once after a delay. Must be called on the loop thread.
+            Parameters:
+                delay:      float
+                            Delay in seconds.
+                callback:   callable
+                            The function to call.
+                args:       
+                            Arguments passed to the function.
+            Returns:
+                The handle to cancel the call.
+        '''
+        return self.__loop.call_later(delay, callback, *args)
+
+    def Call(self, callback: callable, *args):
+        '''
+            Schedules a function to be called on the loop thread. Returns immediately; can be called from any thread.
+            Parameters:
+                callback:   callable
+                            The function to call.
+                args:       
+                            Arguments passed to the function.
+        '''
+        if self.__closed: return
+        try:
+            self.__loop.call_soon_threadsafe(self.__guard, callback, args)
+        except RuntimeError:
+            pass
+
+    def Every(self, interval: float, callback: callable, *args) -> Timer:
+        '''
+            Calls a function periodically. Must be called on the loop thread.
+            Parameters:
+                interval:   float
+                            Period in seconds.
+                callback:   callable
+                            The function to call.
+                args:       
+                            Arguments passed to the function.
+            Returns:
+                The Timer; call Timer.Cancel to stop it.
+        '''
+        return Timer(self.__loop, interval, callback, args)
+
+    def Invoke(self, callback: callable, *args, **kwargs):
+        '''
+            Calls a function on the loop thread and waits for its result. Called on the loop thread, the function 
+            is called directly. After the loop has been closed the call is dropped; a call still queued when the 
+            loop closes returns None instead of waiting forever.
+            Parameters:
+                callback:   callable
+                            The function to call.
+                args:       
+                            Arguments passed to the function.
+            Returns:
+                The result of the function.
+        '''
+        if self.IsLoopThread: return callback(*args, **kwargs)
+        if self.__closed: return None
+        future = concurrent.futures.Future()
+        def invoke():
+            with self.__invokedLock: self.__invoked.discard(future)
+            if not future.set_running_or_notify_cancel(): return
+            try:
+                future.set_result(callback(*args, **kwargs))
+            except BaseException as e:                              # pylint: disable=W0703
+                future.set_exception(e)
+        with self.__invokedLock: self.__invoked.add(future)
+        try:
+            self.__loop.call_soon_threadsafe(invoke)
+        except RuntimeError:
+            with self.__invokedLock: self.__invoked.discard(future)
+            return None
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            return None
+
+    def OnShutdown(self, callback: callable):
+        '''
+            Registers a function called on the loop thread once the loop has stopped. Hooks are called in reverse 
+            order of registration.
+            Parameters:
+                callback:   callable
+                            The function to call. The function does not take any arguments.
+        '''
+        self.__shutdown.append(callback)
+
+    def Run(self):
+        '''
+            Runs the event loop on the calling thread until Stop is called or SIGTERM or SIGINT is received, then 
+            runs the shutdown hooks and closes the loop.
+        '''
+        self.__owner = threading.get_ident()
+        asyncio.set_event_loop(self.__loop)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self.__loop.add_signal_handler(signum, self.__signal, signum)
+            except (ValueError, RuntimeError, NotImplementedError):
+                pass                                                # not the main thread
+        try:
+            self.__loop.run_forever()
+        finally:
+            for callback in reversed(self.__shutdown):
+                try:
+                    callback()
+                except Exception as e:
+                    logging.exception(e)
+            tasks = [task for task in asyncio.all_tasks(self.__loop) if not task.done()]
+            for task in tasks: task.cancel()
+            if tasks: self.__loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.__closed = True
+            self.__loop.run_until_complete(asyncio.sleep(0))        # run calls scheduled before closing
+            self.__executor.shutdown(wait=False)
+            self.__loop.close()
+            with self.__invokedLock: invoked, self.__invoked = self.__invoked, set()
+            for future in invoked: future.cancel()
+
+    def Spawn(self, factory: callable, *args):
+        '''
+            Starts a coroutine as a task on the loop. Returns immediately; can be called from any thread.
+            Parameters:
+                factory:    callable
+                            Coroutine function creating the coroutine.
+                args:       
+                            Arguments passed to the coroutine function.
+        '''
+        self.Call(self.__spawn, factory, args)
+
+    def Stop(self):
+        '''
+            Stops the loop. Can be called from any thread; Run returns once the shutdown hooks have run.
+        '''
+        if self.__closed: return
+        try:
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+        except RuntimeError:
+            pass
+
+    def Submit(self, callback: callable, *args, **kwargs) -> asyncio.Future:
+        '''
+            Runs a blocking function on an executor thread. Must be called on the loop thread. Exceptions are 
+            logged.
+            Parameters:
+                callback:   callable
+                            The blocking function.
+                args:       
+                            Arguments passed to the function.
+            Returns:
+                An awaitable future for the result.
+        '''
+        future = self.__loop.run_in_executor(None, functools.partial(callback, *args, **kwargs))
+        future.add_done_callback(Runtime.__logException)
+        return future
+    #endregion
+
+    #region Private method implementations
+    def __guard(self, callback: callable, args: tuple):
+        '''
+            Calls a function scheduled with Call, logging exceptions.
+        '''
+        try:
+            callback(*args)
+        except Exception as e:
+            logging.exception(e)
+
+    def __signal(self, signum: int):
+        '''
+            Signal handler stopping the loop.
+        '''
+        logging.info(f"Received signal {signum}, shutting down")
+        self.__loop.stop()
+
+    def __spawn(self, factory: callable, args: tuple):
+        '''
+            Creates the task for a coroutine started with Spawn.
+        '''
+        task = self.__loop.create_task(factory(*args))
+        task.add_done_callback(Runtime.__logException)
+
+    @staticmethod
+    def __logException(future: asyncio.Future):
+        '''
+            Logs the exception of a completed future, if any.
+        '''
+        if future.cancelled(): return
+        e = future.exception()
+        if e is not None: logging.error("Background task failed", exc_info=e)
+    #endregion
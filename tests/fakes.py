@@ -0,0 +1,66 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Stand-ins for the fonts and the display used by the tests. The font has a fixed advance so layouts can be 
+    computed by hand and does not depend on the TrueType support of the installed Pillow.
+"""
+
+class FixedFont(object):
+    '''
+        Font with an advance of 6 pixels per character and a height of 10 pixels.
+    '''
+    def getsize(self, text: str) -> (int, int):
+        return (6 * len(text), 10)
+
+    def getmetrics(self) -> (int, int):
+        return (8, 2)
+
+class FakeDraw(object):
+    '''
+        Drawing context recording the text drawn.
+    '''
+    def __init__(self):
+        self.Texts = []
+
+    def text(self, position: tuple, text: str, font = None, fill = None):
+        self.Texts.append((position, text))
+
+    def rectangle(self, box, outline = None, fill = None):
+        pass
+
+class FakeDisplay(object):
+    '''
+        Display recording the frames drawn by a built-in command.
+    '''
+    def __init__(self, width: int = 160, height: int = 128):
+        self.Dimensions = (width, height)
+        self.Font = FixedFont()
+        self.SmallFont = FixedFont()
+        self.SharedCanvas = None
+        self.ExternalCallback = None
+        self.StopCommand = False
+        self.Frames = []
+
+    def DrawImage(self, image, boxes: list = None):
+        self.Frames.append(boxes)
+
+    def DrawMenu(self, items: list = None):
+        pass
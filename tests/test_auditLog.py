@@ -0,0 +1,84 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the append-only audit log.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from audit import AuditLog, AuditEntry, MAX_OUTPUT
+
+def entry(number: int, command: str = "uptime") -> AuditEntry:
+    return AuditEntry(1000.0 + number, "System/Uptime", command, 0.5, number, "output %d" % number)
+
+class TestAuditLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_newest_first(self):
+        log = AuditLog(self.directory, flushInterval=60)
+        for number in range(5): log.Record(entry(number, "uptime" if number % 2 else "df -h"))
+        self.assertEqual([e.code for e in log.Last(3)], [4, 3, 2])
+        log.Stop()
+        self.assertEqual(AuditLog.Read(self.directory, 10), [entry(n, "uptime" if n % 2 else "df -h") for n in range(4, -1, -1)])
+        self.assertEqual([e.code for e in AuditLog.Read(self.directory, 10, "uptime")], [3, 1])
+
+    def test_rotation_keeps_segments(self):
+        log = AuditLog(self.directory, segmentSize=1, segments=2, flushInterval=60)
+        for number in range(5): log.Record(entry(number))
+        log.Stop()
+        self.assertEqual(sorted(os.listdir(self.directory)), 
+            ["audit-000004.idx", "audit-000004.log", "audit-000005.idx", "audit-000005.log"])
+        self.assertEqual([e.code for e in AuditLog.Read(self.directory, 10)], [4, 3])
+
+    def test_reopen_appends_to_last_segment(self):
+        log = AuditLog(self.directory, flushInterval=60)
+        log.Record(entry(1))
+        log.Stop()
+        log = AuditLog(self.directory, flushInterval=60)
+        log.Record(entry(2))
+        log.Stop()
+        self.assertEqual([e.code for e in AuditLog.Read(self.directory, 10)], [2, 1])
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_torn_record_is_skipped(self):
+        log = AuditLog(self.directory, flushInterval=60)
+        for number in range(2): log.Record(entry(number))
+        log.Stop()
+        path = os.path.join(self.directory, "audit-000001.log")
+        os.truncate(path, os.path.getsize(path) - 1)
+        self.assertEqual([e.code for e in AuditLog.Read(self.directory, 10)], [0])
+
+    def test_output_is_truncated(self):
+        log = AuditLog(self.directory, flushInterval=60)
+        log.Record(entry(1)._replace(output="x" * MAX_OUTPUT + "tail"))
+        log.Stop()
+        output = AuditLog.Read(self.directory, 1)[0].output
+        self.assertEqual(len(output), MAX_OUTPUT)
+        self.assertTrue(output.endswith("tail"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the client of the external display socket.
+"""
+import os
+import socket
+import shutil
+import tempfile
+import threading
+import unittest
+from display import FrameClient
+
+class TestFrameClient(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "display")
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen(1)
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.directory)
+
+    def serve(self, replies: bytes):
+        connection, _ = self.server.accept()
+        with connection:
+            connection.recv(64)
+            connection.sendall(replies)        # all replies and an event in one segment
+            while connection.recv(64): pass
+
+    def test_replies_received_together_are_kept(self):
+        thread = threading.Thread(target=self.serve, args=(b"ok\nevent down\nok 160 128 rgb565 /dev/null\n", ), daemon=True)
+        thread.start()
+        client = FrameClient(self.path)
+        client._FrameClient__socket.settimeout(5)
+        client.Sync()
+        self.assertEqual(client._FrameClient__request("info"), "ok 160 128 rgb565 /dev/null")
+        self.assertEqual(client.Events(), ["down"])
+        client.Close()
+        thread.join(5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the shared framebuffer.
+"""
+import os
+import stat
+import shutil
+import tempfile
+import unittest
+from PIL import Image
+from display.framebuffer import FrameBuffer
+
+class TestFrameBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "display.fb")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_create_replaces_planted_symlink(self):
+        target = os.path.join(self.directory, "target")
+        with open(target, "wb") as f: f.write(b"keep")
+        os.symlink(target, self.path)
+        frameBuffer = FrameBuffer(4, 2, self.path, create=True)
+        self.assertFalse(os.path.islink(self.path))
+        with open(target, "rb") as f: self.assertEqual(f.read(), b"keep")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        frameBuffer.Close()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_create_replaces_existing_file(self):
+        with open(self.path, "wb") as f: f.write(b"\xff" * 16)
+        os.chmod(self.path, 0o666)
+        frameBuffer = FrameBuffer(4, 2, self.path, create=True)
+        self.assertEqual(frameBuffer.Read(), b"\0" * 16)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        frameBuffer.Close()
+
+    def test_shared_between_instances(self):
+        owner = FrameBuffer(4, 2, self.path, create=True)
+        client = FrameBuffer(4, 2, self.path)
+        client.Write(Image.new("RGB", (1, 1), (255, 0, 0)), (1, 1))
+        self.assertEqual(owner.Read((1, 1, 2, 2)), b"\xf8\x00")
+        client.Close()
+        owner.Close()
+
+    def test_open_does_not_follow_symlinks(self):
+        FrameBuffer(4, 2, os.path.join(self.directory, "real"), create=True)
+        os.symlink(os.path.join(self.directory, "real"), self.path)
+        with self.assertRaises(OSError):
+            FrameBuffer(4, 2, self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the headless panel driver.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from PIL import Image
+from display import HeadlessLCD, rgb565
+
+class TestHeadlessLCD(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_images_are_converted_and_timed(self):
+        lcd = HeadlessLCD(8, 4, frameDir=self.directory)
+        image = Image.new("RGB", (8, 4), (255, 0, 0))
+        lcd.LCD_ShowImage(image)
+        lcd.LCD_ShowRaw(rgb565.FromImage(image), 0, 0, 8, 4)
+        self.assertEqual(lcd.Frames, 2)
+        self.assertGreater(lcd.FrameTime, 0.0)
+        for name in ("frame000001.png", "frame000002.png"):
+            with Image.open(os.path.join(self.directory, name)) as frame:
+                self.assertEqual(frame.getpixel((0, 0))[:3], (248, 0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the compiled layouts of the built-in commands.
+"""
+import unittest
+from builtin.layout import Layout, ELLIPSIS
+from tests.fakes import FixedFont, FakeDraw
+
+class TestLayout(unittest.TestCase):
+
+    def render(self, rows: list, values: dict) -> list:
+        layout = Layout({"rows": rows}, (100, 64), FixedFont(), FixedFont(), padding=0)
+        draw = FakeDraw()
+        layout.Render(draw, values, True)
+        return draw.Texts
+
+    def test_label_and_value(self):
+        texts = self.render([[{"label": "IP "}, {"value": "ip"}]], {"ip": "10.0.0.1"})
+        self.assertEqual(texts, [((0, 0), "IP "), ((18, 0), "10.0.0.1")])
+
+    def test_long_value_is_ellipsized(self):
+        texts = self.render([[{"label": "Host "}, {"value": "host"}]], {"host": "x" * 40})
+        self.assertEqual(texts[1], ((30, 0), "x" * 10 + ELLIPSIS))
+
+    def test_right_aligned_value_stays_in_box(self):
+        texts = self.render([[{"value": "a", "width": 30, "align": "right"}]], {"a": "abcdefgh"})
+        self.assertEqual(texts, [((0, 0), "abcd" + ELLIPSIS)])
+
+    def test_wrapped_value_is_cut_at_the_last_line(self):
+        texts = self.render([[{"value": "a", "width": 60, "lines": 2}]], {"a": "alpha beta gamma delta"})
+        self.assertEqual(texts, [((0, 0), "alpha "), ((0, 10), "beta" + ELLIPSIS)])
+
+    def test_missing_value(self):
+        texts = self.render([[{"value": "a", "format": "{a:.1f} V"}]], {"a": None})
+        self.assertEqual(texts, [((0, 0), "- V")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the log file viewer.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from builtin.logTail.logTail import LogTail, TailedFile
+from watch import IN_Q_OVERFLOW
+from tests.fakes import FakeDisplay
+
+class OverflowedInotify(object):
+    '''
+        Inotify stand-in that is always readable and reports a queue overflow.
+    '''
+    def __init__(self):
+        self.__read, self.__write = os.pipe()
+        os.write(self.__write, b"\0")
+
+    def fileno(self) -> int:
+        return self.__read
+
+    def Read(self) -> list:
+        return [(-1, IN_Q_OVERFLOW, "")]
+
+    def Close(self):
+        os.close(self.__read)
+        os.close(self.__write)
+
+class TestTailedFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "test.log")
+        with open(self.path, "w") as f: f.write("one\ntwo\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_append_partial_and_rotation(self):
+        tailed = TailedFile(self.path)
+        self.assertEqual(tailed.Read(), ["one", "two"])
+        with open(self.path, "a") as f: f.write("three\nfou")
+        self.assertEqual(tailed.Read(), ["three"])
+        with open(self.path, "a") as f: f.write("r\n")
+        self.assertEqual(tailed.Read(), ["four"])
+        os.rename(self.path, self.path + ".1")
+        with open(self.path, "w") as f: f.write("five\n")
+        self.assertEqual(tailed.Read(), ["five"])
+        tailed.Close()
+
+class TestLogTail(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = [os.path.join(self.directory, name) for name in ("a.log", "b.log")]
+        for path in self.paths:
+            with open(path, "w") as f: f.write(os.path.basename(path) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_queue_overflow_rereads_all_files(self):
+        tail = LogTail(FakeDisplay(), files=self.paths)
+        tail._getData()
+        for path in self.paths:
+            with open(path, "a") as f: f.write("more\n")
+        tail._LogTail__inotify.Close()
+        tail._LogTail__inotify = OverflowedInotify()
+        tail._wait(0)
+        self.assertEqual(tail._LogTail__pending, set(tail._LogTail__files))
+        tail._getData()
+        texts = ["".join(text for _, text, _ in line) for line in tail._LogTail__ring]
+        self.assertEqual(texts, ["a.log", "b.log", "more", "more"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the metrics and their exporter.
+"""
+import os
+import sys
+import stat
+import socket
+import shutil
+import tempfile
+import subprocess
+import unittest
+from diagnostics import Counter, MetricsExporter
+
+REQUESTS = Counter("pimenu_test_requests_total", "Requests counted by the tests.")
+
+class TestMetricsExporter(unittest.TestCase):
+
+    def test_serves_on_private_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "metrics")
+        exporter = MetricsExporter(path)
+        try:
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            REQUESTS.Inc(3)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(5)
+                client.connect(path)
+                client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+                response = b""
+                while True:
+                    data = client.recv(65536)
+                    if not data: break
+                    response += data
+            self.assertTrue(response.startswith(b"HTTP/1.0 200"))
+            self.assertIn(b"pimenu_test_requests_total 3", response)
+        finally:
+            exporter.Stop()
+            shutil.rmtree(directory)
+        self.assertFalse(os.path.exists(path))
+
+    def test_http_server_imported_on_demand(self):
+        code = "import sys, diagnostics; print('http.server' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=30,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), "False", result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the navigation event queue and dispatch thread.
+"""
+import threading
+import time
+import unittest
+from navigation import Navigation, EventQueue, UP_CLICK, DOWN_CLICK
+from navigation.backends import InputBackend
+
+class ManualBackend(InputBackend):
+    ''' Backend emitting the presses passed to Press. '''
+    def _start(self):
+        pass
+
+    def Press(self, eventType: int):
+        self._emit(eventType, time.monotonic())
+
+class TestNavigation(unittest.TestCase):
+
+    def test_presses_are_not_coalesced(self):
+        delivered = []
+        release = threading.Event()
+        def callback(eventType, count):
+            release.wait(5)
+            delivered.append((eventType, count))
+        backend = ManualBackend()
+        nav = Navigation(callback, backend=backend)
+        nav.Start()
+        for _ in range(3): backend.Press(DOWN_CLICK)
+        release.set()
+        nav.Queue.Join(5)
+        nav.Stop()
+        self.assertEqual(delivered[:3], [(DOWN_CLICK, 1)] * 3)
+
+    def test_stop_delivers_queued_events_and_joins(self):
+        delivered = []
+        backend = ManualBackend()
+        nav = Navigation(lambda eventType, count: delivered.append(eventType), backend=backend)
+        nav.Start()
+        backend.Press(UP_CLICK)
+        nav.Stop()
+        self.assertFalse(any(t.name == "navigation" and t.is_alive() for t in threading.enumerate()))
+        self.assertEqual(delivered[0], UP_CLICK)
+        nav.Stop()
+
+class TestEventQueue(unittest.TestCase):
+
+    def test_coalesce(self):
+        queue = EventQueue(coalesce=(DOWN_CLICK, ))
+        for _ in range(3): queue.Put(DOWN_CLICK, 0.0)
+        queue.Put(UP_CLICK, 0.0)
+        self.assertEqual([(e.type, e.count) for e in (queue.Get(0), queue.Get(0))], [(DOWN_CLICK, 3), (UP_CLICK, 1)])
+
+    def test_closed_queue_does_not_wait(self):
+        queue = EventQueue()
+        queue.Put(UP_CLICK, 0.0)
+        queue.Close()
+        self.assertEqual(queue.Get().type, UP_CLICK)
+        self.assertIsNone(queue.Get())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the compilation of the menu tree and its incremental reload.
+"""
+import unittest
+from menu import MenuNode
+
+class TestMenuNode(unittest.TestCase):
+
+    def setUp(self):
+        self.commands = {"a": object(), "b": object(), "c": object()}
+        self.config = {
+            "A": "a",
+            "Sub": {"B": "b", "Deeper": {"C": "c"}},
+            "Services": {"dynamic": {"generator": "seq 1 3", "command": {"type": "shell", "command": "echo {item}"}}}
+        }
+
+    def test_compile(self):
+        root = MenuNode.Compile(self.config, self.commands)
+        self.assertEqual(root.Items, ["A", "Sub", "Services"])
+        sub = root.Child("Sub")
+        self.assertEqual(sub.Items, ["..", "B", "Deeper"])
+        self.assertIs(sub.Entries[0], root)
+        self.assertIs(root.Find(["Sub", "Deeper", "C"]).Command, self.commands["c"])
+        self.assertEqual(root.Find(["Sub", "Deeper"]).Path, ["Sub", "Deeper"])
+        self.assertTrue(root.Child("Services").IsDynamic)
+        root.Release()
+
+    def test_reload_reuses_unchanged_subtrees(self):
+        root = MenuNode.Compile(self.config, self.commands)
+        root.Child("Sub").Remember(2, 1)
+        config = dict(self.config, A="c")
+        reloaded = MenuNode.Compile(config, self.commands, previous=root)
+        self.assertIsNot(reloaded, root)
+        sub = reloaded.Child("Sub")
+        self.assertIs(sub, root.Child("Sub"))
+        self.assertIs(sub.Parent, reloaded)
+        self.assertIs(sub.Entries[0], reloaded)
+        self.assertEqual(sub.Cursor, 2)
+        self.assertIs(reloaded.Child("A").Command, self.commands["c"])
+        reloaded.Release()
+
+    def test_failed_reload_keeps_previous_tree(self):
+        root = MenuNode.Compile(self.config, self.commands)
+        services = root.Child("Services")
+        closed = []
+        services.Dynamic.Close = lambda: closed.append(services)
+        config = dict(self.config, Broken="unknown")
+        with self.assertLogs(level="ERROR"), self.assertRaises(Exception):
+            MenuNode.Compile(config, self.commands, previous=root)
+        for name in ("Sub", "Services"):
+            self.assertIs(root.Child(name).Parent, root)
+            self.assertIs(root.Child(name).Entries[0], root)
+        self.assertIs(root.Find(["Sub", "Deeper"]).Parent, root.Child("Sub"))
+        self.assertEqual(closed, [])
+
+    def test_release_closes_replaced_dynamic_sources(self):
+        root = MenuNode.Compile(self.config, self.commands)
+        closed = []
+        services = root.Child("Services")
+        services.Dynamic.Close = lambda: closed.append(services)
+        reloaded = MenuNode.Compile(dict(self.config, A="b"), self.commands, previous=root)
+        root.Release(reloaded)
+        self.assertEqual(closed, [])
+        config = dict(self.config)
+        del config["Services"]
+        final = MenuNode.Compile(config, self.commands, previous=reloaded)
+        self.assertEqual(closed, [])
+        reloaded.Release(final)
+        self.assertEqual(closed, [services])
+
+    def test_item_commands_are_reused(self):
+        root = MenuNode.Compile(self.config, self.commands)
+        services = root.Child("Services")
+        created = []
+        def create(data):
+            created.append(data["command"])
+            return object()
+        first = services.ItemCommand("1", create)
+        self.assertIs(services.ItemCommand("1", create), first)
+        self.assertEqual(created, ["echo 1"])
+        for item in range(2, 40): services.ItemCommand(str(item), create)
+        self.assertLessEqual(len(services.Commands), 16)
+        self.assertIsNot(services.ItemCommand("1", create), first)
+        root.Release()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the parsing, wrapping and paging of command output.
+"""
+import unittest
+from display.outputView import ParseAnsi, TextWrapper, OutputView, ANSI_COLORS
+from tests.fakes import FixedFont, FakeDraw
+
+class TestParseAnsi(unittest.TestCase):
+
+    def test_colors_and_reset(self):
+        lines = ParseAnsi("ok \x1b[31mfailed\x1b[0m done", "#00FF00")
+        self.assertEqual(lines, [[("ok ", "#00FF00"), ("failed", ANSI_COLORS[1]), (" done", "#00FF00")]])
+
+    def test_color_carries_over_lines(self):
+        lines = ParseAnsi("\x1b[32ma\nb\n", "#fff")
+        self.assertEqual(lines, [[("a", ANSI_COLORS[2])], [("b", ANSI_COLORS[2])]])
+
+    def test_controls_and_carriage_return(self):
+        lines = ParseAnsi("10%\r50%\r100%\n\x1b[2K\ta\x07", "#fff")
+        self.assertEqual(lines, [[("100%", "#fff")], [("    a", "#fff")]])
+
+class TestTextWrapper(unittest.TestCase):
+
+    def test_breaks_after_space(self):
+        wrapper = TextWrapper(FixedFont(), 60)
+        lines = wrapper.Wrap([("alpha beta gamma", "#fff")])
+        self.assertEqual(lines, [[(0, "alpha ", "#fff")], [(0, "beta gamma", "#fff")]])
+
+    def test_long_words_and_runs(self):
+        wrapper = TextWrapper(FixedFont(), 30, breaks=":")
+        lines = wrapper.Wrap([("fe80:", "#f00"), ("0123456789", "#0f0")])
+        self.assertEqual(lines, [[(0, "fe80:", "#f00")], [(0, "01234", "#0f0")], [(0, "56789", "#0f0")]])
+
+    def test_empty_line(self):
+        self.assertEqual(TextWrapper(FixedFont(), 30).Wrap([]), [[]])
+
+class TestOutputView(unittest.TestCase):
+
+    def test_pages(self):
+        view = OutputView(60, 30, FixedFont())
+        view.Show("\n".join(str(n) for n in range(7)))
+        self.assertEqual(view.Pages, 3)
+        self.assertFalse(view.Move(-1))
+        self.assertTrue(view.Move(5))
+        self.assertEqual(view.Page, 2)
+        draw = FakeDraw()
+        view.Draw(draw, 5, 10)
+        self.assertEqual(draw.Texts, [((5, 10), "6")])
+
+    def test_show_starts_at_first_page(self):
+        view = OutputView(60, 10, FixedFont())
+        view.Show("a\nb")
+        view.Move(1)
+        view.Show("a\nb")
+        self.assertEqual(view.Page, 0)
+        self.assertEqual(view.Pages, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the /proc sampling helpers.
+"""
+import os
+import tempfile
+import unittest
+from builtin.procfs import ProcFile, ReadFile, CounterDelta
+
+class TestCounterDelta(unittest.TestCase):
+
+    def test_increment(self):
+        self.assertEqual(CounterDelta(1500, 1000), 500)
+        self.assertEqual(CounterDelta(1000, 1000), 0)
+
+    def test_decrease_is_reset(self):
+        self.assertEqual(CounterDelta(200, 5000), 200)
+        self.assertEqual(CounterDelta(10, (1 << 40)), 10)
+
+    def test_wrap_around(self):
+        self.assertEqual(CounterDelta(100, (1 << 32) - 50), 150)
+        self.assertEqual(CounterDelta(100, (1 << 64) - 50), 150)
+
+class TestProcFile(unittest.TestCase):
+
+    def test_reread_and_chunks(self):
+        with tempfile.NamedTemporaryFile("wb", delete=False) as f:
+            f.write(b"a" * 100)
+        try:
+            proc = ProcFile(f.name, bufferSize=16)
+            self.assertEqual(proc.Read(), b"a" * 100)
+            with open(f.name, "wb") as g: g.write(b"changed")
+            self.assertEqual(proc.Read(), b"changed")
+            proc.Close()
+            self.assertEqual(ReadFile(f.name, 3), b"cha")
+        finally:
+            os.unlink(f.name)
+        self.assertIsNone(ReadFile(f.name))
+
+if __name__ == "__main__":
+    unittest.main()
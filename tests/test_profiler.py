@@ -0,0 +1,74 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the sampling profiler.
+"""
+import os
+import stat
+import shutil
+import tempfile
+import threading
+import unittest
+from diagnostics.profiler import SamplingProfiler, MODE_WALL
+
+def spin(stop: threading.Event):
+    while not stop.is_set(): pass
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        SamplingProfiler.Detach("child")
+        shutil.rmtree(self.directory)
+
+    def test_merges_attached_processes(self):
+        SamplingProfiler.Attach("child", lambda interval, mode: self.calls.append((interval, mode)),
+            lambda: {("MainThread", "main (child.py:1)", "work (child.py:5)"): 7})
+        stop = threading.Event()
+        thread = threading.Thread(target=spin, args=(stop, ), name="spinner")
+        thread.start()
+        profiler = SamplingProfiler(0.005, MODE_WALL)
+        profiler.Start()
+        while profiler.Samples < 5: stop.wait(0.01)
+        profiler.Stop()
+        stop.set()
+        thread.join()
+        self.assertEqual(self.calls, [(0.005, MODE_WALL)])
+        stacks = profiler.Stacks()
+        self.assertEqual(stacks[("child/MainThread", "main (child.py:1)", "work (child.py:5)")], 7)
+        self.assertTrue(any(stack[0] == "spinner" and any(frame.startswith("spin ") for frame in stack) for stack in stacks))
+        self.assertIn("work (child.py:5)", [function for function, _ in profiler.Top(100)])
+
+    def test_write_does_not_follow_symlinks(self):
+        profiler = SamplingProfiler()
+        path = os.path.join(self.directory, "profile.folded")
+        os.symlink(os.path.join(self.directory, "target"), path)
+        with self.assertRaises(OSError):
+            profiler.Write(path)
+        os.unlink(path)
+        self.assertEqual(profiler.Write(path), 0)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the built-in command registry.
+"""
+import unittest
+from builtin import Registry
+
+class Plugin(object):
+    pass
+
+class TestRegistry(unittest.TestCase):
+
+    def test_resolve_imports_once(self):
+        calls = []
+        def load():
+            calls.append(1)
+            return Plugin
+        Registry.Register("testOnce", load)
+        self.assertIs(Registry.Resolve("testOnce"), Plugin)
+        self.assertIs(Registry.Resolve("testOnce"), Plugin)
+        self.assertEqual(len(calls), 1)
+
+    def test_failed_load_keeps_builtin_registered(self):
+        attempts = []
+        def load():
+            attempts.append(1)
+            if len(attempts) == 1: raise ImportError("optional dependency missing")
+            return Plugin
+        Registry.Register("testRetry", load)
+        with self.assertLogs(level="ERROR"):
+            self.assertIsNone(Registry.Resolve("testRetry"))
+        self.assertTrue(Registry.Contains("testRetry"))
+        self.assertIs(Registry.Resolve("testRetry"), Plugin)
+
+    def test_unknown_and_spec_targets(self):
+        self.assertIsNone(Registry.Resolve("testUnknown"))
+        Registry.Register("testSpec", "tests.test_registry:Plugin", inProcess=True)
+        self.assertTrue(Registry.InProcess("testSpec"))
+        self.assertIs(Registry.Resolve("testSpec"), Plugin)
+        self.assertIn("testSpec", Registry.Names())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the RGB565 conversion of the panel frames.
+"""
+import random
+import struct
+import unittest
+from PIL import Image
+from display import rgb565
+
+class TestRgb565(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(565)
+        self.pixels = [tuple(generator.randrange(256) for _ in range(3)) for _ in range(64)]
+        self.image = Image.new("RGB", (16, 4))
+        self.image.frombytes(bytes(v for p in self.pixels for v in p))
+
+    def test_from_image_matches_color(self):
+        data = rgb565.FromImage(self.image)
+        self.assertEqual(list(struct.unpack(">64H", data)), [rgb565.Color(*p) for p in self.pixels])
+
+    def test_round_trip_keeps_significant_bits(self):
+        image = rgb565.ToImage(rgb565.FromImage(self.image), 16, 4)
+        self.assertEqual(image.tobytes(), bytes(v for r, g, b in self.pixels for v in (r & 0xF8, g & 0xFC, b & 0xF8)))
+
+    def test_converts_other_modes(self):
+        image = Image.new("L", (2, 1), 255)
+        self.assertEqual(rgb565.FromImage(image), b"\xff\xff" * 2)
+
+    def test_color(self):
+        self.assertEqual(rgb565.Color(255, 0, 0), 0xF800)
+        self.assertEqual(rgb565.Color(0, 255, 0), 0x07E0)
+        self.assertEqual(rgb565.Color(0, 0, 255), 0x001F)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the ring log and the logging setup.
+"""
+import io
+import os
+import logging
+import tempfile
+import unittest
+from diagnostics import ringlog, logs
+
+class TestRingLog(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".ring")
+        os.close(handle)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_decode_keeps_latest_records(self):
+        ring = ringlog.RingLog(self.path, capacity=4)
+        for value in range(6): ring.Record(ringlog.EVENT_FRAME, value, value * 10)
+        ring.Close()
+        records = ringlog.RingLog.Decode(self.path)
+        self.assertEqual([r[0] for r in records], [3, 4, 5, 6])
+        self.assertEqual([(r[2], r[3], r[4]) for r in records], [("frame", v, v * 10) for v in range(2, 6)])
+
+    def test_aux_is_clipped(self):
+        ring = ringlog.RingLog(self.path, capacity=4)
+        ring.Record(ringlog.EVENT_INPUT, 1, 1 << 20)
+        ring.Record(ringlog.EVENT_INPUT, 1, -1)
+        ring.Close()
+        self.assertEqual([r[4] for r in ringlog.RingLog.Decode(self.path)], [0xffff, 0])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f: f.write(b"\0" * 8192)
+        with self.assertLogs(level="ERROR"), self.assertRaises(Exception):
+            ringlog.RingLog.Decode(self.path)
+
+class TestSetup(unittest.TestCase):
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.saved = (root.level, list(root.handlers))
+
+    def tearDown(self):
+        logs.Shutdown()
+        root = logging.getLogger()
+        root.setLevel(self.saved[0])
+        for handler in self.saved[1]: root.addHandler(handler)
+
+    def test_unknown_level_falls_back(self):
+        stream = io.StringIO()
+        logs.Setup("verbose", stream=stream)
+        self.assertEqual(logging.getLogger().level, logs.DEFAULT_LEVEL)
+        logs.Shutdown()
+        self.assertIn("Unknown log level 'verbose'", stream.getvalue())
+
+    def test_level_name(self):
+        logs.Setup("debug", stream=io.StringIO())
+        self.assertEqual(logging.getLogger().level, logging.DEBUG)
+
+if __name__ == "__main__":
+    unittest.main()
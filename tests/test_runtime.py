@@ -0,0 +1,68 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the event loop runtime.
+"""
+import threading
+import unittest
+from runtime import Runtime
+
+class TestRuntime(unittest.TestCase):
+
+    def run_with(self, work: callable) -> Runtime:
+        runtime = Runtime()
+        def thread():
+            try:
+                work(runtime)
+            finally:
+                runtime.Stop()
+        runtime.Call(lambda: threading.Thread(target=thread).start())
+        runtime.Run()
+        return runtime
+
+    def test_invoke_runs_on_loop_thread(self):
+        results = []
+        def work(runtime):
+            results.append(runtime.Invoke(lambda a, b: (runtime.IsLoopThread, a + b), 1, b=2))
+        self.run_with(work)
+        self.assertEqual(results, [(True, 3)])
+
+    def test_invoke_raises_exceptions(self):
+        errors = []
+        def work(runtime):
+            try:
+                runtime.Invoke(lambda: 1 / 0)
+            except ZeroDivisionError as e:
+                errors.append(e)
+        self.run_with(work)
+        self.assertEqual(len(errors), 1)
+
+    def test_calls_after_close_are_dropped(self):
+        runtime = self.run_with(lambda runtime: None)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(runtime.Invoke(lambda: 1)))
+        thread.start()
+        thread.join(5)
+        self.assertEqual(results, [None])
+        runtime.Call(self.fail)
+
+if __name__ == "__main__":
+    unittest.main()
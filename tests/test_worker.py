@@ -0,0 +1,104 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Tests for the command worker process.
+"""
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+from display import FrameBuffer
+from command.worker import Serve, MSG_BUILTIN, MSG_SHELL, MSG_EXIT, MSG_RESULT, MSG_COMPLETED, MSG_MENU, MSG_METRIC, \
+    MSG_PROFILE, MSG_STACKS
+
+PLUGINS = {
+    "failingInit.py": '''
+from builtin import BuiltInCommand
+class FailingInit(BuiltInCommand):
+    def __init__(self, disp):
+        raise Exception("constructor failed")
+    def _draw(self):
+        pass
+''',
+    "failingDraw.py": '''
+from builtin import BuiltInCommand
+class FailingDraw(BuiltInCommand):
+    def _draw(self):
+        raise Exception("draw failed")
+'''
+}
+
+class TestServe(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name, source in PLUGINS.items():
+            with open(os.path.join(self.directory, name), "w") as f: f.write(source)
+        self.frameBuffer = FrameBuffer(32, 16)
+        context = multiprocessing.get_context("spawn")
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=Serve, daemon=True, 
+            args=(child, self.frameBuffer.Path, 32, 16, [self.directory], None, 0, None))
+        self.process.start()
+        child.close()
+
+    def tearDown(self):
+        if self.process.is_alive(): self.process.kill()
+        self.connection.close()
+        self.frameBuffer.Close()
+        shutil.rmtree(self.directory)
+
+    def receive(self, count: int) -> list:
+        messages = []
+        while len(messages) < count:
+            self.assertTrue(self.connection.poll(10), f"worker sent {messages}")
+            message = self.connection.recv()
+            if message[0] != MSG_METRIC: messages.append(message)
+        return messages
+
+    def test_failing_builtins_do_not_stop_the_worker(self):
+        self.connection.send((MSG_BUILTIN, 1, "failingInit", None))
+        self.assertCountEqual(self.receive(2), [(MSG_COMPLETED, 1), (MSG_MENU, )])
+        self.connection.send((MSG_BUILTIN, 2, "failingDraw", None))
+        self.assertCountEqual(self.receive(2), [(MSG_COMPLETED, 2), (MSG_MENU, )])
+        self.connection.send((MSG_BUILTIN, 3, "unknownBuiltIn", None))
+        self.assertCountEqual(self.receive(2), [(MSG_COMPLETED, 3), (MSG_MENU, )])
+        self.connection.send((MSG_SHELL, 4, "echo alive", None))
+        self.assertEqual(self.receive(1), [(MSG_RESULT, 4, 0, "alive\n")])
+        self.connection.send((MSG_EXIT, ))
+        self.process.join(10)
+        self.assertEqual(self.process.exitcode, 0)
+
+    def test_profile_returns_worker_stacks(self):
+        self.connection.send((MSG_PROFILE, 0.005, "wall"))
+        time.sleep(0.3)
+        self.connection.send((MSG_PROFILE, None, None))
+        kind, stacks = self.receive(1)[0]
+        self.assertEqual(kind, MSG_STACKS)
+        self.assertTrue(any(stack[0] == "MainThread" and any(frame.startswith("Serve ") for frame in stack) 
+            for stack in stacks))
+        self.connection.send((MSG_PROFILE, None, None))
+        self.assertEqual(self.receive(1), [(MSG_STACKS, {})])
+
+if __name__ == "__main__":
+    unittest.main()
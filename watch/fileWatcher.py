@@ -0,0 +1,103 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import os
+import select
+import logging
+import threading
+from .inotify import Inotify, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE, IN_MODIFY, IN_Q_OVERFLOW
+
+class FileWatcher(object):
+    '''
+        The FileWatcher class invokes a callback when a file changes. The directory of the file is watched, so 
+        editors that replace the file by renaming a temporary file are detected as well. Bursts of changes are 
+        collapsed into a single callback once the file has been quiet for the settle time. 
+    '''
+    def __init__(self, path: str, callback: callable, settle: float = 0.2, poll: float = 2.0):
+        '''
+            Constructor - Creates a new instance of the FileWatcher class and starts watching.
+            Parameters:
+                path:       str
+                            The file to watch.
+                callback:   callable
+                            Delegate invoked on the watcher thread after the file changed: () -> None
+                settle:     float, optional
+                            Time in seconds without further changes before the callback is invoked.
+                poll:       float, optional
+                            Polling interval used if inotify is not available.
+        '''
+        self.__path = os.path.abspath(path)
+        self.__callback = callback
+        self.__settle = settle
+        self.__poll = poll
+        self.__stopped = threading.Event()
+        try:
+            self.__inotify = Inotify()
+            self.__inotify.Add(os.path.dirname(self.__path), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY)
+        except OSError as e:
+            logging.warning(f"inotify unavailable, polling {path}: {e}")
+            self.__inotify = None
+        self.__thread = threading.Thread(target=self.__watch, name="fileWatcher", daemon=True)
+        self.__thread.start()
+
+    def Stop(self):
+        ''' Stops watching. '''
+        self.__stopped.set()
+
+    def __changed(self, timeout: float) -> bool:
+        '''
+            Waits for a change of the watched file.
+            Parameters:
+                timeout:    float
+                            Maximum time to wait in seconds, None to wait indefinitely.
+            Returns:
+                True if the file changed.
+        '''
+        if self.__inotify is None:
+            before = self.__stat()
+            self.__stopped.wait(self.__poll if timeout is None else timeout)
+            return self.__stat() != before
+        readable, _, _ = select.select([self.__inotify], [], [], 1.0 if timeout is None else timeout)
+        if not readable: return False
+        name = os.path.basename(self.__path)
+        # an overflowed queue may have dropped the change, treat it as one
+        return any(n == name or mask & IN_Q_OVERFLOW for _, mask, n in self.__inotify.Read())
+
+    def __stat(self):
+        ''' Gets the modification time and size of the watched file. '''
+        try:
+            st = os.stat(self.__path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def __watch(self):
+        '''
+            Watcher thread entry point.
+        '''
+        while not self.__stopped.is_set():
+            if not self.__changed(None): continue
+            while self.__changed(self.__settle) and not self.__stopped.is_set(): pass
+            if self.__stopped.is_set(): break
+            try:
+                self.__callback()
+            except Exception as e:
+                logging.exception(e)
+        if self.__inotify is not None: self.__inotify.Close()
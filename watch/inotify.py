@@ -0,0 +1,118 @@
+# Copyright (c) 2019 Avanade
+# Author: Thor Schueler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+    Thin ctypes wrapper around the Linux inotify API. 
+"""
+import os
+import struct
+import ctypes
+import ctypes.util
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+EVENT = struct.Struct("iIII")
+
+class Inotify(object):
+    '''
+        The Inotify class wraps an inotify instance. The file descriptor is non blocking and can be
+        passed to select() to sleep until one of the watched paths changes.
+    '''
+    __libc = None
+
+    def __init__(self):
+        '''
+            Constructor - Creates a new inotify instance. 
+            Raises OSError if inotify is not available on the platform.
+        '''
+        if Inotify.__libc is None:
+            Inotify.__libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(Inotify.__libc, "inotify_init1"): raise OSError("inotify is not available")
+        self.__fd = Inotify.__libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.__fd < 0: raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+
+    def Add(self, path: str, mask: int) -> int:
+        '''
+            Adds or updates a watch.
+            Parameters:
+                path:       str
+                            The file or directory to watch.
+                mask:       int
+                            Combination of the IN_* events to watch for.
+            Returns:
+                The watch descriptor.
+        '''
+        wd = Inotify.__libc.inotify_add_watch(self.__fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0: raise OSError(ctypes.get_errno(), f"{os.strerror(ctypes.get_errno())}: {path}")
+        return wd
+
+    def Close(self):
+        ''' Closes the inotify instance and removes all watches. '''
+        if self.__fd >= 0:
+            os.close(self.__fd)
+            self.__fd = -1
+
+    def fileno(self) -> int:
+        ''' Gets the inotify file descriptor. Allows the instance to be passed to select() directly. '''
+        return self.__fd
+
+    def Read(self) -> list:
+        '''
+            Reads the pending events without blocking.
+            Returns:
+                A list of (wd, mask, name) tuples. name is the name of the affected file for watched
+                directories and an empty string otherwise. 
+        '''
+        events = []
+        while True:
+            try:
+                data = os.read(self.__fd, 4096)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                events.append((wd, mask, name))
+        return events
+
+    def Remove(self, wd: int):
+        '''
+            Removes a watch.
+            Parameters:
+                wd:         int
+                            The watch descriptor returned by Inotify.Add
+        '''
+        Inotify.__libc.inotify_rm_watch(self.__fd, wd)
+
+    def __del__(self):
+        ''' Destructor - closes the inotify instance. '''
+        self.Close()